@@ -6,29 +6,35 @@
 # For standalone testing, using a basic logger:
 import logging
 import os
+import sys
 from datetime import datetime
 
 import pytz
 import requests
 from dotenv import load_dotenv
-from pyairtable import Api
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Run from LoginBot/ as a script; make the shared package importable
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
+from Shared.Data.airtable_rate_limit import get_airtable_api
 
-# --- Load dotenv from project root ---
-# Assumes .env file is in the same directory or a parent directory
-load_dotenv()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 class AirtableClient:
     def __init__(self, table_key: str = None):
+        # .env is searched from the working directory up, on first use
+        load_dotenv()
         self.api_key = os.getenv("AIRTABLE_API_KEY")
         if not self.api_key:
             raise ValueError("Missing AIRTABLE_API_KEY in environment variables")
 
-        self.api = Api(self.api_key)
+        # Process-wide Api: pooled keep-alive session, per-base token bucket
+        # and 429/5xx retry policy
+        self.api = get_airtable_api(self.api_key)
 
         # These will be set by the fetch methods
         self.base_id = None
@@ -15,13 +15,13 @@ sys.path.insert(0, project_root)
 
 import requests  # For the API-based approach
 
-from Shared.Data.airtable_manager import AirtableClient
+from Shared.Data.airtable_manager import AirtableClient, get_airtable_client
 
 # REMOVED: from Shared.Utils.xpath_config import InstagramXPaths
 from Shared.Imap.get_imap_code import get_instagram_verification_code
 from Shared.instagram_actions import InstagramInteractions
 from Shared.Utils.logger_config import setup_logger
-from Shared.Utils.stealth_typing import StealthTyper
+from Shared.Utils.stealth_typing import StealthTyper, get_stealth_typer
 
 # --- NEW VPN IMPORT ---
 from Shared.VPN.nord import main_flow as rotate_nordvpn_ip
@@ -107,11 +107,12 @@ class InstagramLoginHandler:
         self.xpaths = HardcodedXPaths(interactions.app_package)
         self.typer = stealth_typer
         self.logger = setup_logger(self.__class__.__name__)
+        if airtable_client and base_id and table_id:
+            # Use the shared client for that table; re-pointing the passed
+            # one would redirect every other user of it too
+            airtable_client = airtable_client.for_table(base_id, table_id)
         self.airtable_client = airtable_client
         self.record_id = record_id
-        if airtable_client and base_id and table_id:
-            airtable_client.base_id = base_id
-            airtable_client.table_id = table_id
         self.package_name = self.interactions.app_package
         self.current_username: Optional[str] = None
         self.logger.debug(f"Initialized Login Handler for package: {self.package_name}")
@@ -132,32 +133,35 @@ class InstagramLoginHandler:
             "suspended_smart": self.xpaths.account_suspended_text_smart,
         }
 
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            for name in [
-                "save_login_view",
-                "save_login_smart",
-                "notifications_smart",
-                "story_text",
-                "story_button",
-                "story_image",
-            ]:
-                if self.interactions.element_exists(checks[name]):
-                    self.logger.info(f"✅ Detected UI indicating Login Success: {name}")
-                    return "login_success"
-
-            for name in ["2fa_prompt", "2fa_input", "2fa_text"]:
-                if self.interactions.element_exists(checks[name]):
-                    self.logger.info(f"✅ Detected UI indicating 2FA Required: {name}")
-                    return "2fa_required"
+        # Dict order is the priority order when several indicators are on screen
+        states = {
+            "save_login_view": "login_success",
+            "save_login_smart": "login_success",
+            "notifications_smart": "login_success",
+            "story_text": "login_success",
+            "story_button": "login_success",
+            "story_image": "login_success",
+            "2fa_prompt": "2fa_required",
+            "2fa_input": "2fa_required",
+            "2fa_text": "2fa_required",
+            "suspended_smart": "account_suspended",
+        }
 
-            if self.interactions.element_exists(checks["suspended_smart"]):
+        # Re-checked whenever the screen changes (1 s polling as fallback)
+        name, _ = self.interactions.wait_for_any(
+            checks, timeout=timeout, poll_interval=1.0
+        )
+        if name:
+            state = states[name]
+            if state == "login_success":
+                self.logger.info(f"✅ Detected UI indicating Login Success: {name}")
+            elif state == "2fa_required":
+                self.logger.info(f"✅ Detected UI indicating 2FA Required: {name}")
+            else:
                 self.logger.warning(
-                    f"🚫 Detected UI indicating Account Suspended: suspended_smart"
+                    f"🚫 Detected UI indicating Account Suspended: {name}"
                 )
-                return "account_suspended"
-
-            time.sleep(1.0)
+            return state
 
         self.logger.error(
             f"⏰ Timeout ({timeout}s): No known post-login state detected."
@@ -258,14 +262,13 @@ class InstagramLoginHandler:
     def _update_airtable_status(self, status_map: dict):
         if self.airtable_client and self.record_id:
             self.logger.info(
-                f"📡 Updating Airtable record {self.record_id}: {status_map}"
+                f"📡 Queuing Airtable update for record {self.record_id}: {status_map}"
             )
-            try:
-                self.airtable_client.update_record_fields(self.record_id, status_map)
-                self.logger.info(f"✅ Airtable update successful.")
-            except Exception as e:
+            if self.airtable_client.enqueue_record_update(self.record_id, status_map):
+                self.logger.info(f"✅ Airtable update queued.")
+            else:
                 self.logger.error(
-                    f"❌ Airtable update failed for record {self.record_id}: {e}"
+                    f"❌ Failed to queue Airtable update for record {self.record_id}"
                 )
         else:
             self.logger.debug(
@@ -410,7 +413,7 @@ class InstagramLoginHandler:
 if __name__ == "__main__":
     module_logger.info("--- Running Instagram Login Handler Standalone E2E Test ---")
 
-    airtable_client = AirtableClient()
+    airtable_client = get_airtable_client()
     module_logger.info("Fetching one unused account from Airtable...")
 
     accounts_to_test = airtable_client.fetch_unused_accounts(max_records=1)
@@ -460,7 +463,7 @@ if __name__ == "__main__":
             device=d, app_package=INSTAGRAM_PACKAGE_NAME
         )
         # REMOVED: xpaths = InstagramXPaths(package_name=INSTAGRAM_PACKAGE_NAME)
-        typer = StealthTyper(device_id=d.serial)
+        typer = get_stealth_typer(d)
 
         login_handler = InstagramLoginHandler(
             device=d,
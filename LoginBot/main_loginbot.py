@@ -11,7 +11,6 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
 import json
-import threading
 
 import requests  # For the API-based approach
 
@@ -21,10 +20,11 @@ from nord import main_flow as rotate_nordvpn_ip
 from PIL import Image
 
 from Shared.config_loader import get_popup_config
-from Shared.Data.airtable_manager import AirtableClient
+from Shared.Data.airtable_manager import AirtableClient, get_airtable_client
 from Shared.instagram_actions import InstagramInteractions
+from Shared.UI.popup_watcher import PopupWatcherEngine, get_popup_rules
 from Shared.Utils.logger_config import setup_logger
-from Shared.Utils.stealth_typing import StealthTyper
+from Shared.Utils.stealth_typing import StealthTyper, get_stealth_typer
 
 # --- Logger Setup ---
 module_logger = setup_logger(__name__)
@@ -99,11 +99,12 @@ class InstagramLoginHandler:
         self.xpaths = HardcodedXPaths(interactions.app_package)
         self.typer = stealth_typer
         self.logger = setup_logger(self.__class__.__name__)
+        if airtable_client and base_id and table_id:
+            # Use the shared client for that table; re-pointing the passed
+            # one would redirect every other user of it too
+            airtable_client = airtable_client.for_table(base_id, table_id)
         self.airtable_client = airtable_client
         self.record_id = record_id
-        if airtable_client and base_id and table_id:
-            airtable_client.base_id = base_id
-            airtable_client.table_id = table_id
         self.package_name = self.interactions.app_package
         self.current_username: Optional[str] = None
         self.logger.debug(f"Initialized Login Handler for package: {self.package_name}")
@@ -124,32 +125,34 @@ class InstagramLoginHandler:
             "suspended_smart": self.xpaths.account_suspended_text_smart,
         }
 
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            for name in [
-                "save_login_view",
-                "save_login_smart",
-                "notifications_smart",
-                "story_text",
-                "story_button",
-                "story_image",
-            ]:
-                if self.interactions.element_exists(checks[name]):
-                    self.logger.info(f"✅ Detected UI indicating Login Success: {name}")
-                    return "login_success"
-
-            for name in ["2fa_prompt", "2fa_input", "2fa_text"]:
-                if self.interactions.element_exists(checks[name]):
-                    self.logger.info(f"✅ Detected UI indicating 2FA Required: {name}")
-                    return "2fa_required"
-
-            if self.interactions.element_exists(checks["suspended_smart"]):
+        # Dict order is the priority order when several indicators are on screen
+        states = {
+            "save_login_view": "login_success",
+            "save_login_smart": "login_success",
+            "notifications_smart": "login_success",
+            "story_text": "login_success",
+            "story_button": "login_success",
+            "story_image": "login_success",
+            "2fa_prompt": "2fa_required",
+            "2fa_input": "2fa_required",
+            "2fa_text": "2fa_required",
+            "suspended_smart": "account_suspended",
+        }
+
+        name, _ = self.interactions.wait_for_any(
+            checks, timeout=timeout, poll_interval=1.0
+        )
+        if name:
+            state = states[name]
+            if state == "login_success":
+                self.logger.info(f"✅ Detected UI indicating Login Success: {name}")
+            elif state == "2fa_required":
+                self.logger.info(f"✅ Detected UI indicating 2FA Required: {name}")
+            else:
                 self.logger.warning(
-                    f"🚫 Detected UI indicating Account Suspended: suspended_smart"
+                    f"🚫 Detected UI indicating Account Suspended: {name}"
                 )
-                return "account_suspended"
-
-            time.sleep(1.0)
+            return state
 
         self.logger.error(
             f"⏰ Timeout ({timeout}s): No known post-login state detected."
@@ -258,14 +261,13 @@ class InstagramLoginHandler:
     def _update_airtable_status(self, status_map: dict):
         if self.airtable_client and self.record_id:
             self.logger.info(
-                f"📡 Updating Airtable record {self.record_id}: {status_map}"
+                f"📡 Queuing Airtable update for record {self.record_id}: {status_map}"
             )
-            try:
-                self.airtable_client.update_record_fields(self.record_id, status_map)
-                self.logger.info(f"✅ Airtable update successful.")
-            except Exception as e:
+            if self.airtable_client.enqueue_record_update(self.record_id, status_map):
+                self.logger.info(f"✅ Airtable update queued.")
+            else:
                 self.logger.error(
-                    f"❌ Airtable update failed for record {self.record_id}: {e}"
+                    f"❌ Failed to queue Airtable update for record {self.record_id}"
                 )
         else:
             self.logger.debug(
@@ -404,8 +406,7 @@ class PopupHandler:
     def __init__(self, driver: u2.Device):
         self.d = driver
         self.logger = setup_logger(self.__class__.__name__)
-        self._watcher_thread = None
-        self._watcher_stop_event = threading.Event()
+        self._engine: Optional[PopupWatcherEngine] = None
         self.airtable_client = None
         self.record_id = None
         self.package_name = None
@@ -429,83 +430,44 @@ class PopupHandler:
         self.table_id = table_id
         self._suspension_handled = False
 
-    def register_and_start_watchers(self):
+    def register_and_start_watchers(self, interval: float = 1.0):
         self.logger.info("Registering and starting popup watchers...")
-        w = self.d.watcher
-        w.reset()
 
         if not isinstance(self.config, list) or not self.config:
             self.logger.warning("Popup config invalid. No watchers will start.")
             return
 
-        for entry in self.config:
-            name = entry.get("name")
-            text_xpath = entry.get("text_xpath")
-            button_xpath = entry.get("button_xpath")
-            callback_name = entry.get("callback")
-
-            if not name or not text_xpath:
-                self.logger.warning(f"Skipping invalid entry: {entry}")
-                continue
-
-            watcher = w(name).when(text_xpath)
-
-            # --- FIX APPLIED HERE ---
-            if callback_name:
-                # Only call getattr if callback_name is not None
-                callback_method = getattr(self, callback_name, None)
+        rules = get_popup_rules()
+        callbacks = {}
+        for rule in rules:
+            if rule.callback:
+                callback_method = getattr(self, rule.callback, None)
                 if callable(callback_method):
                     self.logger.info(
-                        f"Registering watcher '{name}': WHEN '{text_xpath}' THEN CALL '{callback_name}'"
+                        f"Registering watcher '{rule.name}': WHEN '{rule.text_xpath}' THEN CALL '{rule.callback}'"
                     )
-                    watcher.call(callback_method)
+                    callbacks[rule.callback] = callback_method
                 else:
                     self.logger.error(
-                        f"Callback '{callback_name}' not found for watcher '{name}'."
+                        f"Callback '{rule.callback}' not found for watcher '{rule.name}'."
                     )
-            elif button_xpath:
+            else:
                 self.logger.info(
-                    f"Registering watcher '{name}': WHEN '{text_xpath}' THEN CLICK '{button_xpath}'"
-                )
-                watcher.call(
-                    lambda selector, xpath=button_xpath: self.d.xpath(xpath).click()
+                    f"Registering watcher '{rule.name}': WHEN '{rule.text_xpath}' THEN CLICK '{rule.button_xpath}'"
                 )
-            else:
-                self.logger.warning(f"Watcher '{name}' has no valid action.")
 
-        if not w._watchers:
+        if not rules:
             self.logger.info("No watchers registered. Loop will not start.")
             return
 
-        self._watcher_stop_event.clear()
-        self._watcher_thread = threading.Thread(target=self._watcher_loop, daemon=True)
-        self._watcher_thread.start()
-        self.logger.info(f"✅ {len(w._watchers)} watchers started in background.")
-
-    def _watcher_loop(self, interval: float = 1.0):
-        self.logger.debug("📡 Watcher thread running.")
-        while not self._watcher_stop_event.is_set():
-            try:
-                self.d.watcher.run()
-            except Exception as e:
-                self.logger.error(f"💥 Watcher run error: {e}", exc_info=False)
-            self._watcher_stop_event.wait(timeout=interval)
-        self.logger.info("📡 Watcher thread stopped.")
+        self._engine = PopupWatcherEngine(self.d, rules, callbacks)
+        self._engine.start(interval=interval)
+        self.logger.info(f"✅ {len(rules)} watchers started in background.")
 
     def stop_watchers(self):
-        if self._watcher_thread and self._watcher_thread.is_alive():
+        if self._engine is not None and self._engine.running:
             self.logger.info("🛑 Signaling watcher loop to stop...")
-            self._watcher_stop_event.set()
-            self._watcher_thread.join(timeout=2.0)
-            self._watcher_thread = None
-
-        try:
-            self.d.watcher.stop()
-            self.d.watcher.remove()
-            self.logger.info("Underlying uiautomator2 watchers stopped.")
-        except Exception as e:
-            if "watch already stopped" not in str(e):
-                self.logger.error(f"Error stopping uiautomator2 watcher: {e}")
+            self._engine.stop()
 
     # --- Watcher Callbacks ---
     def handle_suspension(self, selector):
@@ -518,14 +480,13 @@ class PopupHandler:
             return
         try:
             self.logger.info(f"Updating Airtable record {self.record_id} to 'Banned'.")
-            if self.base_id:
-                self.airtable_client.base_id = self.base_id
-            if self.table_id:
-                self.airtable_client.table_id = self.table_id
-            self.airtable_client.update_record_fields(
-                self.record_id, {"Status": "Banned"}
-            )
-            self.logger.info("✅ Updated Airtable status to 'Banned'.")
+            if self.airtable_client.enqueue_record_update(
+                self.record_id,
+                {"Status": "Banned"},
+                base_id=self.base_id,
+                table_id=self.table_id,
+            ):
+                self.logger.info("✅ Queued Airtable status 'Banned'.")
             if self.package_name:
                 self.logger.info(f"🛑 Stopping suspended app: {self.package_name}")
                 self.d.app_stop(self.package_name)
@@ -557,7 +518,7 @@ if __name__ == "__main__":
     try:
         # 1. Fetch Account Details from Airtable
         module_logger.info("Fetching one unused account from Airtable...")
-        airtable_client = AirtableClient()
+        airtable_client = get_airtable_client()
         accounts_to_process = airtable_client.fetch_unused_accounts(max_records=1)
 
         if not accounts_to_process:
@@ -629,7 +590,7 @@ if __name__ == "__main__":
 
         # 6. Initialize Handlers for Login Execution
         interactions = InstagramInteractions(device=d, app_package=PACKAGE_NAME)
-        typer = StealthTyper(device_id=d.serial)
+        typer = get_stealth_typer(d)
         login_handler = InstagramLoginHandler(
             device=d,
             interactions=interactions,
@@ -5,6 +5,9 @@ import time
 
 from uiautomator2 import UiObjectNotFoundError
 
+from Shared.UI.ui_change_feed import get_ui_change_feed
+from Shared.UI.ui_snapshot import get_hierarchy_cache, invalidate_hierarchy
+
 
 def extract_ip_number(content_desc: str) -> str:
     """
@@ -49,18 +52,24 @@ def main_flow(d):
     if not reconnect_btn.wait(timeout=5):
         raise RuntimeError("❌ Reconnect button not found. UI may have changed.")
 
+    feed = get_ui_change_feed(d)
+    snapshots = get_hierarchy_cache(d)
+    token = feed.token()
     reconnect_btn.click()
+    invalidate_hierarchy(d)
     print("🔄 Reconnect button clicked. Starting intelligent wait for IP rotation...")
 
     # --- NEW: Intelligent Waiting Loop ---
+    # Re-checks as soon as the app redraws (status changes), instead of every 2 s
     deadline = time.time() + TOTAL_TIMEOUT
     connection_successful = False
 
     while time.time() < deadline:
         # Check if the connection has been successfully established.
-        if d.xpath(xpath_connected).exists:
+        status_node = snapshots.get().first(xpath_connected)
+        if status_node is not None:
             # Verify the IP has actually changed to avoid false positives
-            current_desc = d.xpath(xpath_connected).get().attrib.get("content-desc", "")
+            current_desc = status_node.attrib.get("content-desc", "")
             current_ip = extract_ip_number(current_desc)
             if current_ip and current_ip != ip_before:
                 print("\n✅ Connection successful and IP has rotated.")
@@ -74,7 +83,9 @@ def main_flow(d):
             f"\r   Waiting for new connection... Time remaining: {remaining_time:03d}s",
             end="",
         )
-        time.sleep(2)  # Poll every 2 seconds
+        token = feed.wait_for_change(
+            token, timeout=max(0.0, deadline - time.time()), poll_interval=2
+        )
 
     print()  # Move to the next line after the loop finishes
 
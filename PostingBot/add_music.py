@@ -7,10 +7,10 @@ from typing import Dict, Optional, Tuple
 
 import uiautomator2 as u2
 
-from Shared.logger_config import setup_logger
-
-# Assuming SwipeHelper class is moved to its own file
-from Shared.xpath_config import InstagramXPaths
+from Shared.instagram_actions import InstagramInteractions
+from Shared.UI.selector_chain import SelectorChain
+from Shared.Utils.logger_config import setup_logger
+from Shared.Utils.xpath_config import get_instagram_xpaths
 
 logger = setup_logger("AddMusic")
 
@@ -20,7 +20,7 @@ class SoundAdder:
         self.device = device
         self.app_package = app_package
         self.insta_actions = insta_actions
-        self.xpath_config = InstagramXPaths(app_package)
+        self.xpath_config = get_instagram_xpaths(app_package)
         self.logger = logger
 
     def select_random_track(self) -> bool:
@@ -100,7 +100,7 @@ class SoundAdder:
             )
             add_audio_button.click()
             self.logger.debug("✅ Clicked 'Add audio' button")
-            time.sleep(2)
+            self.insta_actions.await_ui_settled(max_wait=2.0)
 
             # Step 2a: Attempt to click 'Trending' tab (optional fallback if not found)
             self.logger.debug(
@@ -122,7 +122,7 @@ class SoundAdder:
                         trending_parent.click()
                         self.logger.debug("✅ Clicked 'Trending' tab")
                         trending_clicked = True
-                        time.sleep(1)
+                        self.insta_actions.await_ui_settled(max_wait=1.0)
                         break
                     else:
                         self.logger.debug(
@@ -132,7 +132,7 @@ class SoundAdder:
                     self.logger.warning(
                         f"⚠️ Attempt {attempt}: Exception during click: {e}"
                     )
-                time.sleep(1)
+                time.sleep(1)  # Retry interval while the sheet loads
 
             if not trending_clicked:
                 self.logger.warning(
@@ -145,15 +145,13 @@ class SoundAdder:
             )
             try:
                 possible_ids = self.xpath_config.audio_bottom_sheet_drag_handle_rids
-                handle = None
-
-                for rid in possible_ids:
-                    xpath = f"//*[contains(@resource-id, '{rid}')]"
-                    selector = self.device.xpath(xpath)
-                    if selector.exists:
-                        handle = selector.get()
-                        self.logger.debug(f"✅ Found drag handle using: '{rid}'")
-                        break
+                drag_handle = SelectorChain(
+                    "audio_bottom_sheet_drag_handle",
+                    {rid: f"//*[contains(@resource-id, '{rid}')]" for rid in possible_ids},
+                )
+                rid, handle = self.insta_actions.wait_for_chain(drag_handle, timeout=1)
+                if handle is not None:
+                    self.logger.debug(f"✅ Found drag handle using: '{rid}'")
 
                 if handle is None:
                     self.logger.error(
@@ -162,7 +160,7 @@ class SoundAdder:
                     return False, "Drag handle not found", None
 
                 start_x, start_y = handle.center()
-                screen_height = self.device.info["displayHeight"]
+                screen_height = self.insta_actions.device_profile.height
                 end_y = int(screen_height * 0.1)
 
                 self.logger.debug(
@@ -204,7 +202,7 @@ class SoundAdder:
             if not self.insta_actions.click_by_xpath(track_xpath):
                 self.logger.error("❌ Failed to click selected track")
                 return False, "Failed to click selected track", None
-            time.sleep(1)
+            self.insta_actions.await_ui_settled(max_wait=1.0)
 
             # Step 4: Only click 'Select Sound' if trending was clicked
             if trending_clicked:
@@ -214,7 +212,7 @@ class SoundAdder:
                 ):
                     self.logger.error("❌ Failed to click 'Select Sound'")
                     return False, "Failed to click Select Sound", None
-                time.sleep(2)
+                self.insta_actions.await_ui_settled(max_wait=2.0)
 
             self.logger.debug(
                 "🎚️ Waiting for scrubber view to load before interaction..."
@@ -232,7 +230,7 @@ class SoundAdder:
             # Step 5: Confirm with 'Done'
             self.logger.debug("✅ Step 5: Clicking 'Done'")
             self.insta_actions.click_by_xpath(self.xpath_config.click_done)
-            time.sleep(2)
+            self.insta_actions.await_ui_settled(max_wait=2.0)
 
             # Step 6: Finalize post with 'Next'
             self.logger.debug("📲 Step 6: Clicking 'Next' to finalize post")
@@ -258,7 +256,7 @@ class SoundAdder:
                             "⚠️ 'Next' button still visible after click — retrying..."
                         )
 
-                time.sleep(4)
+                self.insta_actions.await_ui_settled(max_wait=4.0)
 
             else:
                 self.logger.error(
@@ -267,6 +265,7 @@ class SoundAdder:
                 return False, "Next button stuck after retries", None
 
             self.logger.debug("🎉 add_music_to_reel completed successfully")
+            self.logger.debug(f"⏱️ {self.insta_actions.settle_summary()}")
             return True, "Successfully added music to reel", song_info
 
         except Exception as e:
@@ -320,8 +319,8 @@ class SoundAdder:
 
             el = scrubber.get()
             bounds = el.bounds
-            screen_width = self.device.info["displayWidth"]
-            screen_height = self.device.info["displayHeight"]
+            profile = self.insta_actions.device_profile
+            screen_width, screen_height = profile.width, profile.height
 
             gesture_count = random.randint(2, 4)  # realistic adjustment attempts
             self.logger.debug(f"🔁 Performing {gesture_count} gesture(s)")
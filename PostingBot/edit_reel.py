@@ -47,7 +47,7 @@ class ReelEditor:
             if self.insta_actions.element_exists(target_item_xpath):
                 logger.info(f"Found '{item_name}' at XPath: {target_item_xpath}")
                 if self.insta_actions.click_by_xpath(target_item_xpath, timeout=2):
-                    time.sleep(action_delay)
+                    self.insta_actions.await_ui_settled(max_wait=action_delay)
                     return True
                 else:
                     logger.warning(
@@ -61,7 +61,7 @@ class ReelEditor:
                 scroll_element = self.device.xpath(scrollable_xpath)
                 if scroll_element.exists:
                     scroll_element.swipe("left", steps=20)
-                    time.sleep(0.8)  # Increased wait for scroll and UI update
+                    self.insta_actions.await_ui_settled(max_wait=0.8)  # Scroll fling + redraw
                 else:
                     logger.warning(
                         f"Scrollable element {scrollable_xpath} not found for swiping."
@@ -103,7 +103,7 @@ class ReelEditor:
         ):
             logger.error("Failed to click initial 'Add Text' (Aa) button.")
             return False
-        time.sleep(1.5)  # Wait for text input UI to be fully ready
+        self.insta_actions.await_ui_settled(max_wait=1.5)  # Wait for text input UI to be fully ready
 
         # 2. Type text
         text_content = text_config.get("content")
@@ -120,7 +120,7 @@ class ReelEditor:
                     self.xpath_config.reel_edit_text_tool_done_button, timeout=2
                 )
                 return False
-            time.sleep(0.5)
+            self.insta_actions.await_ui_settled(max_wait=0.5)
 
         # 3. Select Font
         font_name = text_config.get("font")
@@ -133,7 +133,7 @@ class ReelEditor:
                     "Could not click font category button in text tool menu."
                 )
             else:
-                time.sleep(0.5)
+                self.insta_actions.await_ui_settled(max_wait=0.5)
                 # Assuming font name is the direct text on the button/view in the scroll list
                 font_xpath_template = (
                     self.xpath_config.reel_edit_text_font_name_in_list(font_name)
@@ -146,7 +146,7 @@ class ReelEditor:
                     logger.warning(f"Font '{font_name}' not found or click failed.")
                 else:
                     logger.info(f"Successfully selected font: {font_name}")
-            time.sleep(0.5)
+            self.insta_actions.await_ui_settled(max_wait=0.5)
 
         # 4. Select Color
         color_name = text_config.get("color")
@@ -159,7 +159,7 @@ class ReelEditor:
                     "Could not click color category button in text tool menu."
                 )
             else:
-                time.sleep(0.5)
+                self.insta_actions.await_ui_settled(max_wait=0.5)
                 color_xpath = self.xpath_config.reel_edit_text_color_option(
                     color_name
                 )  # e.g. "Black color"
@@ -167,7 +167,7 @@ class ReelEditor:
                     logger.warning(f"Color '{color_name}' not found or click failed.")
                 else:
                     logger.info(f"Successfully selected color: {color_name}")
-            time.sleep(0.5)
+            self.insta_actions.await_ui_settled(max_wait=0.5)
 
         # 5. Select Text Animation
         animation_name = text_config.get("animation")
@@ -180,7 +180,7 @@ class ReelEditor:
                     "Could not click text animation icon. Skipping animation."
                 )
             else:
-                time.sleep(0.5)
+                self.insta_actions.await_ui_settled(max_wait=0.5)
                 animation_xpath_template = (
                     self.xpath_config.reel_edit_text_animation_style_button(
                         animation_name
@@ -198,7 +198,7 @@ class ReelEditor:
                     logger.info(
                         f"Successfully selected text animation: {animation_name}"
                     )
-            time.sleep(0.5)
+            self.insta_actions.await_ui_settled(max_wait=0.5)
 
         # 6. Select Text Background Effect
         background_effect_name = text_config.get("background_effect")
@@ -212,7 +212,7 @@ class ReelEditor:
                     "Could not click text background effect category button."
                 )
             else:
-                time.sleep(0.5)
+                self.insta_actions.await_ui_settled(max_wait=0.5)
                 if (
                     background_effect_name.lower() == "none"
                     or not background_effect_name
@@ -240,7 +240,7 @@ class ReelEditor:
                         logger.info(
                             f"Successfully selected text background effect: {background_effect_name}"
                         )
-            time.sleep(0.5)
+            self.insta_actions.await_ui_settled(max_wait=0.5)
 
         # 7. Set Text Alignment
         alignment = text_config.get("alignment")
@@ -260,7 +260,7 @@ class ReelEditor:
                 )
             else:
                 logger.info(f"Text alignment button for {alignment} clicked.")
-            time.sleep(0.5)
+            self.insta_actions.await_ui_settled(max_wait=0.5)
 
         # 8. Click "Done" for this text item (to apply it and exit text editing mode)
         if not self.insta_actions.click_by_xpath(
@@ -269,9 +269,8 @@ class ReelEditor:
             logger.error("Failed to click 'Done' button for text item.")
             return False
         logger.info("Text item added and 'Done' clicked.")
-        time.sleep(
-            1.5
-        )  # Wait for text to be placed on reel and UI to return to main edit screen
+        # Wait for text to be placed on reel and UI to return to main edit screen
+        self.insta_actions.await_ui_settled(max_wait=1.5)
         return True
 
     def add_sticker_via_search(self, search_term: str, select_index: int = 0) -> bool:
@@ -292,7 +291,7 @@ class ReelEditor:
         ):
             logger.error("Failed to click 'Add Sticker' button.")
             return False
-        time.sleep(1.5)
+        self.insta_actions.await_ui_settled(max_wait=1.5)
 
         if not self.insta_actions.wait_for_element_appear(
             self.xpath_config.reel_edit_sticker_asset_picker_container, timeout=5
@@ -308,7 +307,7 @@ class ReelEditor:
             logger.error(f"Failed to type sticker search term: {search_term}")
             self.device.press("back")  # Try to close sticker tray
             return False
-        time.sleep(2.5)  # Wait for search results
+        self.insta_actions.await_ui_settled(max_wait=2.5)  # Wait for search results
 
         # This XPath needs to correctly identify items in the search results.
         sticker_to_select_xpath = (
@@ -322,7 +321,7 @@ class ReelEditor:
             return False
 
         logger.info(f"Selected sticker for search '{search_term}'.")
-        time.sleep(2)  # Allow sticker to be placed.
+        self.insta_actions.await_ui_settled(max_wait=2.0)  # Allow sticker to be placed.
         # Sticker placement/sizing is complex and would go here if needed. For now, it's just added.
         return True
 
@@ -341,7 +340,7 @@ class ReelEditor:
         ):
             logger.error("Failed to click main 'Effects' button (for video filters).")
             return False
-        time.sleep(1.5)
+        self.insta_actions.await_ui_settled(max_wait=1.5)
 
         if not self.insta_actions.wait_for_element_appear(
             self.xpath_config.reel_edit_effects_gridview, timeout=7
@@ -386,11 +385,11 @@ class ReelEditor:
                 ).swipe("down", steps=30)
             else:
                 self.device.press("back")  # Fallback
-            time.sleep(0.5)
+            self.insta_actions.await_ui_settled(max_wait=0.5)
             return False
 
         logger.info(f"Successfully selected video effect: {effect_name}")
-        time.sleep(1)  # Allow effect to apply
+        self.insta_actions.await_ui_settled(max_wait=1.0)  # Allow effect to apply
 
         # Close the effects menu by dragging the handle
         if self.insta_actions.element_exists(
@@ -407,7 +406,7 @@ class ReelEditor:
                 "Could not find drag handle to close video effects tray, trying device back button."
             )
             self.device.press("back")
-        time.sleep(1)
+        self.insta_actions.await_ui_settled(max_wait=1.0)
         return True
 
     def tag_people(self, users_to_tag: List[str]) -> bool:
@@ -429,7 +428,7 @@ class ReelEditor:
         ):
             logger.error("Failed to click 'Tag people' button on edit screen.")
             return False
-        time.sleep(1.5)  # Wait for tag screen
+        self.insta_actions.await_ui_settled(max_wait=1.5)  # Wait for tag screen
 
         # It's common to tap on the reel preview area first before 'Add Tag' becomes active or relevant
         # For simplicity, we'll try to click 'Add Tag' directly. If that fails, this tap might be needed.
@@ -442,7 +441,7 @@ class ReelEditor:
             logger.error("Failed to click 'Add Tag' button on tag people screen.")
             self.device.press("back")
             return False
-        time.sleep(1)
+        self.insta_actions.await_ui_settled(max_wait=1.0)
 
         for username in users_to_tag:
             logger.info(f"Searching for user to tag: {username}")
@@ -454,7 +453,7 @@ class ReelEditor:
             ):
                 logger.error(f"Failed to type username '{username}' in tag search bar.")
                 continue
-            time.sleep(3)  # Increased wait for search results
+            self.insta_actions.await_ui_settled(max_wait=3.0)  # Increased wait for search results
 
             user_result_xpath = self.xpath_config.reel_tag_people_search_result_user_container_by_username(
                 username
@@ -480,9 +479,9 @@ class ReelEditor:
                     self.device.xpath(
                         self.xpath_config.reel_tag_people_search_bar_edittext
                     ).click()  # Refocus
-                    time.sleep(0.5)
+                    self.insta_actions.await_ui_settled(max_wait=0.5)
                     self.device.press("back")  # Close keyboard if it obscures things
-                    time.sleep(0.5)
+                    self.insta_actions.await_ui_settled(max_wait=0.5)
                     continue
                 else:
                     logger.info(
@@ -490,7 +489,7 @@ class ReelEditor:
                     )
             else:
                 logger.info(f"Successfully selected user '{username}' for tagging.")
-            time.sleep(1.5)  # Wait for tag to be applied
+            self.insta_actions.await_ui_settled(max_wait=1.5)  # Wait for tag to be applied
 
             # Check if we need to click "Add Tag" again for the next user
             # This depends on the app's behavior after selecting a user for tagging
@@ -508,7 +507,7 @@ class ReelEditor:
                             "Could not click 'Add Tag' for subsequent user. Stopping tagging for remaining users."
                         )
                         break
-                    time.sleep(1)
+                    self.insta_actions.await_ui_settled(max_wait=1.0)
 
         if not self.insta_actions.click_by_xpath(
             self.xpath_config.reel_tag_people_done_button, timeout=5
@@ -520,7 +519,7 @@ class ReelEditor:
             return False
 
         logger.info("Tagging process completed and 'Done' clicked.")
-        time.sleep(1.5)  # Wait to return to main edit screen
+        self.insta_actions.await_ui_settled(max_wait=1.5)  # Wait to return to main edit screen
         return True
 
     def proceed_to_share_page(self) -> bool:
@@ -590,12 +589,14 @@ def orchestrate_reel_edits(
         if not success:
             return False, f"Failed at edit step {i+1}: {action}"
 
-        time.sleep(1)  # Small pause between distinct actions
+        insta_actions.await_ui_settled(max_wait=1.0)  # Pause between distinct actions
 
     # After all individual edits, proceed to the share page
     if not editor.proceed_to_share_page():
         return False, "Failed to proceed to share page after edits."
 
+    logger.info(f"⏱️ {insta_actions.settle_summary()}")
+
     return True, "All reel edits applied successfully and navigated to share page."
 
 
@@ -4,7 +4,8 @@ import datetime  # Added for potential timestamping
 import os
 import threading
 import time
-from typing import Optional, Tuple
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 import uiautomator2 as u2
 
@@ -15,7 +16,8 @@ from PostingBot.add_music import SoundAdder
 from Shared.Captions.generate_caption import generate_and_enter_caption
 
 # --- Shared Dependencies ---
-from Shared.Data.airtable_manager import AirtableClient
+from Shared.Data.airtable_manager import AirtableClient, get_airtable_client
+from Shared.Data.airtable_outbox import drain_airtable_outbox
 
 # --- UploadBot Dependencies ---
 from Shared.Data.google_drive_manager import ContentManager  # Handles Drive/Local files
@@ -23,7 +25,10 @@ from Shared.Data.google_drive_manager import ContentManager  # Handles Drive/Loc
 # Import the main UI driver and the separated SoundAdder
 from Shared.instagram_actions import InstagramInteractions
 from Shared.UI.popup_handler import PopupHandler
-from Shared.Utils.device_manager import MediaCleaner  # Handles ADB file cleanup
+from Shared.Utils.device_manager import (  # Handles ADB file push/cleanup
+    DeviceFileManager,
+    MediaCleaner,
+)
 from Shared.Utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
@@ -58,8 +63,92 @@ def handle_post_failure(record_id, airtable_client):
 # --- Main Reel Posting Workflow ---
 
 
+def record_media_dir(project_root: str, record_id: str) -> str:
+    """
+    Download folder for one record's media. Drive files keep their own
+    names, so records sharing a filename must not share a folder.
+    """
+    return os.path.join(project_root, "temp_media", record_id)
+
+
+def remove_local_media(local_path: str):
+    """Deletes a downloaded media file and its per-record folder, if empty."""
+    try:
+        if os.path.exists(local_path):
+            os.remove(local_path)
+            logger.info(f"🧹 Cleaned up local media file: {local_path}")
+        os.rmdir(os.path.dirname(local_path))
+    except OSError as e:
+        if os.path.exists(local_path):
+            logger.error(f"Failed to delete local media file {local_path}: {e}")
+
+
+def stage_todays_media(
+    records: List[dict], project_root: str
+) -> Dict[str, Tuple[str, str]]:
+    """
+    Downloads every record's media and pushes each device's files in one
+    batch (one sync session, one mkdir) into the device's hidden staging
+    folder, so post_reel only has to publish the file when its turn comes.
+
+    Args:
+        records (List[dict]): Airtable records to be posted.
+        project_root (str): The root path of the project for finding temporary directories.
+
+    Returns:
+        Dict[str, Tuple[str, str]]: record id -> (local path, staged remote path).
+            Records missing here are downloaded and pushed by post_reel itself.
+    """
+    content_manager = ContentManager()
+    per_device: Dict[Optional[str], List[Tuple[str, str, str]]] = defaultdict(list)
+    for record in records:
+        fields = record.get("fields", {})
+        record_id, media_url = record.get("id"), fields.get("media_url")
+        account_name = fields.get("username")
+        if not (record_id and media_url and account_name):
+            continue
+        success, local_path, _, _ = content_manager.download_drive_file(
+            media_url, record_media_dir(project_root, record_id)
+        )
+        if not success or not local_path:
+            logger.warning(f"⚠️ Could not pre-download media for {record_id}")
+            continue
+        per_device[fields.get("device_id")].append((record_id, local_path, account_name))
+
+    staged: Dict[str, Tuple[str, str]] = {}
+    for device_id, items in per_device.items():
+        logger.info(
+            f"📦 Staging {len(items)} file(s) on device {device_id or 'default'}..."
+        )
+        remote_paths = DeviceFileManager(device_id).stage_media_batch(
+            [(local_path, account_name) for _, local_path, account_name in items]
+        )
+        for (record_id, local_path, _), remote_path in zip(items, remote_paths):
+            if remote_path:
+                staged[record_id] = (local_path, remote_path)
+    return staged
+
+
+def clear_staged_media(records: List[dict], staged: Dict[str, Tuple[str, str]]):
+    """Removes staged files (device and local) that were never posted."""
+    per_device: Dict[Optional[str], List[str]] = defaultdict(list)
+    for record in records:
+        entry = staged.get(record.get("id"))
+        if not entry:
+            continue
+        local_path, remote_path = entry
+        per_device[record.get("fields", {}).get("device_id")].append(remote_path)
+        remove_local_media(local_path)
+    for device_id, remote_paths in per_device.items():
+        # Published files were already moved away; rm -f ignores them
+        MediaCleaner(device_id).delete_files(remote_paths)
+
+
 def post_reel(
-    record: dict, project_root: str, airtable_client: AirtableClient
+    record: dict,
+    project_root: str,
+    airtable_client: AirtableClient,
+    staged: Optional[Tuple[str, str]] = None,
 ) -> Tuple[bool, Optional[str]]:
     """
     Orchestrates the entire process of posting an Instagram Reel.
@@ -68,6 +157,8 @@ def post_reel(
         record (dict): Airtable record containing post details (username, media_url, package_name, id).
         project_root (str): The root path of the project for finding temporary directories.
         airtable_client (AirtableClient): Instance for updating Airtable records.
+        staged (Optional[Tuple[str, str]]): (local path, staged remote path) from
+            stage_todays_media(); skips the download and push steps.
 
     Returns:
         Tuple[bool, Optional[str]]: (Success status, Message)
@@ -107,8 +198,9 @@ def post_reel(
                 f"Failed to connect or communicate with device {device_id_from_record or 'default'}: {conn_err}"
             )
 
-        content_manager = ContentManager()  # Handles file download/push
-        media_cleaner = MediaCleaner()  # Handles device file cleanup via ADB
+        content_manager = ContentManager()  # Handles file download
+        file_manager = DeviceFileManager(device.serial)  # Handles media push via ADB
+        media_cleaner = MediaCleaner(device.serial)  # Handles device file cleanup via ADB
 
         fields = record.get("fields", {})
         account_name = fields.get("username")
@@ -167,26 +259,27 @@ def post_reel(
         if failure_triggered.is_set():
             return False, "Aborted: Critical failure detected during app launch."
 
-        # Step 3: Download media from Google Drive
-        logger.info(f"☁️ Downloading media from Google Drive URL: {media_url}")
-        # Define temp dir relative to project root
-        output_dir = os.path.join(project_root, "temp_media")  # Use consistent name
-        success, local_path, mime_type, _ = content_manager.download_drive_file(
-            media_url, output_dir
-        )
-        if not success or not local_path:
-            return False, f"Media download failed from URL: {media_url}"
-        logger.info(f"📂 Media downloaded locally to: {local_path}")
-
-        # Step 4: Push media to device
-        logger.info(f"📲 Pushing file to Android device ({device.serial})...")
-        # Pass device object to push method
-        push_success, remote_path = content_manager.push_media_to_device(
-            local_path, account_name, "reel", device
-        )
-        if not push_success or not remote_path:
-            return False, f"Pushing media to device failed for {local_path}"
-        logger.info(f"✅ File pushed to device path: {remote_path}")
+        # Step 3 & 4: Publish the staged file, or download and push it now
+        remote_path = None
+        if staged:
+            local_path, staged_path = staged
+            remote_path = file_manager.publish_staged(staged_path, account_name)
+        if not remote_path:
+            logger.info(f"☁️ Downloading media from Google Drive URL: {media_url}")
+            success, local_path, mime_type, _ = content_manager.download_drive_file(
+                media_url, record_media_dir(project_root, record_id)
+            )
+            if not success or not local_path:
+                return False, f"Media download failed from URL: {media_url}"
+            logger.info(f"📂 Media downloaded locally to: {local_path}")
+
+            logger.info(f"📲 Pushing file to Android device ({device.serial})...")
+            push_success, remote_path = file_manager.push_media_to_device(
+                local_path, account_name
+            )
+            if not push_success or not remote_path:
+                return False, f"Pushing media to device failed for {local_path}"
+        logger.info(f"✅ File ready on device path: {remote_path}")
 
         # Step 5: Begin reel creation flow
         logger.info("📱 Navigating to new post screen...")
@@ -375,8 +468,8 @@ def post_reel(
             )
         logger.info("✅ Reel post confirmed on screen.")
 
-        # Step 13: Update Airtable
-        logger.info(f"💾 Updating Airtable record {record_id}...")
+        # Step 13: Update Airtable (queued; the outbox sender batches the write)
+        logger.info(f"💾 Queuing Airtable update for record {record_id}...")
         fields_to_update = {
             "Posted?": True,
             "Caption": caption,
@@ -388,13 +481,13 @@ def post_reel(
         }
         # Ensure record_id is a string before calling update
         if isinstance(record_id, str):
-            airtable_success = airtable_client.update_record_fields(
+            airtable_success = airtable_client.enqueue_record_update(
                 record_id, fields_to_update
             )
             if not airtable_success:
-                logger.error(f"❌ Failed to update Airtable record ID: {record_id}")
+                logger.error(f"❌ Failed to queue Airtable update for ID: {record_id}")
             else:
-                logger.info(f"✅ Airtable record {record_id} updated.")
+                logger.info(f"✅ Airtable update for {record_id} queued.")
         else:
             logger.error(
                 f"❌ Invalid record_id type ({type(record_id)}) for Airtable update."
@@ -403,10 +496,8 @@ def post_reel(
 
         # Step 14: Clean up device media (using MediaCleaner)
         logger.info("🧹 Cleaning up media from device...")
-        # Construct path based on how push_media_to_device organizes it
-        album_path = (
-            f"/sdcard/Pictures/{account_name}"  # Ensure this matches push logic
-        )
+        # Same album push_media_to_device / publish_staged put the file in
+        album_path = file_manager.album_path(account_name)
         media_cleaner.clean_posted_media(
             album_path
         )  # clean_posted_media logs its own success/failure
@@ -451,14 +542,8 @@ def post_reel(
             insta_actions.close_app()
 
         # Clean up downloaded local media file
-        if local_path and os.path.exists(local_path):
-            try:
-                os.remove(local_path)
-                logger.info(f"🧹 Cleaned up local media file: {local_path}")
-            except OSError as e_clean:
-                logger.error(
-                    f"Failed to delete local media file {local_path}: {e_clean}"
-                )
+        if local_path:
+            remove_local_media(local_path)
         logger.info(f"--- Finished post_reel for {record_id} ---")
 
 
@@ -490,7 +575,7 @@ def main():
     # --- Initialization ---
     # Corrected: Use table_key based on model name pattern
     airtable_table_key = f"content_{model_name}"
-    airtable_client = AirtableClient(table_key=airtable_table_key)
+    airtable_client = get_airtable_client(table_key=airtable_table_key)
     # Calculate project root dynamically
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     logger.info(f"Project Root determined as: {project_root}")
@@ -503,6 +588,11 @@ def main():
         return
     logger.info(f"Found {len(records)} records to process.")
 
+    # --- Stage Media ---
+    # One download pass and one batch push per device before posting starts
+    staged = stage_todays_media(records, project_root)
+    logger.info(f"📦 Staged media for {len(staged)}/{len(records)} records.")
+
     # --- Process Records ---
     for i, record in enumerate(records, 1):
         record_id = record.get("id", "N/A")
@@ -515,6 +605,7 @@ def main():
             record=record,
             project_root=project_root,
             airtable_client=airtable_client,  # Pass the initialized client
+            staged=staged.get(record_id),
         )
 
         if success:
@@ -552,6 +643,9 @@ def main():
                 break  # Exit the loop
 
     logger.info("--- All scheduled records processed ---")
+    clear_staged_media(records, staged)
+    if not drain_airtable_outbox(timeout=60):
+        logger.warning("⚠️ Some Airtable updates are still queued; they will be retried next run.")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-# Shared/generate_caption.py
+# Shared/Captions/generate_caption.py
 
 import random
 import re
@@ -11,14 +11,11 @@ from typing import Optional
 # Uiautomator2 might still be needed for type hints if used
 import uiautomator2 as u2
 
-# --- Import the main Instagram UI driver ---
-# Adjust path if InstagramInteractions moves to Shared later
-from UploadBot.instagram_actions import InstagramInteractions
-
-# --- Local Imports ---
-from .ai_api import generate_caption  # Assuming this handles AI call
-from .logger_config import setup_logger
-from .stealth_typing import StealthTyper
+from Shared.Captions.ai_api import generate_caption  # Assuming this handles AI call
+from Shared.instagram_actions import InstagramInteractions
+from Shared.UI.selector_chain import SelectorChain
+from Shared.Utils.logger_config import setup_logger
+from Shared.Utils.stealth_typing import get_stealth_typer
 
 # from .xpath_config import InstagramXPaths # Keep if GenerateCaption needs direct access, otherwise use insta_actions.xpath_config
 
@@ -56,8 +53,8 @@ class GenerateCaption:
         self.post_type = post_type
         # Access xpath_config via insta_actions
         self.xpath_config = self.insta_actions.xpath_config
-        # Initialize StealthTyper using the device from insta_actions
-        self.stealth_typer = StealthTyper(device_id=self.insta_actions.device.serial)
+        # Shared per-device StealthTyper (reuses the u2 device and IME state)
+        self.stealth_typer = get_stealth_typer(self.insta_actions.device)
 
         # Define the specific XPath for the caption field here (or preferably get from xpath_config)
         # TODO: Refactor XPath - Move to xpath_config.py (e.g., self.xpath_config.reel_caption_text_view)
@@ -67,22 +64,22 @@ class GenerateCaption:
         self.caption_field_xpath_fallback = (
             "//*[contains(@resource-id, 'caption_input_text_view')]"
         )
+        # Both are checked in one snapshot; whichever matched last time on this
+        # device/app version is tried first
+        self.caption_field = SelectorChain(
+            "caption_field",
+            {
+                "primary": self.caption_field_xpath,
+                "fallback": self.caption_field_xpath_fallback,
+            },
+        )
 
     def _wait_for_caption_field(self, timeout=10) -> bool:
         """Waits for the caption input field to appear."""
         self.logger.debug("🕵️ Waiting for caption input field...")
-        # Use the primary XPath first
-        if self.insta_actions.wait_for_element_appear(
-            self.caption_field_xpath, timeout=timeout
-        ):
-            self.logger.debug("✅ Caption input field found (primary XPath).")
-            return True
-        # Try fallback XPath if primary fails
-        self.logger.debug("Primary caption field XPath not found, trying fallback...")
-        if self.insta_actions.wait_for_element_appear(
-            self.caption_field_xpath_fallback, timeout=2
-        ):  # Shorter timeout for fallback
-            self.logger.debug("✅ Caption input field found (fallback XPath).")
+        label, _ = self.insta_actions.wait_for_chain(self.caption_field, timeout=timeout)
+        if label is not None:
+            self.logger.debug(f"✅ Caption input field found ({label} XPath).")
             return True
 
         self.logger.error("❌ Caption input field not found using known XPaths.")
@@ -102,21 +99,11 @@ class GenerateCaption:
 
     def _get_current_caption_text(self) -> str:
         """Gets the current text from the caption field."""
-        # Try primary XPath first
-        text = self.insta_actions.get_element_text(self.caption_field_xpath, timeout=5)
-        if text is not None:
+        label, node = self.insta_actions.wait_for_chain(self.caption_field, timeout=5)
+        if node is not None:
+            text = node.text
             self.logger.debug(
-                f"📥 Fetched caption box text (primary): '{text[:50]}...'"
-            )
-            return text
-        # Try fallback XPath
-        self.logger.debug("Failed to get text with primary XPath, trying fallback...")
-        text = self.insta_actions.get_element_text(
-            self.caption_field_xpath_fallback, timeout=2
-        )
-        if text is not None:
-            self.logger.debug(
-                f"📥 Fetched caption box text (fallback): '{text[:50]}...'"
+                f"📥 Fetched caption box text ({label}): '{text[:50]}...'"
             )
             return text
 
@@ -168,13 +155,9 @@ class GenerateCaption:
             return None
 
         # Step 1b: Click the caption field to ensure focus
-        # Use click_by_xpath, trying primary then fallback XPath
-        if not self.insta_actions.click_by_xpath(self.caption_field_xpath, timeout=2):
-            if not self.insta_actions.click_by_xpath(
-                self.caption_field_xpath_fallback, timeout=2
-            ):
-                self.logger.error("❌ Failed to click caption input field.")
-                return None
+        if not self.insta_actions.click_chain(self.caption_field, timeout=4):
+            self.logger.error("❌ Failed to click caption input field.")
+            return None
         self.logger.debug("✅ Caption input field clicked.")
         # Allow time for keyboard to potentially appear
         time.sleep(random.uniform(0.8, 1.5))
@@ -0,0 +1,436 @@
+# Shared/Data/airtable_async.py
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+import aiohttp
+
+from Shared.Data.airtable_manager import (
+    ACCOUNT_FIELDS,
+    CREDENTIAL_FIELDS,
+    MAX_PAGE_SIZE,
+    OUTBOX_SETTLE_TIMEOUT,
+    PENDING_WARMUP_FORMULA,
+    UNPOSTED_FIELDS,
+    WARMUP_FIELDS,
+    _flatten,
+    _page_size_for,
+    _pending_warmup_record,
+    _table_config,
+    _today_schedule_formula,
+    _unposted_record,
+    load_airtable_env,
+)
+from Shared.Data.airtable_mirror import note_record_update
+from Shared.Data.airtable_outbox import get_airtable_outbox
+from Shared.Data.airtable_rate_limit import (
+    DEFAULT_BACKOFF_BASE,
+    DEFAULT_BACKOFF_MAX,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_THROTTLE_PENALTY,
+    RETRY_STATUSES,
+    airtable_endpoint_url,
+    get_airtable_api,
+    get_token_bucket,
+    rate_limit_config,
+    record_traffic,
+    retry_delay,
+)
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="AirtableAsync")
+
+DEFAULT_MAX_CONCURRENCY = 8  # Airtable requests in flight per client
+DEFAULT_TIMEOUT = 30  # seconds per request
+
+
+class AirtableRequestError(Exception):
+    """A non-retryable (or retries exhausted) Airtable HTTP error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class AsyncAirtableClient:
+    """
+    asyncio counterpart of AirtableClient with the same method surface, on
+    one aiohttp session (keep-alive pool) per client.
+
+    Requests take tokens from the same per-base buckets as the sync
+    clients, so a mixed sync/async process still stays within Airtable's
+    5 req/s per base, and at most `max_concurrency` of them are in flight;
+    429/5xx responses are retried with the same policy. Reads always go to Airtable
+    (the SQLite mirror is sync-only), but updates are applied to any local
+    mirrors of the table.
+
+    Use as `async with AsyncAirtableClient(...) as client:` or call aclose().
+    """
+
+    def __init__(
+        self,
+        table_key: Optional[str] = None,
+        base_id: Optional[str] = None,
+        table_id: Optional[str] = None,
+        view_name: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        load_airtable_env()
+        self.api_key = os.getenv("AIRTABLE_API_KEY")
+        if not self.api_key:
+            raise ValueError("Missing AIRTABLE_API_KEY in environment variables")
+
+        self.base_id = base_id
+        self.table_id = table_id
+        self.view_name = view_name
+        if table_key:
+            config = _table_config(table_key)
+            self.base_id = config["base_id"]
+            self.table_id = config["table_id"]
+            self.view_name = config["view"]
+
+        cfg = rate_limit_config()
+        self.max_retries = cfg.get("max_retries", DEFAULT_MAX_RETRIES)
+        self.backoff_base = cfg.get("backoff_base", DEFAULT_BACKOFF_BASE)
+        self.backoff_max = cfg.get("backoff_max", DEFAULT_BACKOFF_MAX)
+        self.throttle_penalty = cfg.get("throttle_penalty", DEFAULT_THROTTLE_PENALTY)
+        self.endpoint = airtable_endpoint_url()
+        self.max_concurrency = max_concurrency or cfg.get(
+            "async_max_concurrency", DEFAULT_MAX_CONCURRENCY
+        )
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncAirtableClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    # --- Transport ---
+
+    async def _request(
+        self,
+        method: str,
+        base_id: str,
+        table_id: str,
+        record_id: Optional[str] = None,
+        params: Optional[List[tuple]] = None,
+        json: Optional[Dict[str, Any]] = None,
+    ) -> Dict:
+        """One Airtable call with the shared rate limit and retry policy."""
+        session = self._get_session()
+        url = f"{self.endpoint}/v0/{base_id}/{table_id}"
+        if record_id:
+            url += f"/{record_id}"
+        bucket = get_token_bucket(base_id)
+
+        attempt = 0
+        while True:
+            # Wait for the token before taking a slot, so requests queued on
+            # a throttled base don't hold slots other bases could use
+            waited = bucket.reserve()
+            if waited > 0:
+                await asyncio.sleep(waited)
+            record_traffic(requests=1, waited_seconds=waited)
+            async with self._semaphore:
+                async with session.request(method, url, params=params, json=json) as response:
+                    status = response.status
+                    if status < 400:
+                        return await response.json()
+                    body = await response.text()
+                    headers = response.headers
+
+            if status not in RETRY_STATUSES:
+                raise AirtableRequestError(status, body[:500])
+            attempt += 1
+            delay = retry_delay(
+                headers, attempt, self.backoff_base, self.backoff_max,
+                status=status, throttle_penalty=self.throttle_penalty,
+            )
+            if status == 429:
+                record_traffic(throttled=1)
+                bucket.drain(penalty=delay)
+            else:
+                record_traffic(server_errors=1)
+            if attempt > self.max_retries:
+                record_traffic(gave_up=1)
+                raise AirtableRequestError(status, body[:500])
+            logger.warning(
+                f"⚠️ Airtable {status} on {method} {base_id}; "
+                f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            record_traffic(retries=1, waited_seconds=delay)
+            await asyncio.sleep(delay)
+
+    async def iterate(
+        self,
+        base_id: str,
+        table_id: str,
+        view: Optional[str] = None,
+        formula: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        page_size: int = MAX_PAGE_SIZE,
+        max_records: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """Yields pages of raw records, fetching the next page only when asked."""
+        params: List[tuple] = [("pageSize", page_size)]
+        if view:
+            params.append(("view", view))
+        if formula:
+            params.append(("filterByFormula", formula))
+        if max_records:
+            params.append(("maxRecords", max_records))
+        params.extend(("fields[]", f) for f in fields or [])
+
+        offset = None
+        while True:
+            page_params = params + ([("offset", offset)] if offset else [])
+            data = await self._request("GET", base_id, table_id, params=page_params)
+            yield data.get("records", [])
+            offset = data.get("offset")
+            if not offset:
+                return
+
+    async def all(self, base_id: str, table_id: str, **options) -> List[Dict]:
+        records = []
+        async for page in self.iterate(base_id, table_id, **options):
+            records.extend(page)
+        return records
+
+    # --- Content tables ---
+
+    async def iter_unposted_records_for_today(
+        self, page_size: int = MAX_PAGE_SIZE, max_records: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """Async version of AirtableClient.iter_unposted_records_for_today."""
+        today_str, formula = _today_schedule_formula()
+        async for page in self.iterate(
+            self.base_id,
+            self.table_id,
+            view=self.view_name,
+            formula=formula,
+            fields=UNPOSTED_FIELDS,
+            page_size=page_size,
+            max_records=max_records,
+        ):
+            logger.debug(f"📄 Received page of {len(page)} records for {today_str}")
+            for record in page:
+                yield _unposted_record(record)
+
+    async def _settle_outbox(self, timeout: float = OUTBOX_SETTLE_TIMEOUT) -> Set[str]:
+        """Async version of AirtableClient._settle_outbox (the outbox is sync)."""
+        outbox = get_airtable_outbox(get_airtable_api(self.api_key))
+        if not await asyncio.to_thread(outbox.flush, timeout):
+            logger.warning("⚠️ Outbox still has unsent updates; skipping those records")
+        pending = outbox.pending_record_ids(self.base_id, self.table_id)
+        if pending:
+            logger.warning(f"⚠️ {len(pending)} record(s) have unsent updates and will be skipped")
+        return pending
+
+    async def get_unposted_records_for_today(self, max_count: int = 1) -> List[Dict]:
+        try:
+            logger.info(f"📥 Fetching up to {max_count} unposted records for today...")
+            skip = await self._settle_outbox()
+            records = []
+            async for record in self.iter_unposted_records_for_today(
+                page_size=_page_size_for(max_count + len(skip)),
+                max_records=max_count + len(skip),
+            ):
+                if record["id"] in skip:
+                    continue
+                records.append(record)
+                if len(records) >= max_count:
+                    break
+            return records
+        except Exception as e:
+            logger.error(f"❌ Error fetching multiple unposted records: {e}", exc_info=True)
+            return []
+
+    async def update_record_fields(
+        self,
+        record_id: str,
+        fields: dict,
+        base_id: Optional[str] = None,
+        table_id: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Update arbitrary fields in an Airtable record."""
+        base_id, table_id = base_id or self.base_id, table_id or self.table_id
+        try:
+            result = await self._request(
+                "PATCH", base_id, table_id, record_id, json={"fields": fields, "typecast": True}
+            )
+            note_record_update(base_id, table_id, record_id, fields)
+            logger.debug(f"✅ Updated record {record_id} with fields: {fields}")
+            return result
+        except Exception as e:
+            logger.error(f"❌ Failed to update record: {e}")
+            return None
+
+    async def batch_update_records(
+        self,
+        records: List[Dict],
+        base_id: Optional[str] = None,
+        table_id: Optional[str] = None,
+    ) -> bool:
+        """Updates [{"id", "fields"}, ...] in batches of 10 (Airtable's maximum)."""
+        base_id, table_id = base_id or self.base_id, table_id or self.table_id
+        batches = [records[i : i + 10] for i in range(0, len(records), 10)]
+        results = await asyncio.gather(
+            *(
+                self._request("PATCH", base_id, table_id, json={"records": batch, "typecast": True})
+                for batch in batches
+            ),
+            return_exceptions=True,
+        )
+        ok = True
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Batch update of {len(batch)} record(s) failed: {result}")
+                ok = False
+                continue
+            for record in batch:
+                note_record_update(base_id, table_id, record["id"], record["fields"])
+        return ok
+
+    async def mark_something_went_wrong_and_rotate(self, record_id: str) -> bool:
+        if await self.update_record_fields(record_id, {"Something Went Wrong": True}) is None:
+            logger.error(f"❌ Failed to mark record {record_id} with 'Something Went Wrong'")
+            return False
+        logger.warning(f"⚠️ Marked record {record_id} as 'Something Went Wrong' = True")
+        return True
+
+    # --- Warmup / accounts ---
+
+    async def iter_pending_warmup_records(
+        self, page_size: int = MAX_PAGE_SIZE, max_records: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        async for page in self.iterate(
+            self.base_id,
+            self.table_id,
+            view="Warmup",
+            formula=PENDING_WARMUP_FORMULA,
+            fields=WARMUP_FIELDS,
+            page_size=page_size,
+            max_records=max_records,
+        ):
+            for record in page:
+                yield _pending_warmup_record(record)
+
+    async def get_pending_warmup_records(self, max_count=None) -> List[Dict]:
+        skip = await self._settle_outbox()
+        limit = max_count + len(skip) if max_count else None
+        records = []
+        async for record in self.iter_pending_warmup_records(
+            page_size=_page_size_for(limit), max_records=limit
+        ):
+            if record["record_id"] in skip:
+                continue
+            records.append(record)
+            if max_count and len(records) >= max_count:
+                break
+        return records
+
+    async def get_single_active_account(
+        self, base_id: str, table_id: str, view_id: str
+    ) -> Optional[Dict]:
+        try:
+            records = await self.all(
+                base_id, table_id, view=view_id, fields=ACCOUNT_FIELDS, max_records=1, page_size=1
+            )
+        except Exception as e:
+            logger.error(f"❌ Airtable API request failed: {e}")
+            return None
+        if not records:
+            logger.warning("⚠️ No active accounts found in view")
+            return None
+        record_fields = records[0].get("fields", {})
+        record_fields["Package Name"] = _flatten(record_fields.get("Package Name"))
+        record_fields["Device ID"] = _flatten(record_fields.get("Device ID"))
+        return {
+            "id": records[0].get("id"),
+            "fields": record_fields,
+            "base_id": base_id,
+            "table_id": table_id,
+        }
+
+    def _accounts_table(self):
+        base_id = os.getenv("IG_ARMY_BASE_ID")
+        table_id = os.getenv("IG_ARMY_ACCS_TABLE_ID")
+        if not all([base_id, table_id]):
+            raise ValueError("Missing IG_ARMY_BASE_ID or IG_ARMY_ACCS_TABLE_ID in .env file")
+        return base_id, table_id
+
+    async def get_warmup_credentials_bulk(self, limit: int = 10) -> List[Dict]:
+        try:
+            base_id, table_id = self._accounts_table()
+            records = await self.all(
+                base_id, table_id, fields=CREDENTIAL_FIELDS, max_records=limit,
+                page_size=_page_size_for(limit),
+            )
+        except Exception as e:
+            logger.error(f"❌ An error occurred while fetching bulk warmup account credentials: {e}")
+            return []
+        credentials = []
+        for record in records:
+            fields = record.get("fields", {})
+            if not fields.get("Email") or not fields.get("Email Password"):
+                logger.warning(
+                    f"Skipping record {record.get('id')} due to missing 'Email' or 'Email Password' field."
+                )
+                continue
+            credentials.append({"email": fields["Email"], "password": fields["Email Password"]})
+        return credentials
+
+    async def get_warmup_credentials(self) -> Optional[Dict]:
+        credentials = await self.get_warmup_credentials_bulk(limit=1)
+        return credentials[0] if credentials else None
+
+    async def fetch_unused_accounts(self, max_records: int = 5) -> List[Dict]:
+        try:
+            base_id, table_id = self._accounts_table()
+            records = await self.all(
+                base_id, table_id, view="Unused Accounts", fields=ACCOUNT_FIELDS,
+                max_records=max_records, page_size=_page_size_for(max_records),
+            )
+        except Exception as e:
+            logger.error(f"❌ An error occurred while fetching unused accounts: {e}")
+            return []
+        accounts = []
+        for record in records:
+            fields = record.get("fields", {})
+            credentials = [fields.get(k) for k in ("Account", "Password", "Email", "Email Password")]
+            if not all(credentials):
+                logger.warning(f"Skipping record {record.get('id')} due to missing credentials.")
+                continue
+            accounts.append(
+                {
+                    "record_id": record.get("id"),
+                    "instagram_username": fields["Account"],
+                    "instagram_password": fields["Password"],
+                    "email_address": fields["Email"],
+                    "email_password": fields["Email Password"],
+                    "package_name": fields.get("Package Name"),
+                    "device_id": fields.get("Device ID"),
+                }
+            )
+        return accounts
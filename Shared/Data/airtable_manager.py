@@ -1,118 +1,273 @@
 # airtable_manager.py
 
 import os
+import threading
 from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
 
 import pytz
 import requests
 from dotenv import load_dotenv
-from pyairtable import Api
 
+from Shared.Data.airtable_mirror import (
+    get_airtable_mirror,
+    mirrors_enabled,
+    note_record_update,
+)
+from Shared.Data.airtable_outbox import get_airtable_outbox
+from Shared.Data.airtable_rate_limit import get_airtable_api
 from Shared.Utils.logger_config import setup_logger
 
 logger = setup_logger(__name__)
 
-# --- Load dotenv from project root ---
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 dotenv_path = os.path.join(project_root, ".env")
-if os.path.exists(dotenv_path):
-    load_dotenv(dotenv_path)
-else:
-    raise RuntimeError(f"🚨 .env file not found at expected location: {dotenv_path}")
+_env_loaded = False
+_env_lock = threading.Lock()
+
+BOGOTA_TZ = pytz.timezone("America/Bogota")
+MAX_PAGE_SIZE = 100  # Airtable's maximum records per list request
+OUTBOX_SETTLE_TIMEOUT = 30  # seconds to send leftover updates before a work-queue read
+
+# Only the fields each query actually reads are requested from Airtable
+UNPOSTED_FIELDS = ["Schedule Date", "Username", "Drive URL", "Package Name"]
+WARMUP_FIELDS = ["Username", "Device ID", "Package Name"]
+PENDING_WARMUP_FORMULA = "AND({Status} = 'Warmup', NOT({Daily Warmup Complete}))"
+# The same filter, applied to the local mirror's indexed columns
+PENDING_WARMUP_WHERE = {"Status": "Warmup", "Daily Warmup Complete": False}
+ACCOUNT_FIELDS = [
+    "Account",
+    "Password",
+    "Email",
+    "Email Password",
+    "Package Name",
+    "Device ID",
+]
+CREDENTIAL_FIELDS = ["Email", "Email Password"]
+
+
+def _flatten(value):
+    """Lookup/linked fields come back as lists; use their first value."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _page_size_for(max_count: Optional[int]) -> int:
+    """Smallest page that can satisfy max_count in one request."""
+    if not max_count:
+        return MAX_PAGE_SIZE
+    return max(1, min(max_count, MAX_PAGE_SIZE))
+
+
+def _today_schedule_formula():
+    """(today's Bogota date, filterByFormula matching records scheduled for it)."""
+    today_str = datetime.now(BOGOTA_TZ).strftime("%Y-%m-%d")
+    return today_str, f"DATETIME_FORMAT({{Schedule Date}}, 'YYYY-MM-DD') = '{today_str}'"
+
+
+def _unposted_record(record: Dict) -> Dict:
+    fields = record.get("fields", {})
+    return {
+        "id": record["id"],
+        "fields": {
+            "username": fields.get("Username"),
+            "package_name": _flatten(fields.get("Package Name")),
+            "media_url": fields.get("Drive URL"),
+        },
+    }
+
+
+def _pending_warmup_record(record: Dict) -> Dict:
+    fields = record.get("fields", {})
+    return {
+        "record_id": record["id"],
+        "username": _flatten(fields.get("Username")),
+        "device_id": _flatten(fields.get("Device ID")),
+        "package_name": _flatten(fields.get("Package Name")),
+    }
+
+
+def load_airtable_env():
+    """
+    Loads the project's .env once, when the first client is created rather
+    than at import. Variables already set in the environment win.
+    """
+    global _env_loaded
+    with _env_lock:
+        if _env_loaded:
+            return
+        if os.path.exists(dotenv_path):
+            load_dotenv(dotenv_path)
+        else:
+            logger.warning(f"⚠️ .env file not found at {dotenv_path}; using the process environment")
+        _env_loaded = True
+
+
+def _table_config(table_key: str) -> Dict[str, Optional[str]]:
+    table_map = {
+        "content_alexis": {
+            "base_id": os.getenv("ALEXIS_BASE_ID"),
+            "table_id": os.getenv("ALEXIS_CONTENT_TABLE_ID"),
+            "view": "Unposted",
+        },
+        "content_maddison": {
+            "base_id": os.getenv("MADDISON_BASE_ID"),
+            "table_id": os.getenv("MADDISON_CONTENT_TABLE_ID"),
+            "view": "Unposted",
+        },
+        "warmup_accounts": {
+            "base_id": os.getenv("IG_ARMY_BASE_ID"),
+            "table_id": os.getenv("IG_ARMY_WARMUP_ACCOUNTS_TABLE_ID"),
+            "view": "Warmup",
+        },
+    }
+    if table_key not in table_map:
+        raise ValueError(f"Unsupported table key: '{table_key}'")
+    config = table_map[table_key]
+    if not all(config.values()):
+        raise ValueError(
+            f"Missing required environment variables for table key: '{table_key}'"
+        )
+    return config
 
 
 class AirtableClient:
-    def __init__(self, table_key: str = None):
+    """
+    Airtable access for one (base, table). Thread-safe; prefer
+    get_airtable_client() so every caller shares one instance per table and
+    one pooled, rate-limited HTTP session.
+    """
+
+    def __init__(
+        self,
+        table_key: str = None,
+        base_id: Optional[str] = None,
+        table_id: Optional[str] = None,
+        view_name: Optional[str] = None,
+    ):
+        load_airtable_env()
         self.api_key = os.getenv("AIRTABLE_API_KEY")
         if not self.api_key:
             raise ValueError("Missing AIRTABLE_API_KEY in environment variables")
 
-        self.api = Api(self.api_key)
-
-        # These can now be manually assigned later
-        self.base_id = None
-        self.table_id = None
-        self.view_name = None
+        # Process-wide Api: keep-alive connection pool, per-base token bucket
+        # and 429/5xx retry policy
+        self.api = get_airtable_api(self.api_key)
 
+        self.base_id = base_id
+        self.table_id = table_id
+        self.view_name = view_name
         if table_key:
-            table_map = {
-                "content_alexis": {
-                    "base_id": os.getenv("ALEXIS_BASE_ID"),
-                    "table_id": os.getenv("ALEXIS_CONTENT_TABLE_ID"),
-                    "view": "Unposted",
-                },
-                "content_maddison": {
-                    "base_id": os.getenv("MADDISON_BASE_ID"),
-                    "table_id": os.getenv("MADDISON_CONTENT_TABLE_ID"),
-                    "view": "Unposted",
-                },
-                "warmup_accounts": {
-                    "base_id": os.getenv("IG_ARMY_BASE_ID"),
-                    "table_id": os.getenv("IG_ARMY_WARMUP_ACCOUNTS_TABLE_ID"),
-                    "view": "Warmup",
-                },
-            }
-
-            if table_key not in table_map:
-                raise ValueError(f"Unsupported table key: '{table_key}'")
-
-            config = table_map[table_key]
+            config = _table_config(table_key)
             self.base_id = config["base_id"]
             self.table_id = config["table_id"]
             self.view_name = config["view"]
 
-            if not all([self.base_id, self.table_id, self.view_name]):
-                raise ValueError(
-                    f"Missing required environment variables for table key: '{table_key}'"
-                )
+        self._tables: Dict[tuple, Any] = {}
+        self._tables_lock = threading.Lock()
+
+    def table(self, base_id: Optional[str] = None, table_id: Optional[str] = None):
+        """The pyairtable Table for this client's (or the given) base/table, built once."""
+        key = (base_id or self.base_id, table_id or self.table_id)
+        with self._tables_lock:
+            table = self._tables.get(key)
+            if table is None:
+                table = self.api.table(*key)
+                self._tables[key] = table
+            return table
+
+    def for_table(self, base_id: str, table_id: str) -> "AirtableClient":
+        """The shared client for another base/table (instead of re-pointing this one)."""
+        return get_airtable_client(base_id=base_id, table_id=table_id)
+
+    def _mirrored_records(
+        self,
+        base_id: str,
+        table_id: str,
+        fields: Sequence[str],
+        view: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[List[Dict]]:
+        """
+        Reads rows from the local SQLite mirror of a table/view (delta-synced
+        by LAST_MODIFIED_TIME, see airtable_mirror). Returns None if mirrors
+        are disabled or the mirror has never synced, so the caller queries
+        Airtable directly. Only worth it for view-scoped reads: the mirror
+        loads every row in scope, however few the caller asks for.
+        """
+        if not mirrors_enabled():
+            return None
+        mirror = get_airtable_mirror(
+            self.api,
+            base_id,
+            table_id,
+            fields,
+            view=view,
+            index_fields=list(where or {}),
+        )
+        mirror.refresh()
+        if not mirror.has_synced:
+            return None
+        return mirror.records(where=where, limit=limit, refresh=False)
+
+    def _settle_outbox(self, timeout: float = OUTBOX_SETTLE_TIMEOUT) -> Set[str]:
+        """
+        Sends updates left in the outbox by earlier (crashed or undrained)
+        runs before a read that decides what to work on, and returns the ids
+        of this table's records whose update is still unsent (e.g. parked),
+        which that read must skip so nothing is posted or warmed up twice.
+        """
+        outbox = get_airtable_outbox(self.api)
+        if not outbox.flush(timeout=timeout):
+            logger.warning("⚠️ Outbox still has unsent updates; skipping those records")
+        pending = outbox.pending_record_ids(self.base_id, self.table_id)
+        if pending:
+            logger.warning(f"⚠️ {len(pending)} record(s) have unsent updates and will be skipped")
+        return pending
+
+    def iter_unposted_records_for_today(
+        self, page_size: int = MAX_PAGE_SIZE, max_records: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Streams today's (Bogota-local) scheduled records from the view, page by page.
+        Filtering happens server-side with filterByFormula and only the needed
+        fields are requested; a new page is fetched only when the caller asks
+        for more records.
+
+        Yields:
+            Dict: {"id": ..., "fields": {"username", "package_name", "media_url"}}
+        """
+        today_str, formula = _today_schedule_formula()
+
+        table = self.table(self.base_id, self.table_id)
+        options = {
+            "view": self.view_name,
+            "formula": formula,
+            "fields": UNPOSTED_FIELDS,
+            "page_size": page_size,
+        }
+        if max_records:
+            options["max_records"] = max_records
+
+        for page in table.iterate(**options):
+            logger.debug(f"📄 Received page of {len(page)} records for {today_str}")
+            for record in page:
+                yield _unposted_record(record)
 
     def get_unposted_records_for_today(self, max_count: int = 1):
         try:
             logger.info(f"📥 Fetching up to {max_count} unposted records for today...")
+            skip = self._settle_outbox()
 
-            table = self.api.table(self.base_id, self.table_id)
-            records = table.all(view=self.view_name)
-
-            bogota = pytz.timezone("America/Bogota")
-            today_str = datetime.now(bogota).strftime("%Y-%m-%d")
-
-            matching = []
-
-            for record in records:
-                fields = record.get("fields", {})
-                schedule_raw = fields.get("Schedule Date")
-                if not schedule_raw:
-                    continue
-
-                scheduled_date = schedule_raw.split("T")[0]
-
-                if scheduled_date != today_str:
-                    continue
-
-                username = fields.get("Username")
-                media_url = fields.get("Drive URL")
-                raw_package = fields.get("Package Name")
-                package_name = (
-                    raw_package[0]
-                    if isinstance(raw_package, list) and raw_package
-                    else raw_package
-                )
-
-                matching.append(
-                    {
-                        "id": record["id"],
-                        "fields": {
-                            "username": username,
-                            "package_name": package_name,
-                            "media_url": media_url,
-                        },
-                    }
-                )
-
-                if len(matching) >= max_count:
-                    break
-
-            return matching
+            records = self.iter_unposted_records_for_today(
+                page_size=_page_size_for(max_count + len(skip)),
+                max_records=max_count + len(skip),
+            )
+            records = (r for r in records if r["id"] not in skip)
+            return list(islice(records, max_count))
 
         except Exception as e:
             logger.error(
@@ -141,14 +296,33 @@ class AirtableClient:
         Update arbitrary fields in Airtable record.
         """
         try:
-            table = self.api.table(self.base_id, self.table_id)
+            table = self.table(self.base_id, self.table_id)
             result = table.update(record_id, fields, typecast=True)
+            note_record_update(self.base_id, self.table_id, record_id, fields)
             logger.debug(f"✅ Updated record {record_id} with fields: {fields}")
             return result
         except Exception as e:
             logger.error(f"❌ Failed to update record: {e}")
             return None
 
+    def enqueue_record_update(
+        self,
+        record_id: str,
+        fields: dict,
+        base_id: Optional[str] = None,
+        table_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Queues a field update in the durable outbox instead of calling Airtable
+        inline. Updates to the same record are coalesced and sent in batches by
+        a background sender; returns True once the update is stored locally.
+        """
+        base_id, table_id = base_id or self.base_id, table_id or self.table_id
+        queued = get_airtable_outbox(self.api).enqueue(base_id, table_id, record_id, fields)
+        if queued:
+            note_record_update(base_id, table_id, record_id, fields)
+        return queued
+
     def get_single_active_account(self, base_id: str, table_id: str, view_id: str):
         """
         Fetches a single active account from the specified Airtable base/table/view.
@@ -158,17 +332,12 @@ class AirtableClient:
             logger.info("📡 Fetching active IG account from Airtable")
             logger.info(f"🧾 Base: {base_id} | Table: {table_id} | View: {view_id}")
 
-            table = self.api.table(base_id, table_id)
-            fields = [
-                "Account",
-                "Password",
-                "Email",
-                "Email Password",
-                "Package Name",
-                "Device ID",
-            ]
-
-            records = table.all(view=view_id, fields=fields, max_records=1)
+            records = self._mirrored_records(
+                base_id, table_id, ACCOUNT_FIELDS, view=view_id, limit=1
+            )
+            if records is None:
+                table = self.table(base_id, table_id)
+                records = table.all(view=view_id, fields=ACCOUNT_FIELDS, max_records=1)
 
             if not records:
                 logger.warning("⚠️ No active accounts found in view")
@@ -209,39 +378,56 @@ class AirtableClient:
             logger.error(f"❌ Unexpected error: {e}")
             return None
 
+    def iter_pending_warmup_records(
+        self, page_size: int = MAX_PAGE_SIZE, max_records: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Streams 'Warmup' records not yet marked complete, page by page.
+        Status filtering happens server-side with filterByFormula.
+
+        Yields:
+            Dict: {"record_id", "username", "device_id", "package_name"}
+        """
+        table = self.table(self.base_id, self.table_id)
+        options = {
+            "view": "Warmup",
+            "formula": PENDING_WARMUP_FORMULA,
+            "fields": WARMUP_FIELDS,
+            "page_size": page_size,
+        }
+        if max_records:
+            options["max_records"] = max_records
+
+        for page in table.iterate(**options):
+            logger.debug(f"📄 Received page of {len(page)} pending warmup records")
+            for record in page:
+                yield _pending_warmup_record(record)
+
     def get_pending_warmup_records(self, max_count=None):
         """
         Fetch records that are in 'Warmup' status and not yet marked complete.
+        Served from the local mirror of the Warmup view when available.
         """
-        table = self.api.table(self.base_id, self.table_id)
-        records = table.all(view="Warmup")
-
-        result = []
-        for record in records:
-            fields = record.get("fields", {})
-            if fields.get("Status") != "Warmup":
-                continue
-            if fields.get("Daily Warmup Complete") is True:
-                continue
-
-            def flatten(value):
-                if isinstance(value, list) and value:
-                    return value[0]
-                return value
-
-            result.append(
-                {
-                    "record_id": record["id"],
-                    "username": flatten(fields.get("Username")),
-                    "device_id": flatten(fields.get("Device ID")),
-                    "package_name": flatten(fields.get("Package Name")),
-                }
+        skip = self._settle_outbox()
+        limit = max_count + len(skip) if max_count else None
+        mirrored = self._mirrored_records(
+            self.base_id,
+            self.table_id,
+            WARMUP_FIELDS,
+            view="Warmup",
+            where=PENDING_WARMUP_WHERE,
+            limit=limit,
+        )
+        if mirrored is not None:
+            records = (_pending_warmup_record(r) for r in mirrored)
+        else:
+            records = self.iter_pending_warmup_records(
+                page_size=_page_size_for(limit), max_records=limit
             )
-
-            if max_count and len(result) >= max_count:
-                break
-
-        return result
+        records = (r for r in records if r["record_id"] not in skip)
+        if max_count:
+            return list(islice(records, max_count))
+        return list(records)
 
     def get_warmup_credentials(self):
         """
@@ -262,13 +448,10 @@ class AirtableClient:
                 f"📡 Fetching warmup account credentials from Base: {base_id}, Table: {table_id}"
             )
 
-            table = self.api.table(base_id, table_id)
-
-            # Specify the only two fields we need for this operation
-            fields_to_fetch = ["Email", "Email Password"]
-
-            # Fetch the first available record from the specified view
-            records = table.all(fields=fields_to_fetch, max_records=1)
+            # Only the two fields we need. Read directly: with no view to
+            # scope it, a mirror would have to load the whole accounts table
+            table = self.table(base_id, table_id)
+            records = table.all(fields=CREDENTIAL_FIELDS, max_records=1)
 
             if not records:
                 logger.warning(
@@ -320,11 +503,9 @@ class AirtableClient:
                 f"📡 Fetching up to {limit} warmup account credentials from Base: {base_id}, Table: {table_id}"
             )
 
-            table = self.api.table(base_id, table_id)
-            fields_to_fetch = ["Email", "Email Password"]
-
-            # Fetch multiple records up to the specified limit
-            records = table.all(fields=fields_to_fetch, max_records=limit)
+            # Fetch multiple records up to the specified limit (directly, as above)
+            table = self.table(base_id, table_id)
+            records = table.all(fields=CREDENTIAL_FIELDS, max_records=limit)
 
             if not records:
                 logger.warning(
@@ -386,19 +567,14 @@ class AirtableClient:
             )
             logger.info(f"   Base: {base_id}, Table: {table_id}")
 
-            table = self.api.table(base_id, table_id)
-            fields_to_fetch = [
-                "Account",
-                "Password",
-                "Email",
-                "Email Password",
-                "Package Name",
-                "Device ID",
-            ]
-
-            records = table.all(
-                view=view_name, fields=fields_to_fetch, max_records=max_records
+            records = self._mirrored_records(
+                base_id, table_id, ACCOUNT_FIELDS, view=view_name, limit=max_records
             )
+            if records is None:
+                table = self.table(base_id, table_id)
+                records = table.all(
+                    view=view_name, fields=ACCOUNT_FIELDS, max_records=max_records
+                )
 
             if not records:
                 logger.warning(f"⚠️ No accounts found in the '{view_name}' view.")
@@ -446,3 +622,38 @@ class AirtableClient:
                 exc_info=True,
             )
             return []
+
+
+_clients: Dict[tuple, AirtableClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_airtable_client(
+    table_key: Optional[str] = None,
+    base_id: Optional[str] = None,
+    table_id: Optional[str] = None,
+) -> AirtableClient:
+    """
+    Returns the process-wide AirtableClient for a table, given either a
+    table_key ("content_alexis", "warmup_accounts", ...) or base_id/table_id.
+    With neither, returns the unscoped client used for the accounts methods
+    that read their base/table from the environment.
+    """
+    if table_key:
+        load_airtable_env()
+        config = _table_config(table_key)
+        key = (config["base_id"], config["table_id"])
+    else:
+        key = (base_id, table_id)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if table_key:
+                client = AirtableClient(table_key=table_key)
+            else:
+                client = AirtableClient(base_id=base_id, table_id=table_id)
+            _clients[key] = client
+        elif table_key and client.view_name is None:
+            # First created from ids alone; the table key knows its view
+            client.view_name = config["view"]
+        return client
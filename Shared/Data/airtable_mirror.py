@@ -0,0 +1,414 @@
+# Shared/Data/airtable_mirror.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from Shared.config_loader import get_cache_dir, get_config_section
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="AirtableMirror")
+
+DEFAULT_MIN_REFRESH_INTERVAL = 30.0  # seconds a synced mirror is served without asking Airtable
+DEFAULT_FULL_SYNC_HOURS = 6.0  # full reload catches deleted rows and computed-field drift
+DEFAULT_MODIFIED_SKEW = 60.0  # seconds of overlap between deltas (clock skew, in-flight writes)
+
+_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirror_state (
+    name TEXT PRIMARY KEY,
+    definition TEXT NOT NULL,
+    synced_since TEXT NOT NULL,
+    full_synced_at REAL NOT NULL,
+    checked_at REAL NOT NULL
+)
+"""
+
+
+def _flatten(value):
+    """Index value for a field: lookups use their first value, checkboxes 0/1."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _definition(base_id, table_id, view, formula, fields, index_fields) -> str:
+    """Stable identity of a mirrored dataset (also names its SQL table)."""
+    all_fields = list(dict.fromkeys(list(fields) + list(index_fields)))
+    return json.dumps([base_id, table_id, view, formula, all_fields, list(index_fields)])
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _epoch(iso: str) -> float:
+    return datetime.strptime(iso, "%Y-%m-%dT%H:%M:%S.000Z").replace(tzinfo=timezone.utc).timestamp()
+
+
+class AirtableMirror:
+    """
+    Local SQLite copy of one Airtable dataset: a table, optionally narrowed
+    to a view and/or a filterByFormula, with a fixed list of fields.
+
+    The first refresh loads every row. Later refreshes only ask for rows
+    whose LAST_MODIFIED_TIME() is newer than the previous sync: one query
+    within the dataset (new and changed rows) and one table-wide id-only
+    query (rows that changed and so may have left the view/formula). Rows
+    deleted in Airtable and computed fields (which don't bump the modified
+    time) are caught by the periodic full reload.
+
+    Reads are served from SQLite; `index_fields` become indexed columns
+    that records(where=...) filters on. Local writes are applied to the
+    mirror right away (see note_update) so reads see them before the next
+    delta. A row hidden by a write that never shows up in Airtable (parked
+    in the outbox) is released by the first delta whose window starts
+    after the write.
+    """
+
+    def __init__(
+        self,
+        api,
+        db_path: str,
+        base_id: str,
+        table_id: str,
+        fields: Sequence[str],
+        view: Optional[str] = None,
+        formula: Optional[str] = None,
+        index_fields: Sequence[str] = (),
+        min_refresh_interval: float = DEFAULT_MIN_REFRESH_INTERVAL,
+        full_sync_interval: float = DEFAULT_FULL_SYNC_HOURS * 3600,
+        modified_skew: float = DEFAULT_MODIFIED_SKEW,
+    ):
+        """
+        Args:
+            api: pyairtable Api used for syncing.
+            db_path (str): SQLite file shared by all mirrors.
+            base_id (str), table_id (str): The Airtable table.
+            fields (Sequence[str]): Fields to mirror (all of index_fields included).
+            view (Optional[str]): Only rows in this view, in its order.
+            formula (Optional[str]): Only rows matching this filterByFormula.
+            index_fields (Sequence[str]): Fields stored as indexed columns for where=.
+            min_refresh_interval (float): Seconds between delta syncs on read.
+            full_sync_interval (float): Seconds between full reloads.
+            modified_skew (float): Overlap subtracted from each sync's start time.
+        """
+        self.api = api
+        self.base_id = base_id
+        self.table_id = table_id
+        self.view = view
+        self.formula = formula
+        self.definition = _definition(base_id, table_id, view, formula, fields, index_fields)
+        self.fields = json.loads(self.definition)[4]
+        self.index_fields = list(index_fields)
+        self.min_refresh_interval = min_refresh_interval
+        self.full_sync_interval = full_sync_interval
+        self.modified_skew = modified_skew
+        # Rows can drop out of a view/formula after a write; only Airtable knows
+        self.membership_is_remote = bool(view or formula)
+
+        self.name = "mirror_" + hashlib.sha1(self.definition.encode()).hexdigest()[:16]
+        self._columns = {f: f"f{i}" for i, f in enumerate(self.index_fields)}
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def __repr__(self) -> str:
+        scope = f" view={self.view!r}" if self.view else ""
+        return f"<AirtableMirror {self.base_id}/{self.table_id}{scope}>"
+
+    def _create_tables(self):
+        index_columns = "".join(f", {c}" for c in self._columns.values())
+        with self._lock, self._conn:
+            self._conn.execute(_STATE_SCHEMA)
+            self._conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.name} (
+                    record_id TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    pending REAL NOT NULL DEFAULT 0,
+                    fields TEXT NOT NULL{index_columns}
+                )
+                """
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.name}_position ON {self.name} (pending, position)"
+            )
+            for column in self._columns.values():
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.name}_{column} ON {self.name} ({column})"
+                )
+
+    # --- Sync ---
+
+    @property
+    def has_synced(self) -> bool:
+        """True once a full load has completed (in this or an earlier run)."""
+        with self._lock:
+            return self._state() is not None
+
+    def _state(self) -> Optional[tuple]:
+        return self._conn.execute(
+            "SELECT synced_since, full_synced_at, checked_at FROM mirror_state WHERE name=?",
+            (self.name,),
+        ).fetchone()
+
+    def refresh(self, force: bool = False, full: bool = False) -> bool:
+        """
+        Brings the mirror up to date: a full load the first time (or when
+        `full` is set / full_sync_interval has passed), otherwise a delta.
+        Skipped if the last check is younger than min_refresh_interval,
+        unless `force` is set.
+
+        Returns:
+            bool: True if Airtable was queried successfully.
+        """
+        with self._lock:
+            now = time.time()
+            state = self._state()
+            if state and not (force or full) and now - state[2] < self.min_refresh_interval:
+                return False
+            try:
+                if full or state is None or now - state[1] >= self.full_sync_interval:
+                    self._full_sync(now)
+                else:
+                    self._delta_sync(state[0], now)
+            except Exception as e:
+                logger.error(f"❌ {self!r} sync failed, serving local rows: {e}")
+                return False
+            return True
+
+    def _fetch(self, formula: Optional[str], fields: List[str], view: Optional[str]) -> List[Dict]:
+        options: Dict[str, Any] = {"fields": fields}
+        if view:
+            options["view"] = view
+        if formula:
+            options["formula"] = formula
+        return self.api.table(self.base_id, self.table_id).all(**options)
+
+    def _full_sync(self, now: float):
+        started = time.perf_counter()
+        records = self._fetch(self.formula, self.fields, self.view)
+        with self._conn:
+            self._conn.execute(f"DELETE FROM {self.name}")
+            self._upsert(records, start_position=0)
+            self._save_state(now, full=True)
+        logger.info(
+            f"🗄️ {self!r} full sync: {len(records)} row(s) in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _delta_sync(self, since: str, now: float):
+        """
+        Fetches rows changed since `since`. Any write made before `since`
+        that reached Airtable has been seen by this or the previous delta, so
+        rows still hidden by such a write are shown again.
+        """
+        started = time.perf_counter()
+        changed = f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{since}'))"
+        in_scope = f"AND({self.formula}, {changed})" if self.formula else changed
+        records = self._fetch(in_scope, self.fields, self.view)
+        left = set()
+        if self.membership_is_remote:
+            touched = self._fetch(changed, self.fields[:1], None)
+            left = {r["id"] for r in touched} - {r["id"] for r in records}
+        with self._conn:
+            end = self._conn.execute(f"SELECT COALESCE(MAX(position), -1) + 1 FROM {self.name}").fetchone()[0]
+            self._upsert(records, start_position=end)
+            if left:
+                self._conn.executemany(
+                    f"DELETE FROM {self.name} WHERE record_id=?", [(r,) for r in left]
+                )
+            expired = self._conn.execute(
+                f"UPDATE {self.name} SET pending=0 WHERE pending > 0 AND pending < ?",
+                (_epoch(since),),
+            ).rowcount
+            self._save_state(now, full=False)
+        if expired:
+            logger.warning(
+                f"⚠️ {self!r}: {expired} row(s) hidden by a write Airtable never received are visible again"
+            )
+        if records or left:
+            logger.info(
+                f"🗄️ {self!r} delta: {len(records)} changed, {len(left)} left "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+
+    def _upsert(self, records: List[Dict], start_position: int):
+        """Inserts new rows at the end; changed rows keep their position."""
+        columns = list(self._columns.values())
+        assignments = "".join(f", {c}=excluded.{c}" for c in columns)
+        sql = f"""
+            INSERT INTO {self.name} (record_id, position, pending, fields{''.join(', ' + c for c in columns)})
+            VALUES (?, ?, 0, ?{', ?' * len(columns)})
+            ON CONFLICT(record_id) DO UPDATE SET pending=0, fields=excluded.fields{assignments}
+        """
+        rows = []
+        for offset, record in enumerate(records):
+            fields = record.get("fields", {})
+            rows.append(
+                (record["id"], start_position + offset, json.dumps(fields))
+                + tuple(_flatten(fields.get(f)) for f in self.index_fields)
+            )
+        self._conn.executemany(sql, rows)
+
+    def _save_state(self, now: float, full: bool):
+        since = _iso(now - self.modified_skew)
+        self._conn.execute(
+            """
+            INSERT INTO mirror_state (name, definition, synced_since, full_synced_at, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET synced_since=excluded.synced_since,
+                checked_at=excluded.checked_at,
+                full_synced_at=CASE WHEN ? THEN excluded.full_synced_at ELSE full_synced_at END
+            """,
+            (self.name, self.definition, since, now, now, int(full)),
+        )
+
+    # --- Reads ---
+
+    def records(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        refresh: bool = True,
+    ) -> List[Dict]:
+        """
+        Rows in view order, as {"id": ..., "fields": {...}} like pyairtable.
+
+        Args:
+            where (Optional[Dict[str, Any]]): index field -> value. None matches
+                an empty field; False matches empty/unchecked.
+            limit (Optional[int]): Maximum rows.
+            refresh (bool): Delta-sync first if min_refresh_interval has passed.
+        """
+        if refresh:
+            self.refresh()
+        clauses, params = ["pending = 0"], []
+        for field, value in (where or {}).items():
+            column = self._columns.get(field)
+            if column is None:
+                raise ValueError(f"{field!r} is not an index field of {self!r}")
+            if value is None:
+                clauses.append(f"{column} IS NULL")
+            elif value is False:
+                clauses.append(f"({column} IS NULL OR {column} IN (0, ''))")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(_flatten(value))
+        sql = f"SELECT record_id, fields FROM {self.name} WHERE {' AND '.join(clauses)} ORDER BY position"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{"id": record_id, "fields": json.loads(fields)} for record_id, fields in rows]
+
+    # --- Local writes ---
+
+    def note_update(self, record_id: str, fields: Dict[str, Any]):
+        """
+        Applies a field update we just sent (or queued) to the mirrored row.
+        If membership is decided by a view/formula, the row is hidden until
+        the next sync says whether it is still in; `pending` holds the time
+        it was hidden so a write that never lands can be expired.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT fields FROM {self.name} WHERE record_id=?", (record_id,)
+            ).fetchone()
+            if row is None:
+                return
+            merged = json.loads(row[0])
+            merged.update({k: v for k, v in fields.items() if k in self.fields})
+            assignments = "".join(f", {c}=?" for c in self._columns.values())
+            self._conn.execute(
+                f"UPDATE {self.name} SET fields=?, pending=?{assignments} WHERE record_id=?",
+                (json.dumps(merged), time.time() if self.membership_is_remote else 0)
+                + tuple(_flatten(merged.get(f)) for f in self.index_fields)
+                + (record_id,),
+            )
+
+    def release(self, record_id: str):
+        """Shows a row again whose hiding write will not reach Airtable."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE {self.name} SET pending=0 WHERE record_id=?", (record_id,)
+            )
+
+
+_mirrors: Dict[str, AirtableMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def _config() -> Dict:
+    return get_config_section("airtable_mirror", default={}) or {}
+
+
+def mirrors_enabled() -> bool:
+    return bool(_config().get("enabled", True))
+
+
+def get_airtable_mirror(
+    api,
+    base_id: str,
+    table_id: str,
+    fields: Sequence[str],
+    view: Optional[str] = None,
+    formula: Optional[str] = None,
+    index_fields: Sequence[str] = (),
+) -> AirtableMirror:
+    """
+    Returns the process-wide mirror for a dataset, stored in the SQLite file
+    from the `airtable_mirror:` section of config.yaml (in paths.cache_dir).
+    """
+    cfg = _config()
+    definition = _definition(base_id, table_id, view, formula, fields, index_fields)
+    with _mirrors_lock:
+        mirror = _mirrors.get(definition)
+        if mirror is None:
+            mirror = AirtableMirror(
+                api,
+                os.path.join(get_cache_dir(), cfg.get("db_file", "airtable_mirror.sqlite3")),
+                base_id,
+                table_id,
+                fields,
+                view=view,
+                formula=formula,
+                index_fields=index_fields,
+                min_refresh_interval=cfg.get("min_refresh_interval", DEFAULT_MIN_REFRESH_INTERVAL),
+                full_sync_interval=cfg.get("full_sync_hours", DEFAULT_FULL_SYNC_HOURS) * 3600,
+                modified_skew=cfg.get("modified_skew", DEFAULT_MODIFIED_SKEW),
+            )
+            _mirrors[definition] = mirror
+        return mirror
+
+
+def note_record_update(base_id: str, table_id: str, record_id: str, fields: Dict[str, Any]):
+    """Applies a local write to every mirror of that table in this process."""
+    with _mirrors_lock:
+        mirrors = [m for m in _mirrors.values() if (m.base_id, m.table_id) == (base_id, table_id)]
+    for mirror in mirrors:
+        try:
+            mirror.note_update(record_id, fields)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not apply update of {record_id} to {mirror!r}: {e}")
+
+
+def release_record_update(base_id: str, table_id: str, record_id: str):
+    """Un-hides a row in every mirror of that table after its write was given up."""
+    with _mirrors_lock:
+        mirrors = [m for m in _mirrors.values() if (m.base_id, m.table_id) == (base_id, table_id)]
+    for mirror in mirrors:
+        try:
+            mirror.release(record_id)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not release {record_id} in {mirror!r}: {e}")
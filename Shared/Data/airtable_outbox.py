@@ -0,0 +1,333 @@
+# Shared/Data/airtable_outbox.py
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from Shared.config_loader import get_cache_dir, get_config_section
+from Shared.Data.airtable_mirror import release_record_update
+from Shared.Data.airtable_rate_limit import install_rate_limiter
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="AirtableOutbox")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_updates (
+    base_id     TEXT NOT NULL,
+    table_id    TEXT NOT NULL,
+    record_id   TEXT NOT NULL,
+    fields      TEXT NOT NULL,
+    version     INTEGER NOT NULL DEFAULT 1,
+    enqueued_at REAL NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    next_try_at REAL NOT NULL DEFAULT 0,
+    last_error  TEXT,
+    PRIMARY KEY (base_id, table_id, record_id)
+)
+"""
+
+
+class AirtableOutbox:
+    """
+    Durable write-behind queue for Airtable record updates.
+
+    Device threads call enqueue() and return immediately; the update is
+    committed to a local SQLite (WAL) database first, so nothing is lost if
+    Airtable is slow or the process dies. A sender thread coalesces pending
+    updates per record (later fields win) and flushes them with Airtable's
+    batch update, at most `batch_size` records per request. The request
+    rate is enforced by the shared per-base token bucket (see
+    airtable_rate_limit). close() drains the queue on shutdown.
+    """
+
+    def __init__(
+        self,
+        api,
+        db_path: str,
+        batch_size: int = 10,
+        flush_interval: float = 1.0,
+        max_attempts: int = 8,
+    ):
+        """
+        Args:
+            api: A pyairtable Api instance used to send the batches.
+            db_path (str): SQLite database file for the queue.
+            batch_size (int): Records per batch update (Airtable allows 10).
+            flush_interval (float): Seconds to wait for more updates before sending.
+            max_attempts (int): Failed updates are parked after this many tries.
+        """
+        self.api = api
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="AirtableOutboxSender", daemon=True
+        )
+        self._thread.start()
+
+        pending = self.pending_count()
+        if pending:
+            logger.info(f"📮 Outbox resumed with {pending} pending update(s) from disk")
+            self._wake.set()
+
+    # --- Producer side ---
+
+    def enqueue(
+        self, base_id: str, table_id: str, record_id: str, fields: Dict[str, Any]
+    ) -> bool:
+        """
+        Queues a field update for a record, merging it into any pending update.
+
+        Returns:
+            bool: True once the update is durably stored locally.
+        """
+        if not (base_id and table_id and record_id):
+            logger.error(
+                f"❌ Cannot queue update without base/table/record id: {base_id}/{table_id}/{record_id}"
+            )
+            return False
+        try:
+            with self._db_lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT fields FROM pending_updates WHERE base_id=? AND table_id=? AND record_id=?",
+                    (base_id, table_id, record_id),
+                ).fetchone()
+                merged = json.loads(row[0]) if row else {}
+                merged.update(fields)
+                self._conn.execute(
+                    """
+                    INSERT INTO pending_updates (base_id, table_id, record_id, fields, enqueued_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (base_id, table_id, record_id) DO UPDATE SET
+                        fields = excluded.fields,
+                        version = version + 1,
+                        attempts = 0,
+                        next_try_at = 0
+                    """,
+                    (base_id, table_id, record_id, json.dumps(merged), time.time()),
+                )
+            logger.debug(f"📮 Queued update for {record_id}: {fields}")
+            self._idle.clear()
+            self._wake.set()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"❌ Failed to queue Airtable update for {record_id}: {e}")
+            return False
+
+    def pending_count(self, include_parked: bool = False) -> int:
+        query = "SELECT COUNT(*) FROM pending_updates"
+        params: Tuple = ()
+        if not include_parked:
+            query += " WHERE attempts < ?"
+            params = (self.max_attempts,)
+        with self._db_lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def pending_record_ids(self, base_id: str, table_id: str) -> Set[str]:
+        """Records of a table with an update not yet sent (parked ones included)."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT record_id FROM pending_updates WHERE base_id=? AND table_id=?",
+                (base_id, table_id),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Wakes the sender and waits until nothing sendable is pending.
+
+        Returns:
+            bool: True if the queue drained within the timeout.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.pending_count() == 0:
+                return True
+            self._wake.set()
+            self._idle.wait(timeout=min(0.5, max(0.0, deadline - time.time())))
+        return self.pending_count() == 0
+
+    def close(self, timeout: float = 30.0):
+        """Drains pending updates (up to `timeout` seconds) and stops the sender."""
+        if self._stop.is_set():
+            return
+        drained = self.flush(timeout=timeout)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        remaining = self.pending_count(include_parked=True)
+        if drained and not remaining:
+            logger.info("📮 Outbox drained; all Airtable updates sent.")
+        else:
+            logger.warning(
+                f"⚠️ Outbox closed with {remaining} update(s) still on disk; they will be sent next run."
+            )
+        with self._db_lock:
+            self._conn.close()
+
+    # --- Sender side ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.flush_interval)
+            if self._stop.is_set():
+                break
+            # Give concurrent producers a moment so their updates share a batch
+            time.sleep(min(self.flush_interval, 0.25))
+            self._wake.clear()
+            try:
+                while self._send_due_batches():
+                    pass
+            except Exception as e:
+                logger.error(f"💥 Outbox sender error: {e}", exc_info=True)
+            if not self._has_due_work():
+                self._idle.set()
+
+    def _has_due_work(self) -> bool:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM pending_updates WHERE attempts < ? AND next_try_at <= ? LIMIT 1",
+                (self.max_attempts, time.time()),
+            ).fetchone()
+        return row is not None
+
+    def _send_due_batches(self) -> bool:
+        """Sends one batch per (base, table). Returns True if anything was sent."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                """
+                SELECT base_id, table_id, record_id, fields, version, attempts
+                FROM pending_updates
+                WHERE attempts < ? AND next_try_at <= ?
+                ORDER BY enqueued_at
+                """,
+                (self.max_attempts, time.time()),
+            ).fetchall()
+        if not rows:
+            return False
+
+        groups: Dict[Tuple[str, str], List[tuple]] = defaultdict(list)
+        for row in rows:
+            groups[(row[0], row[1])].append(row)
+
+        for (base_id, table_id), group in groups.items():
+            batch = group[: self.batch_size]
+            records = [{"id": r[2], "fields": json.loads(r[3])} for r in batch]
+            try:
+                self.api.table(base_id, table_id).batch_update(records, typecast=True)
+            except Exception as e:
+                if len(batch) > 1 and _is_record_error(e):
+                    # One bad record rejects the whole batch; send individually
+                    # so the rest go through and only the bad one is retried.
+                    self._send_individually(base_id, table_id, batch)
+                else:
+                    self._mark_failed(base_id, table_id, batch, e)
+                continue
+            self._mark_sent(base_id, table_id, batch)
+            logger.info(
+                f"📤 Sent {len(batch)} coalesced update(s) to {base_id}/{table_id}"
+            )
+        return True
+
+    def _send_individually(self, base_id: str, table_id: str, batch: List[tuple]):
+        table = self.api.table(base_id, table_id)
+        for row in batch:
+            try:
+                table.update(row[2], json.loads(row[3]), typecast=True)
+            except Exception as e:
+                self._mark_failed(base_id, table_id, [row], e)
+                continue
+            self._mark_sent(base_id, table_id, [row])
+
+    def _mark_sent(self, base_id: str, table_id: str, batch: List[tuple]):
+        with self._db_lock, self._conn:
+            for _, _, record_id, _, version, _ in batch:
+                # Only delete if no newer update was merged in while we were sending
+                self._conn.execute(
+                    "DELETE FROM pending_updates WHERE base_id=? AND table_id=? AND record_id=? AND version=?",
+                    (base_id, table_id, record_id, version),
+                )
+
+    def _mark_failed(self, base_id: str, table_id: str, batch: List[tuple], error):
+        logger.warning(
+            f"⚠️ Batch update of {len(batch)} record(s) to {base_id}/{table_id} failed: {error}"
+        )
+        now = time.time()
+        parked = []
+        with self._db_lock, self._conn:
+            for _, _, record_id, _, _, attempts in batch:
+                attempts += 1
+                backoff = min(2**attempts, 300)
+                self._conn.execute(
+                    """
+                    UPDATE pending_updates SET attempts=?, next_try_at=?, last_error=?
+                    WHERE base_id=? AND table_id=? AND record_id=?
+                    """,
+                    (attempts, now + backoff, str(error)[:500], base_id, table_id, record_id),
+                )
+                if attempts >= self.max_attempts:
+                    logger.error(
+                        f"❌ Parking update for {record_id} after {attempts} failed attempts: {error}"
+                    )
+                    parked.append(record_id)
+        # Mirrors hid these rows for the write; Airtable never got it
+        for record_id in parked:
+            release_record_update(base_id, table_id, record_id)
+
+
+def _is_record_error(error) -> bool:
+    """True for 4xx responses caused by the payload (not rate limits or auth)."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in (400, 404, 422)
+
+
+_outbox: Optional[AirtableOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_airtable_outbox(api) -> AirtableOutbox:
+    """
+    Returns the process-wide outbox, creating it (and its sender thread) on
+    first use. Settings come from the `airtable_outbox:` section of config.yaml.
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            cfg = get_config_section("airtable_outbox", default={}) or {}
+            db_path = os.path.join(
+                get_cache_dir(), cfg.get("db_file", "airtable_outbox.sqlite3")
+            )
+            _outbox = AirtableOutbox(
+                install_rate_limiter(api),
+                db_path,
+                batch_size=cfg.get("batch_size", 10),
+                flush_interval=cfg.get("flush_interval", 1.0),
+                max_attempts=cfg.get("max_attempts", 8),
+            )
+            drain_timeout = cfg.get("drain_timeout", 30)
+            atexit.register(_outbox.close, timeout=drain_timeout)
+        return _outbox
+
+
+def drain_airtable_outbox(timeout: float = 30.0) -> bool:
+    """Blocks until queued updates are sent (if the outbox was ever used)."""
+    if _outbox is None:
+        return True
+    return _outbox.flush(timeout=timeout)
@@ -0,0 +1,300 @@
+# Shared/Data/airtable_rate_limit.py
+
+import atexit
+import email.utils
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from pyairtable import Api
+from requests.adapters import HTTPAdapter
+
+from Shared.config_loader import get_config_section
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="AirtableRateLimit")
+
+# Airtable allows 5 requests/second per base; stay just under it by default
+DEFAULT_REQUESTS_PER_SECOND = 4.0
+DEFAULT_BURST = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0  # seconds; doubled per attempt, then jittered
+DEFAULT_BACKOFF_MAX = 30.0  # cap on a 5xx backoff
+DEFAULT_THROTTLE_PENALTY = 30.0  # Airtable rejects a base's requests for 30s after a 429
+THROTTLE_JITTER = 2.0  # seconds spread over the penalty so waiters don't return at once
+DEFAULT_POOL_MAXSIZE = 16  # keep-alive connections per host (workers + outbox + mirror syncs)
+DEFAULT_ENDPOINT_URL = "https://api.airtable.com"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# /v0/<baseId>/... for data, /v0/meta/bases/<baseId>/... for schema
+_BASE_RE = re.compile(r"/v0/(?:meta/bases/)?(app[A-Za-z0-9]+)")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` banked."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token without blocking and returns how many seconds the caller
+        must wait before using it (0 if one was banked). Waiters queue up by
+        driving the balance negative, so sync and asyncio callers can share
+        one bucket.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> float:
+        """Blocks until a token is available. Returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def drain(self, penalty: float = 0.0):
+        """
+        Empties the bucket, e.g. after a 429, so callers back off together;
+        with `penalty`, no token is handed out for that many seconds. The
+        hold is absolute: simultaneous 429s on one base (one penalty window
+        at Airtable) hold it for a single penalty, not one each.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens = min(self._tokens, -penalty * self.rate)
+
+
+@dataclass
+class ThrottleStats:
+    """Process-wide counters of Airtable traffic shaping."""
+
+    requests: int = 0
+    throttled: int = 0  # 429 responses
+    server_errors: int = 0  # 5xx responses
+    retries: int = 0
+    gave_up: int = 0
+    waited_seconds: float = 0.0  # time spent waiting for a token or a backoff
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+_stats = ThrottleStats()
+_stats_lock = threading.Lock()
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def rate_limit_config() -> Dict:
+    return get_config_section("airtable_rate_limit", default={}) or {}
+
+
+def get_token_bucket(base_id: Optional[str]) -> TokenBucket:
+    """
+    Returns the process-wide TokenBucket for an Airtable base. Requests with
+    no base in the URL (e.g. whoami) share one bucket.
+    """
+    key = base_id or "*"
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            cfg = rate_limit_config()
+            bucket = TokenBucket(
+                cfg.get("requests_per_second", DEFAULT_REQUESTS_PER_SECOND),
+                cfg.get("burst", DEFAULT_BURST),
+            )
+            _buckets[key] = bucket
+        return bucket
+
+
+def get_throttle_stats() -> ThrottleStats:
+    """Snapshot of the process-wide throttling counters."""
+    with _stats_lock:
+        return ThrottleStats(**_stats.to_dict())
+
+
+def record_traffic(**deltas):
+    """Adds to the process-wide ThrottleStats counters (used by every client)."""
+    with _stats_lock:
+        for name, delta in deltas.items():
+            setattr(_stats, name, getattr(_stats, name) + delta)
+
+
+def retry_delay(
+    headers,
+    attempt: int,
+    backoff_base: float,
+    backoff_max: float,
+    status: Optional[int] = None,
+    throttle_penalty: float = DEFAULT_THROTTLE_PENALTY,
+) -> float:
+    """
+    Retry-After if the server sent one. Otherwise a 429 waits out Airtable's
+    penalty window (retrying inside it only fails again), and 5xx responses
+    get full-jitter exponential backoff.
+    """
+    delay = _retry_after(headers)
+    if delay is None:
+        if status == 429:
+            delay = throttle_penalty + random.uniform(0, THROTTLE_JITTER)
+        else:
+            delay = random.uniform(0, min(backoff_max, backoff_base * 2**attempt))
+    return delay
+
+
+def _retry_after(headers) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    requests transport adapter for pyairtable's session: takes a token from
+    the target base's shared bucket before every request, and retries 429 and
+    5xx responses with full-jitter exponential backoff (or Retry-After, when
+    sent). It replaces pyairtable's own urllib3 retry, which neither shares
+    a budget across clients nor jitters.
+    """
+
+    def __init__(
+        self,
+        max_retries_on_status: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        throttle_penalty: float = DEFAULT_THROTTLE_PENALTY,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.max_retries_on_status = max_retries_on_status
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttle_penalty = throttle_penalty
+
+    def send(self, request, **kwargs):
+        match = _BASE_RE.search(request.path_url)
+        base_id = match.group(1) if match else None
+        bucket = get_token_bucket(base_id)
+
+        attempt = 0
+        while True:
+            waited = bucket.acquire()
+            record_traffic(requests=1, waited_seconds=waited)
+            response = super().send(request, **kwargs)
+            status = response.status_code
+            if status not in RETRY_STATUSES:
+                return response
+
+            attempt += 1
+            delay = retry_delay(
+                response.headers, attempt, self.backoff_base, self.backoff_max,
+                status=status, throttle_penalty=self.throttle_penalty,
+            )
+            if status == 429:
+                record_traffic(throttled=1)
+                bucket.drain(penalty=delay)
+            else:
+                record_traffic(server_errors=1)
+            if attempt > self.max_retries_on_status:
+                record_traffic(gave_up=1)
+                logger.error(
+                    f"❌ Airtable {status} on {request.method} {base_id or ''} "
+                    f"after {attempt - 1} retr{'y' if attempt == 2 else 'ies'}; giving up"
+                )
+                return response
+
+            logger.warning(
+                f"⚠️ Airtable {status} on {request.method} {base_id or ''}; "
+                f"retry {attempt}/{self.max_retries_on_status} in {delay:.1f}s"
+            )
+            record_traffic(retries=1, waited_seconds=delay)
+            response.close()
+            time.sleep(delay)
+
+
+def log_throttle_stats():
+    """Logs the throttling counters (at exit, if there was any traffic)."""
+    stats = get_throttle_stats()
+    if not stats.requests:
+        return
+    log = logger.warning if stats.throttled or stats.gave_up else logger.info
+    log(
+        f"📊 Airtable: {stats.requests} request(s), {stats.throttled} throttled (429), "
+        f"{stats.server_errors} 5xx, {stats.retries} retried, {stats.gave_up} gave up, "
+        f"{stats.waited_seconds:.1f}s spent waiting"
+    )
+
+
+atexit.register(log_throttle_stats)
+
+
+def install_rate_limiter(api):
+    """
+    Routes every request of a pyairtable Api through a RateLimitedAdapter
+    (settings from the `airtable_rate_limit:` section of config.yaml).
+    Safe to call more than once on the same Api.
+
+    Returns:
+        The same Api, for chaining.
+    """
+    session = api.session
+    if isinstance(session.get_adapter("https://"), RateLimitedAdapter):
+        return api
+    cfg = rate_limit_config()
+    adapter = RateLimitedAdapter(
+        max_retries_on_status=cfg.get("max_retries", DEFAULT_MAX_RETRIES),
+        backoff_base=cfg.get("backoff_base", DEFAULT_BACKOFF_BASE),
+        backoff_max=cfg.get("backoff_max", DEFAULT_BACKOFF_MAX),
+        throttle_penalty=cfg.get("throttle_penalty", DEFAULT_THROTTLE_PENALTY),
+        pool_maxsize=cfg.get("pool_maxsize", DEFAULT_POOL_MAXSIZE),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return api
+
+
+_apis: Dict[tuple, Api] = {}
+_apis_lock = threading.Lock()
+
+
+def airtable_endpoint_url() -> str:
+    """
+    Airtable's API root, or AIRTABLE_ENDPOINT_URL when set (e.g. the local
+    stand-in in TestScripts/fake_airtable_server.py).
+    """
+    return (os.getenv("AIRTABLE_ENDPOINT_URL") or DEFAULT_ENDPOINT_URL).rstrip("/")
+
+
+def get_airtable_api(api_key: str) -> Api:
+    """
+    Returns the process-wide pyairtable Api for an API key, rate limited and
+    with a pooled keep-alive session, so every client reuses warm TLS
+    connections instead of handshaking per Api instance.
+    """
+    endpoint_url = airtable_endpoint_url()
+    with _apis_lock:
+        api = _apis.get((api_key, endpoint_url))
+        if api is None:
+            api = install_rate_limiter(Api(api_key, endpoint_url=endpoint_url))
+            _apis[(api_key, endpoint_url)] = api
+        return api
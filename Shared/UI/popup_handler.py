@@ -1,10 +1,10 @@
-# Shared/popup_handler.py
+# Shared/UI/popup_handler.py
 
 import json
 import os
 import threading
 import time
-from typing import Optional  # Added for type hinting
+from typing import Optional, Tuple  # Added for type hinting
 
 # Imports needed for the merged OCR methods
 import cv2
@@ -12,8 +12,20 @@ import pytesseract
 import uiautomator2 as u2
 from PIL import Image
 
-from .config_loader import get_popup_config
-from .logger_config import setup_logger
+from Shared.config_loader import get_popup_config
+from Shared.UI.popup_watcher import (
+    PopupWatcherEngine,
+    compile_popup_rules,
+    get_popup_rules,
+)
+from Shared.UI.selector_chain import SelectorChain, get_selector_context
+from Shared.UI.ui_snapshot import (
+    get_hierarchy_cache,
+    get_keyword_matcher,
+    invalidate_hierarchy,
+)
+from Shared.Utils.device_profile import get_device_profile
+from Shared.Utils.logger_config import setup_logger
 
 # Removed: from .ui_helper import UIHelper
 
@@ -24,7 +36,7 @@ logger = setup_logger(
 
 class PopupHandler:
     """
-    Handles detection and dismissal of various popups using uiautomator2 watchers.
+    Handles detection and dismissal of various popups using a snapshot-based watcher engine.
     Also includes OCR capabilities for specific popup types (e.g., cookies).
     """
 
@@ -34,8 +46,8 @@ class PopupHandler:
 
         Args:
             driver (u2.Device): The uiautomator2 device instance.
-            config_path (Optional[str]): Path to the popup configuration JSON file.
-                                         Defaults to 'popup_config.json' in the same directory.
+            config_path (Optional[str]): Path to a popup configuration JSON file.
+                                         Defaults to the `popups:` section of config.yaml.
         """
         self.d = driver
         # Removed: self.helper = helper or UIHelper(driver)
@@ -51,12 +63,15 @@ class PopupHandler:
         self._suspension_handled = False  # Flag to prevent multiple handling runs
 
         # Load the config for popups/watchers from the config file.
-        self.config = get_popup_config()
-        # --- End context attributes ---
-
+        # config.yaml rules are compiled once per process; a JSON override is compiled here.
         if config_path is None:
-            config_path = os.path.join(os.path.dirname(__file__), "popup_config.json")
-        self.config = self._load_config(config_path)
+            self.config = get_popup_config()
+            self.rules = get_popup_rules()
+        else:
+            self.config = self._load_config(config_path)
+            self.rules = compile_popup_rules(self.config)
+        self.watcher_engine: Optional[PopupWatcherEngine] = None
+        # --- End context attributes ---
 
     def set_context(
         self,
@@ -205,151 +220,66 @@ class PopupHandler:
 
     def register_watchers(self):
         """
-        Register background popup watchers based SOLELY on the loaded configuration.
-        The configuration should be a list of dictionaries, each defining a watcher.
+        Prepare the watcher engine from the precompiled popup rules. Callback
+        names are resolved against this instance first, then module globals.
         """
         self.logger.info("Registering popup watchers from configuration...")
-        w = self.d.watcher
-        w.reset()  # Clear any existing watchers first
-
-        if not isinstance(self.config, list):
-            self.logger.error("Popup config is not a list. Cannot register watchers.")
-            return
+        if self.watcher_engine is not None and self.watcher_engine.running:
+            self.watcher_engine.stop()
 
+        callbacks = {}
         registered_count = 0
-        for entry in self.config:
-            name = entry.get("name")
-            text_xpath = entry.get("text_xpath")  # Condition to trigger the watcher
-            button_xpath = entry.get("button_xpath")  # Optional: Button to click
-            callback_name = entry.get(
-                "callback"
-            )  # Optional: Method/function name to call
-
-            # Basic validation
-            if not name or not text_xpath:
-                self.logger.warning(
-                    f"Skipping invalid config entry (missing name or text_xpath): {entry}"
-                )
-                continue
-
-            # Action validation: Must have either a button or a callback
-            if not button_xpath and not callback_name:
-                self.logger.warning(
-                    f"Watcher '{name}' has neither 'button_xpath' nor 'callback' defined. Skipping action."
-                )
-                continue
-            if button_xpath and callback_name:
-                self.logger.warning(
-                    f"Watcher '{name}' has both 'button_xpath' and 'callback' defined. Prioritizing callback."
-                )
-                button_xpath = None  # Prioritize callback if both are present
-
-            try:
-                # Start defining the watcher with its trigger condition
-                watcher_instance = w(name).when(text_xpath)
-
-                # Add the action (callback or click)
-                if callback_name:
-                    # Try to find the callback method on this instance first
-                    callback_method = getattr(self, callback_name, None)
-                    if callable(callback_method):
-                        self.logger.debug(
-                            f"Registering watcher '{name}': WHEN '{text_xpath}' CALL self.'{callback_name}'"
-                        )
-                        watcher_instance.call(callback_method)
-                        registered_count += 1
-                    else:
-                        # If not on instance, check if it's a globally defined function
-                        # Note: This requires the callback function (like photo_removed_callback)
-                        # to be imported or defined in the scope where PopupHandler is used.
-                        # It's generally safer to make callbacks instance methods if they need 'self'.
-                        global_callback = globals().get(callback_name)
-                        if callable(global_callback):
-                            self.logger.debug(
-                                f"Registering watcher '{name}': WHEN '{text_xpath}' CALL global '{callback_name}'"
-                            )
-                            # Need to handle potential arguments d, sel passed by watcher
-                            watcher_instance.call(
-                                lambda d, sel: global_callback(d, sel)
-                            )
-                            registered_count += 1
-                        else:
-                            self.logger.error(
-                                f"Callback '{callback_name}' not found for watcher '{name}'. Watcher action skipped."
-                            )
-
-                elif button_xpath:
+        for rule in self.rules:
+            if rule.callback:
+                # Try to find the callback method on this instance first
+                callback_method = getattr(self, rule.callback, None)
+                if not callable(callback_method):
+                    # If not on instance, check if it's a globally defined function
+                    callback_method = globals().get(rule.callback)
+                if callable(callback_method):
                     self.logger.debug(
-                        f"Registering watcher '{name}': WHEN '{text_xpath}' CLICK '{button_xpath}'"
+                        f"Registering watcher '{rule.name}': WHEN '{rule.text_xpath}' CALL '{rule.callback}'"
                     )
-                    watcher_instance.click(button_xpath)
+                    callbacks[rule.callback] = callback_method
                     registered_count += 1
-
-            except Exception as e:
-                self.logger.error(
-                    f"Error registering watcher '{name}': {e}", exc_info=True
+                else:
+                    self.logger.error(
+                        f"Callback '{rule.callback}' not found for watcher '{rule.name}'. Watcher action skipped."
+                    )
+            else:
+                self.logger.debug(
+                    f"Registering watcher '{rule.name}': WHEN '{rule.text_xpath}' CLICK '{rule.button_xpath}'"
                 )
+                registered_count += 1
 
+        self.watcher_engine = PopupWatcherEngine(self.d, self.rules, callbacks)
         self.logger.info(
             f"✅ {registered_count} popup watchers registered from configuration."
         )
-        # Note: Watchers are registered but not started here. Use start_watcher_loop() or d.watcher.start() externally.
+        # Note: Watchers are registered but not started here. Use start_watcher_loop() or run_watchers_once().
+
+    def run_watchers_once(self) -> Optional[str]:
+        """Runs a single watcher tick. Returns the name of the popup handled, if any."""
+        if self.watcher_engine is None:
+            self.register_watchers()
+        return self.watcher_engine.run_once()
 
     def start_watcher_loop(self, interval: float = 0.5):
         """
         Continuously run watcher checks in a background thread.
-        NOTE: Ensure device.watcher.stop() is called to terminate this thread.
+        NOTE: Call stop_watcher_loop() to terminate this thread.
         """
-        # Check if loop is already running
-        if (
-            hasattr(self, "_watcher_thread")
-            and self._watcher_thread is not None
-            and self._watcher_thread.is_alive()
-        ):
-            self.logger.info("Watcher loop already running.")
-            return
-
-        self._watcher_stop_event = threading.Event()  # Event to signal loop termination
-
-        def loop():
-            self.logger.info("📡 Watcher loop thread started.")
-            while not self._watcher_stop_event.is_set():
-                try:
-                    # Run registered watchers
-                    self.d.watcher.run()
-                except Exception as e:
-                    # Catch errors during watcher run (e.g., device disconnected)
-                    self.logger.error(f"💥 Watcher run error: {e}", exc_info=False)
-                    # Optional: Stop the loop on certain errors?
-                    # self._watcher_stop_event.set()
-                # Wait before next check, respecting the stop event
-                self._watcher_stop_event.wait(timeout=interval)
-            self.logger.info("📡 Watcher loop thread stopped.")
-
-        # Start the loop in a daemon thread
-        self._watcher_thread = threading.Thread(target=loop, daemon=True)
-        self._watcher_thread.start()
+        if self.watcher_engine is None:
+            self.register_watchers()
+        self.watcher_engine.start(interval=interval)
 
     def stop_watcher_loop(self):
         """Signals the background watcher loop thread to stop."""
-        if hasattr(self, "_watcher_stop_event"):
+        if self.watcher_engine is not None and self.watcher_engine.running:
             self.logger.info("🛑 Signaling watcher loop to stop...")
-            self._watcher_stop_event.set()
-            # Optional: Wait for thread to finish
-            if hasattr(self, "_watcher_thread") and self._watcher_thread is not None:
-                self._watcher_thread.join(timeout=2.0)  # Wait briefly
-                if self._watcher_thread.is_alive():
-                    self.logger.warning("Watcher loop thread did not stop cleanly.")
-                self._watcher_thread = None  # Clear reference
+            self.watcher_engine.stop()
         else:
             self.logger.info("Watcher loop was not running or already stopped.")
-        # Also stop the underlying uiautomator2 watcher service
-        try:
-            self.d.watcher.stop()
-            self.d.watcher.remove()  # Remove registered watchers
-            self.logger.info("🛑 Underlying uiautomator2 watcher stopped and removed.")
-        except Exception as e:
-            self.logger.error(f"Error stopping/removing uiautomator2 watcher: {e}")
 
     # --- Manual Popup Handling ---
 
@@ -391,28 +321,29 @@ class PopupHandler:
                 )
                 return False  # Cannot determine if popup exists
 
-            # Check if any keywords are present
-            if not any(keyword in screen_text for keyword in keywords):
+            # Check if any keywords are present (one pass over the OCR text)
+            if not get_keyword_matcher(tuple(keywords)).found_in(screen_text):
                 self.logger.info("✅ No cookie popup keywords detected via OCR.")
                 return False  # Indicate no popup was handled
 
             self.logger.info("⚠️ Cookie popup detected via OCR keywords.")
 
-            # Attempt to click known dismiss buttons by text
-            for text in click_texts:
-                # Use case-insensitive text search if possible with uiautomator2 selectors
-                # Example using XPath translate() for case-insensitivity:
-                btn_xpath = f"//android.widget.Button[contains(translate(@text, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{text.lower()}')]"
-                # Or simpler contains: btn_xpath = f"//android.widget.Button[contains(@text, '{text}')]"
-                btn = self.d.xpath(btn_xpath)
-                if btn.exists:
-                    self.logger.info(
-                        f"Found potential dismiss button with text similar to '{text}'. Clicking..."
-                    )
-                    if btn.click_exists(timeout=2):
-                        self.logger.info(f"✅ Clicked cookie dismiss button: '{text}'")
-                        time.sleep(2)  # Wait for popup to disappear
-                        return True  # Handled
+            # Attempt to click known dismiss buttons by text: one keyword-index
+            # lookup over the snapshot, preferring earlier entries in click_texts
+            matches = get_hierarchy_cache(self.d).refresh().text_index.search(
+                click_texts, tag="android.widget.Button"
+            )
+            priority = [t.lower() for t in click_texts]
+            if matches:
+                btn, text = min(matches, key=lambda m: priority.index(m[1]))
+                self.logger.info(
+                    f"Found potential dismiss button with text similar to '{text}'. Clicking..."
+                )
+                self.d.click(*btn.center())
+                invalidate_hierarchy(self.d)
+                self.logger.info(f"✅ Clicked cookie dismiss button: '{text}'")
+                time.sleep(2)  # Wait for popup to disappear
+                return True  # Handled
 
             # If text buttons fail, try fallback coordinates (less reliable)
             self.logger.warning(
@@ -421,45 +352,40 @@ class PopupHandler:
             webview = self.d(
                 className="android.webkit.WebView"
             )  # Check if it's a webview popup
-            bounds = (
-                webview.info.get("bounds") if webview.exists else self.d.info
-            )  # Use screen bounds if no webview
-            if bounds:
-                # Calculate potential button locations (heuristic)
-                width = bounds.get("right", self.d.info["displayWidth"]) - bounds.get(
-                    "left", 0
-                )
-                height = bounds.get(
-                    "bottom", self.d.info["displayHeight"]
-                ) - bounds.get("top", 0)
-                left = bounds.get("left", 0)
-                bottom = bounds.get("bottom", self.d.info["displayHeight"])
-
-                fallback_coords = [
-                    (
-                        left + int(width * 0.8),
-                        bottom - int(height * 0.1),
-                    ),  # Bottom right-ish
-                    (
-                        left + int(width * 0.5),
-                        bottom - int(height * 0.1),
-                    ),  # Bottom center
-                    (
-                        left + int(width * 0.2),
-                        bottom - int(height * 0.1),
-                    ),  # Bottom left-ish
-                ]
-                for x, y in fallback_coords:
-                    self.logger.info(f"⚙️ Clicking fallback coordinate ({x}, {y})")
-                    self.d.click(x, y)
-                    time.sleep(2)  # Wait to see if it worked
-                    # Re-check OCR to see if popup disappeared
-                    screen_text_after = self.perform_ocr(lang="pol+eng")
-                    if not any(keyword in screen_text_after for keyword in keywords):
-                        self.logger.info(
-                            "✅ Cookie popup likely dismissed via fallback coordinate."
-                        )
-                        return True  # Handled
+            profile = get_device_profile(self.d)
+            # Use screen bounds (cached profile) if there's no webview
+            bounds = (webview.info.get("bounds") if webview.exists else None) or {}
+            # Calculate potential button locations (heuristic)
+            width = bounds.get("right", profile.width) - bounds.get("left", 0)
+            height = bounds.get("bottom", profile.height) - bounds.get("top", 0)
+            left = bounds.get("left", 0)
+            bottom = bounds.get("bottom", profile.height)
+
+            fallback_coords = [
+                (
+                    left + int(width * 0.8),
+                    bottom - int(height * 0.1),
+                ),  # Bottom right-ish
+                (
+                    left + int(width * 0.5),
+                    bottom - int(height * 0.1),
+                ),  # Bottom center
+                (
+                    left + int(width * 0.2),
+                    bottom - int(height * 0.1),
+                ),  # Bottom left-ish
+            ]
+            for x, y in fallback_coords:
+                self.logger.info(f"⚙️ Clicking fallback coordinate ({x}, {y})")
+                self.d.click(x, y)
+                time.sleep(2)  # Wait to see if it worked
+                # Re-check OCR to see if popup disappeared
+                screen_text_after = self.perform_ocr(lang="pol+eng")
+                if not get_keyword_matcher(tuple(keywords)).found_in(screen_text_after):
+                    self.logger.info(
+                        "✅ Cookie popup likely dismissed via fallback coordinate."
+                    )
+                    return True  # Handled
 
             self.logger.error(
                 "❌ Failed to dismiss cookie popup using text or fallbacks."
@@ -575,18 +501,17 @@ class PopupHandler:
             self.logger.info(
                 f"Updating Airtable record {self.record_id} status to 'Banned'."
             )
-            # Re-assign base/table IDs if client is shared and might change context
-            if self.base_id:
-                self.airtable_client.base_id = self.base_id
-            if self.table_id:
-                self.airtable_client.table_id = self.table_id
-            success = self.airtable_client.update_record_fields(
-                self.record_id, {"Status": "Banned"}
+            # Queue with explicit base/table IDs; the client may be shared across contexts
+            success = self.airtable_client.enqueue_record_update(
+                self.record_id,
+                {"Status": "Banned"},
+                base_id=self.base_id,
+                table_id=self.table_id,
             )
             if success:
-                self.logger.info("✅ Updated Airtable: Status = 'Banned'")
+                self.logger.info("✅ Queued Airtable update: Status = 'Banned'")
             else:
-                self.logger.error("❌ Failed to update Airtable status to 'Banned'.")
+                self.logger.error("❌ Failed to queue Airtable status 'Banned'.")
 
             # Stop the suspended app instance
             if self.package_name:
@@ -626,25 +551,30 @@ def photo_removed_callback(d, sel):
     except Exception as e:
         logger.error(f"Error retrieving element info in callback: {e}")
 
-    # Try to click "Cancel" using different strategies
+    # Try to click "Cancel": all strategies are checked in one snapshot, the
+    # one that worked last time on this device/app version first
     # TODO: Refactor XPaths
-    cancel_xpath_1 = "^@Cancel"  # uiautomator2 shorthand for content-desc
-    cancel_xpath_2 = '//android.widget.Button[@content-desc="Cancel"]'
-    cancel_xpath_3 = '//android.widget.Button[@text="Cancel"]'  # Added text check
-
-    for i, xpath in enumerate([cancel_xpath_1, cancel_xpath_2, cancel_xpath_3]):
-        logger.debug(f"Trying Cancel strategy {i+1}: {xpath}")
-        cancel_button = d.xpath(xpath)
-        if cancel_button.exists:
-            if cancel_button.click_exists(timeout=2):
-                logger.info(f"✅ Clicked Cancel button using strategy {i+1}.")
-                return  # Success
-            else:
-                logger.warning(
-                    f"Found Cancel button with strategy {i+1}, but click failed."
-                )
-        else:
-            logger.debug(f"Cancel button not found with strategy {i+1}.")
+    try:
+        package = sel.info.get("packageName") or ""
+    except Exception:
+        package = ""
+    cancel_chain = SelectorChain(
+        "photo_removed_cancel",
+        {
+            "shorthand": "^@Cancel",  # uiautomator2 shorthand for content-desc
+            "content_desc": '//android.widget.Button[@content-desc="Cancel"]',
+            "text": '//android.widget.Button[@text="Cancel"]',  # Added text check
+        },
+    )
+    match = cancel_chain.match(
+        get_hierarchy_cache(d).refresh(), get_selector_context(d, package)
+    )
+    if match:
+        label, node = match
+        d.click(*node.center())
+        invalidate_hierarchy(d)
+        logger.info(f"✅ Clicked Cancel button using '{label}' strategy.")
+        return  # Success
 
     logger.error("❌ Failed to find or click Cancel button on 'Photo removed' popup.")
 
@@ -654,7 +584,7 @@ if __name__ == "__main__":
     import logging
 
     # Assuming AirtableClient is importable
-    from Shared.airtable_manager import AirtableClient
+    from Shared.Data.airtable_manager import AirtableClient
 
     # Setup logger for testing
     test_logger = logging.getLogger("TestPopupHandler")
@@ -711,8 +641,11 @@ if __name__ == "__main__":
         # Monitor watcher activity (doesn't use the background loop for this test)
         start_watch_time = time.time()
         while time.time() - start_watch_time < 60:
-            d.watcher.run()
+            popup_handler.run_watchers_once()
             time.sleep(0.5)
+        test_logger.info(
+            f"⏱️ Watcher timing: {popup_handler.watcher_engine.stats.summary()}"
+        )
 
         test_logger.info("🛑 Done watching — check logs for any triggered watchers.")
 
@@ -727,9 +660,8 @@ if __name__ == "__main__":
         # test_logger.info(f"Cookie handler result: {was_handled}")
 
         # Stop watchers explicitly
-        d.watcher.stop()
-        d.watcher.remove()
-        test_logger.info("Watchers stopped and removed.")
+        popup_handler.stop_watcher_loop()
+        test_logger.info("Watchers stopped.")
 
     except ConnectionError as e:
         test_logger.error(f"💥 Test failed - Connection Error: {e}")
@@ -0,0 +1,259 @@
+# Shared/UI/popup_watcher.py
+
+import inspect
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from lxml import etree
+
+from Shared.config_loader import get_popup_config
+from Shared.UI.ui_snapshot import (
+    SnapshotNode,
+    UISnapshot,
+    compile_xpath,
+    get_hierarchy_cache,
+)
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="PopupWatcher")
+
+# Log a timing summary every N ticks while the loop is running
+STATS_LOG_EVERY = 120
+
+
+@dataclass(frozen=True)
+class PopupRule:
+    """A popup watcher rule from the `popups:` config, with its selectors precompiled."""
+
+    name: str
+    text_xpath: str
+    text_selector: etree.XPath
+    button_xpath: Optional[str] = None
+    button_selector: Optional[etree.XPath] = None
+    callback: Optional[str] = None
+
+
+def compile_popup_rules(entries: List[Dict[str, Any]]) -> List[PopupRule]:
+    """
+    Validates popup config entries and compiles their selectors once.
+
+    Entries follow the same rules the uiautomator2 watcher registration used:
+    a rule needs `name` and `text_xpath`, plus either `button_xpath` or
+    `callback` (the callback wins if both are set).
+
+    Args:
+        entries (List[Dict[str, Any]]): The list under `popups:` in config.yaml.
+
+    Returns:
+        List[PopupRule]: The valid, compiled rules in config order.
+    """
+    rules: List[PopupRule] = []
+    if not isinstance(entries, list):
+        logger.error("Popup config is not a list. No watcher rules compiled.")
+        return rules
+
+    for entry in entries:
+        name = entry.get("name")
+        text_xpath = entry.get("text_xpath")
+        button_xpath = entry.get("button_xpath")
+        callback_name = entry.get("callback")
+
+        if not name or not text_xpath:
+            logger.warning(
+                f"Skipping invalid config entry (missing name or text_xpath): {entry}"
+            )
+            continue
+        if not button_xpath and not callback_name:
+            logger.warning(
+                f"Watcher '{name}' has neither 'button_xpath' nor 'callback' defined. Skipping action."
+            )
+            continue
+        if button_xpath and callback_name:
+            logger.warning(
+                f"Watcher '{name}' has both 'button_xpath' and 'callback' defined. Prioritizing callback."
+            )
+            button_xpath = None
+
+        try:
+            rules.append(
+                PopupRule(
+                    name=name,
+                    text_xpath=text_xpath,
+                    text_selector=compile_xpath(text_xpath),
+                    button_xpath=button_xpath,
+                    button_selector=(
+                        compile_xpath(button_xpath) if button_xpath else None
+                    ),
+                    callback=callback_name,
+                )
+            )
+        except etree.XPathError as e:
+            logger.error(f"Invalid selector in watcher '{name}': {e}")
+
+    logger.debug(f"Compiled {len(rules)} popup watcher rules.")
+    return rules
+
+
+_compiled_rules: Optional[List[PopupRule]] = None
+
+
+def get_popup_rules() -> List[PopupRule]:
+    """Returns the popup rules from config.yaml, compiled once per process."""
+    global _compiled_rules
+    if _compiled_rules is None:
+        _compiled_rules = compile_popup_rules(get_popup_config())
+    return _compiled_rules
+
+
+def _inject_call(fn: Callable, **available):
+    """
+    Calls `fn` with whichever of the available keyword arguments it accepts,
+    the same way uiautomator2's watcher injects `d` / `el` into callbacks.
+    """
+    params = inspect.signature(fn).parameters
+    kwargs = {name: value for name, value in available.items() if name in params}
+    return fn(**kwargs)
+
+
+@dataclass
+class WatcherStats:
+    """Per-tick timing for the watcher loop."""
+
+    ticks: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    triggers: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, elapsed_ms: float):
+        self.ticks += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.ticks if self.ticks else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.ticks} ticks, avg {self.avg_ms:.1f}ms, max {self.max_ms:.1f}ms, "
+            f"last {self.last_ms:.1f}ms, triggers {self.triggers or '{}'}"
+        )
+
+
+class PopupWatcherEngine:
+    """
+    Replacement for uiautomator2's `d.watcher.run()`. Each tick takes one
+    hierarchy snapshot (shared with the rest of the bot through the
+    HierarchyCache) and tests every rule against it, instead of issuing one
+    selector query per rule.
+    """
+
+    def __init__(
+        self,
+        device,
+        rules: List[PopupRule],
+        callbacks: Optional[Dict[str, Callable]] = None,
+    ):
+        """
+        Args:
+            device: The uiautomator2 device instance.
+            rules (List[PopupRule]): Compiled rules, checked in order each tick.
+            callbacks (Optional[Dict[str, Callable]]): Resolved callables for rules
+                that use `callback`. Callbacks may accept `d`, `el`, `sel` or
+                `selector`; the matched node is passed for the latter three.
+        """
+        self.d = device
+        self.rules = rules
+        self.callbacks = callbacks or {}
+        self.snapshots = get_hierarchy_cache(device)
+        self.stats = WatcherStats()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def run_once(self, snapshot: Optional[UISnapshot] = None) -> Optional[str]:
+        """
+        Evaluates every rule against a single snapshot and fires the first match.
+
+        Args:
+            snapshot (Optional[UISnapshot]): Snapshot to test; taken from the
+                                             shared cache if not given.
+
+        Returns:
+            Optional[str]: Name of the rule that fired, or None.
+        """
+        started = time.perf_counter()
+        fired = None
+        try:
+            snapshot = snapshot or self.snapshots.get()
+            for rule in self.rules:
+                matched = snapshot.first(rule.text_selector)
+                if matched is None:
+                    continue
+                if self._fire(rule, snapshot, matched):
+                    fired = rule.name
+                    # The screen changed; remaining rules need a fresh snapshot
+                    break
+        finally:
+            self.stats.record((time.perf_counter() - started) * 1000)
+        return fired
+
+    def _fire(self, rule: PopupRule, snapshot: UISnapshot, matched: SnapshotNode) -> bool:
+        if rule.callback:
+            callback = self.callbacks.get(rule.callback)
+            if callback is None:
+                return False
+            logger.info(f"🔔 Watcher '{rule.name}' triggered → {rule.callback}")
+            _inject_call(callback, d=self.d, el=matched, sel=matched, selector=matched)
+        else:
+            button = snapshot.first(rule.button_selector)
+            if button is None:
+                logger.debug(
+                    f"Watcher '{rule.name}' matched but button not on screen: {rule.button_xpath}"
+                )
+                return False
+            logger.info(f"🔔 Watcher '{rule.name}' triggered → click {rule.button_xpath}")
+            self.d.click(*button.center())
+        self.snapshots.invalidate()
+        self.stats.triggers[rule.name] = self.stats.triggers.get(rule.name, 0) + 1
+        return True
+
+    def start(self, interval: float = 0.5):
+        """Runs run_once() every `interval` seconds in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            logger.info("Watcher loop already running.")
+            return
+        self._stop_event.clear()
+
+        def loop():
+            logger.info(f"📡 Watcher loop thread started ({len(self.rules)} rules).")
+            while not self._stop_event.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    # Catch errors during watcher run (e.g., device disconnected)
+                    logger.error(f"💥 Watcher run error: {e}", exc_info=False)
+                if self.stats.ticks and self.stats.ticks % STATS_LOG_EVERY == 0:
+                    logger.info(f"⏱️ Watcher tick timing: {self.stats.summary()}")
+                self._stop_event.wait(timeout=interval)
+            logger.info("📡 Watcher loop thread stopped.")
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Signals the loop to stop and logs the final tick timing."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning("Watcher loop thread did not stop cleanly.")
+            self._thread = None
+        logger.info(f"⏱️ Watcher tick timing: {self.stats.summary()}")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
@@ -0,0 +1,172 @@
+# Shared/UI/selector_chain.py
+
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from Shared.config_loader import get_cache_dir, get_config_section
+from Shared.UI.ui_snapshot import SnapshotNode, UISnapshot
+from Shared.Utils.adb_executor import get_adb_executor
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="SelectorChain")
+
+# An alternative is an XPath (u2 shorthands ok) or a function of the snapshot
+Alternative = Union[str, Callable[[UISnapshot], Optional[SnapshotNode]]]
+
+_VERSION_RE = re.compile(r"versionName=(\S+)")
+
+
+class SelectorPreferences:
+    """
+    Remembers which alternative of each SelectorChain matched last, per
+    "<serial>|<package>|<versionName>" context, in a small JSON file. Clones
+    and app versions differ in which selector works, so the winner is tried
+    first on the next run instead of waiting out the primary's timeout.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, str]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable selector preferences {self.path}: {e}")
+            return {}
+
+    def preferred(self, context: str, chain_name: str) -> Optional[str]:
+        return self._data.get(context, {}).get(chain_name)
+
+    def record(self, context: str, chain_name: str, label: str):
+        """Stores `label` as the winner; the file is only rewritten on change."""
+        with self._lock:
+            if self._data.get(context, {}).get(chain_name) == label:
+                return
+            # Merge with the file so other processes' entries aren't dropped
+            data = self._load()
+            data.update(self._data)
+            data.setdefault(context, {})[chain_name] = label
+            self._data = data
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not save selector preferences: {e}")
+                return
+        logger.debug(f"📌 [{context}] '{chain_name}' now prefers '{label}'")
+
+
+_preferences: Optional[SelectorPreferences] = None
+_preferences_lock = threading.Lock()
+
+
+def get_selector_preferences() -> SelectorPreferences:
+    """
+    Returns the process-wide SelectorPreferences, stored in paths.cache_dir
+    (file name from the `selector_chains:` section of config.yaml).
+    """
+    global _preferences
+    with _preferences_lock:
+        if _preferences is None:
+            cfg = get_config_section("selector_chains", default={}) or {}
+            path = os.path.join(
+                get_cache_dir(), cfg.get("preferences_file", "selector_preferences.json")
+            )
+            _preferences = SelectorPreferences(path)
+        return _preferences
+
+
+_contexts: Dict[Tuple[str, str], str] = {}
+_contexts_lock = threading.Lock()
+
+
+def get_selector_context(device, package: str) -> str:
+    """
+    "<serial>|<package>|<versionName>" for the installed app, read once per
+    device and package. The version is "unknown" if dumpsys doesn't report it.
+    """
+    serial = getattr(device, "serial", None) or "unknown"
+    key = (serial, package)
+    with _contexts_lock:
+        context = _contexts.get(key)
+    if context is not None:
+        return context
+
+    version = "unknown"
+    try:
+        result = get_adb_executor(serial).shell(
+            f"dumpsys package {package} | grep versionName", timeout=10
+        )
+        match = _VERSION_RE.search(result.stdout or "")
+        if match:
+            version = match.group(1)
+    except Exception as e:
+        logger.debug(f"Could not read versionName of {package} on {serial}: {e}")
+
+    context = f"{serial}|{package}|{version}"
+    with _contexts_lock:
+        _contexts[key] = context
+    return context
+
+
+class SelectorChain:
+    """
+    Named, ordered alternatives for locating one element. match() evaluates
+    all of them against a single snapshot, starting with the alternative
+    that won last time in the same context, and records the new winner.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        alternatives: Dict[str, Alternative],
+        preferences: Optional[SelectorPreferences] = None,
+    ):
+        """
+        Args:
+            name (str): Stable key the learned preference is stored under.
+            alternatives (Dict[str, Alternative]): label -> XPath or
+                function(snapshot) -> node. Dict order is the default order.
+            preferences (Optional[SelectorPreferences]): Defaults to the
+                process-wide store.
+        """
+        self.name = name
+        self.alternatives = dict(alternatives)
+        self.preferences = preferences or get_selector_preferences()
+
+    def ordered(self, context: str) -> Dict[str, Alternative]:
+        """Alternatives with the learned winner for `context` first."""
+        winner = self.preferences.preferred(context, self.name)
+        if winner not in self.alternatives:
+            return self.alternatives
+        ordered = {winner: self.alternatives[winner]}
+        ordered.update(self.alternatives)
+        return ordered
+
+    def match(
+        self, snapshot: UISnapshot, context: str
+    ) -> Optional[Tuple[str, SnapshotNode]]:
+        """
+        Returns (label, node) for the first alternative (in learned order)
+        that matches `snapshot`, or None. A match is recorded as the winner.
+        """
+        for label, alternative in self.ordered(context).items():
+            if callable(alternative):
+                node = alternative(snapshot)
+            else:
+                node = snapshot.first(alternative)
+            if node is not None:
+                self.preferences.record(context, self.name, label)
+                return label, node
+        return None
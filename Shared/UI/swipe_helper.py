@@ -3,12 +3,42 @@ import math
 import random
 import time
 
+from Shared.UI.ui_snapshot import invalidate_hierarchy
+from Shared.Utils.device_profile import get_device_profile
+
 logger = logging.getLogger("Scroller")
 
+# uiautomator plays swipePoints in 5ms steps; shorter segments round to zero
+MIN_SEGMENT_S = 0.005
+# JSON-RPC "method not found": the server refused swipePoints before touching the screen
+RPC_METHOD_NOT_FOUND = "-32601"
+
+
+def _rejected_before_touch(error: Exception) -> bool:
+    """
+    True if swipe_points failed without injecting anything (unsupported by
+    the device or driver). Any other failure may have happened mid-gesture.
+    """
+    if isinstance(error, (AttributeError, NotImplementedError)):
+        return True
+    return RPC_METHOD_NOT_FOUND in str(error)
+
 
 class SwipeHelper:
-    def __init__(self, device):
+    def __init__(self, device, backend: str = "points"):
+        """
+        Args:
+            device: The uiautomator2 device instance.
+            backend (str): "points" plays the whole path on-device in one RPC;
+                           "touch" streams it with touch.down/move/up.
+        """
         self.device = device
+        self.backend = backend
+
+    @property
+    def profile(self):
+        """Cached DeviceProfile; pixel ranges below are for the 1080x2340 reference."""
+        return get_device_profile(self.device)
 
     def _curved_path(
         self, start, end, steps=20, max_arc_x=30, jitter_y=3, intensity="medium"
@@ -37,20 +67,80 @@ class SwipeHelper:
         return path
 
     def _perform_path_swipe(self, path, total_duration_ms):
-        interval = total_duration_ms / len(path)
-        for i in range(len(path) - 1):
-            x1, y1 = path[i]
-            x2, y2 = path[i + 1]
-            dur = int(interval)
-            self.device.shell(f"input swipe {x1} {y1} {x2} {y2} {dur}")
-            time.sleep(interval / 1000.0)
+        """
+        Injects the whole path as one continuous touch (one down, many moves,
+        one up), so Android sees a single gesture lasting `total_duration_ms`.
+
+        If swipe_points is unsupported, the helper switches to streaming the
+        touch for this and later swipes. If it fails after the gesture may
+        have started, the path is not replayed (that would scroll twice).
+
+        Returns:
+            bool: False if the gesture failed partway.
+        """
+        if len(path) < 2:
+            return True
+        started = time.perf_counter()
+        ok = True
+        if self.backend == "touch":
+            self._stream_touch_path(path, total_duration_ms)
+        else:
+            try:
+                self._inject_points_path(path, total_duration_ms)
+            except Exception as e:
+                if _rejected_before_touch(e):
+                    logger.warning(
+                        f"⚠️ swipe_points unsupported ({e}); streaming via touch.down/move/up"
+                    )
+                    self.backend = "touch"
+                    self._stream_touch_path(path, total_duration_ms)
+                else:
+                    logger.error(f"❌ swipe_points failed mid-gesture; not replaying it: {e}")
+                    ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.debug(
+            f"Path swipe: {len(path)} points, requested {total_duration_ms}ms, took {elapsed_ms:.0f}ms"
+        )
+        # The screen has moved; cached hierarchy snapshots are now stale
+        invalidate_hierarchy(self.device)
+        return ok
+
+    def _inject_points_path(self, path, total_duration_ms):
+        """
+        Single RPC: uiautomator's swipePoints plays the path on-device. It runs
+        each segment in 5ms steps, so the per-segment duration is what we pass.
+        """
+        segments = len(path) - 1
+        per_segment_s = max(total_duration_ms / 1000.0 / segments, MIN_SEGMENT_S)
+        self.device.swipe_points(path, duration=per_segment_s)
+
+    def _stream_touch_path(self, path, total_duration_ms):
+        """
+        Streams the path with touch.down/move/up. Each move is scheduled against
+        a perf_counter deadline; if an RPC overruns, later points are skipped
+        rather than stretching the gesture past its requested duration.
+        """
+        touch = self.device.touch
+        interval_s = total_duration_ms / 1000.0 / (len(path) - 1)
+        start = time.perf_counter()
+        touch.down(*path[0])
+        last = len(path) - 1
+        for i in range(1, last + 1):
+            deadline = start + i * interval_s
+            now = time.perf_counter()
+            if i < last and now > deadline + interval_s:
+                continue  # Behind schedule: drop this point, keep the timing
+            if deadline > now:
+                time.sleep(deadline - now)
+            touch.move(*path[i])
+        touch.up(*path[-1])
 
     def curved_swipe(self, start, end, duration=400, intensity="medium"):
         logger.info(
             f"🌀 Executing curved swipe: {start} → {end} over {duration}ms (style: {intensity})"
         )
         path = self._curved_path(start, end, steps=20, intensity=intensity)
-        self._perform_path_swipe(path, total_duration_ms=duration)
+        return self._perform_path_swipe(path, total_duration_ms=duration)
 
     def curved_tap(self, target_x, target_y, arc_radius=80, steps=10):
         """Simulate a curved tap motion ending at (target_x, target_y)."""
@@ -69,19 +159,20 @@ class SwipeHelper:
             jitter_y=2,
             intensity="gentle",
         )
-        self._perform_path_swipe(path, total_duration_ms=100 + random.randint(50, 120))
+        return self._perform_path_swipe(path, total_duration_ms=100 + random.randint(50, 120))
 
     def human_scroll_up(self):
         """Scroll up in a controlled human-like way (downward swipe)."""
-        x = random.randint(500, 580)
-        y_start = random.randint(1200, 1400)
-        y_end = random.randint(600, 800)  # Must be LESS than y_start to swipe downward
+        p = self.profile
+        x = p.sx(random.randint(500, 580))
+        y_start = p.sy(random.randint(1200, 1400))
+        y_end = p.sy(random.randint(600, 800))  # Must be LESS than y_start to swipe downward
         dur = random.randint(300, 600)
         intensity = random.choice(["gentle", "medium"])
 
         # Ensure swipe goes downward on screen
         if y_start <= y_end:
-            y_start, y_end = y_end + 200, y_end  # force downward movement
+            y_start, y_end = y_end + p.sy(200), y_end  # force downward movement
 
         self.curved_swipe(
             start=(x, y_start), end=(x, y_end), duration=dur, intensity=intensity
@@ -89,9 +180,10 @@ class SwipeHelper:
 
     def human_scroll_down(self):
         """Scroll down (reverse) in a human-like way."""
-        x = random.randint(500, 580)
-        y_start = random.randint(600, 800)
-        y_end = random.randint(1200, 1400)
+        p = self.profile
+        x = p.sx(random.randint(500, 580))
+        y_start = p.sy(random.randint(600, 800))
+        y_end = p.sy(random.randint(1200, 1400))
         dur = random.randint(300, 600)
         intensity = random.choice(["gentle", "medium", "chaotic"])
 
@@ -0,0 +1,194 @@
+# Shared/UI/ui_change_feed.py
+
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from Shared.config_loader import get_config_section
+from Shared.UI.ui_snapshot import UISnapshot, get_hierarchy_cache, invalidate_hierarchy
+from Shared.Utils.adb_executor import get_adb_executor
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="UIChangeFeed")
+
+T = TypeVar("T")
+
+# SurfaceFlinger transaction 1013 returns the number of frames composited so
+# far. It only moves when something on screen is redrawn, and reading it is a
+# tiny binder call - far cheaper than a hierarchy dump.
+FRAME_COUNTER_COMMAND = "service call SurfaceFlinger 1013"
+_PARCEL_RE = re.compile(r"Parcel\(\s*([0-9a-fA-F]{8})\s")
+
+DEFAULT_PROBE_INTERVAL = 0.05  # seconds before the first re-read; doubles up to poll_interval
+DEFAULT_MIN_INTERVAL = 0.25  # minimum seconds between selector re-evaluations
+DEFAULT_HEARTBEAT = 2.0  # re-evaluate at least this often even without a change
+
+
+class UIChangeFeed:
+    """
+    Per-device "the screen changed" signal for waits.
+
+    Instead of dumping the hierarchy every poll_interval, waits block in
+    wait_for_change() until SurfaceFlinger reports a new frame, then re-check
+    their selectors once. Static screens cost no dumps, and screens that keep
+    redrawing (reels, spinners) are re-checked no more often than the
+    caller's poll_interval, so a wait never dumps more than plain polling.
+
+    uiautomator2 already owns the device's UiAutomation connection, so a
+    second accessibility-event listener can't be attached alongside it; the
+    frame counter is the change notification we can read over plain ADB. If a
+    device doesn't allow the call, the feed falls back to timed polling.
+    """
+
+    def __init__(
+        self,
+        device,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        heartbeat: float = DEFAULT_HEARTBEAT,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            device: The uiautomator2 device instance.
+            probe_interval (float): First gap between frame-counter reads; it doubles
+                                    on every unchanged read, up to the wait's poll_interval.
+            min_interval (float): Minimum seconds between re-evaluations, so screens
+                                  that animate continuously don't dump back to back.
+            heartbeat (float): Maximum seconds between re-evaluations on a static screen.
+            enabled (bool): False forces plain timed polling.
+        """
+        self.device = device
+        self.adb = get_adb_executor(getattr(device, "serial", None))
+        self.probe_interval = probe_interval
+        self.min_interval = min_interval
+        self.heartbeat = heartbeat
+        self.supported: Optional[bool] = None if enabled else False
+        self.changes_seen = 0
+        self.wakeups = 0
+        self._lock = threading.Lock()
+
+    def token(self) -> Optional[int]:
+        """Current frame counter, or None if the device doesn't expose it."""
+        if self.supported is False:
+            return None
+        try:
+            result = self.adb.shell(FRAME_COUNTER_COMMAND, timeout=5)
+            match = _PARCEL_RE.search(result.stdout or "")
+        except Exception as e:
+            logger.debug(f"Frame counter read failed: {e}")
+            match = None
+        if match is None:
+            with self._lock:
+                if self.supported is None:
+                    self.supported = False
+                    logger.info(
+                        f"[{self.adb.serial}] SurfaceFlinger frame counter unavailable; "
+                        "waits fall back to timed polling."
+                    )
+            return None
+        self.supported = True
+        return int(match.group(1), 16)
+
+    def wait_for_change(
+        self, since: Optional[int], timeout: float, poll_interval: float = 0.5
+    ) -> Optional[int]:
+        """
+        Blocks until the screen has changed since token `since`, the heartbeat
+        elapses, or `timeout` runs out, but returns no sooner than
+        max(min_interval, poll_interval). Invalidates the device's cached
+        hierarchy when a change is seen.
+
+        Args:
+            since (Optional[int]): Token from token() taken before the last check.
+            timeout (float): Maximum seconds to block.
+            poll_interval (float): Shortest gap between re-checks, and the sleep
+                                   used when the frame counter is unavailable.
+
+        Returns:
+            Optional[int]: The token to pass to the next call.
+        """
+        if since is None or self.supported is False:
+            time.sleep(max(0.0, min(poll_interval, timeout)))
+            if not self.supported:
+                return None
+            # A read failed on a device that has the counter: try it again
+            # rather than polling blind for the rest of the wait
+            invalidate_hierarchy(self.device)
+            return self.token()
+
+        started = time.time()
+        end = started + timeout
+        # Nothing is re-checked before this, so don't read the counter before it either
+        time.sleep(max(0.0, min(max(self.min_interval, poll_interval), timeout)))
+        deadline = started + min(timeout, max(self.heartbeat, poll_interval))
+        interval = self.probe_interval
+        while True:
+            current = self.token()
+            if current is None or current != since:
+                if current is not None:
+                    self.changes_seen += 1
+                invalidate_hierarchy(self.device)
+                return current
+            if time.time() >= deadline:
+                self.wakeups += 1
+                return current
+            time.sleep(max(0.0, min(interval, end - time.time())))
+            interval = min(interval * 2, max(self.probe_interval, poll_interval))
+
+    def wait_until(
+        self,
+        check: Callable[[UISnapshot], Optional[T]],
+        timeout: float,
+        poll_interval: float = 0.5,
+    ) -> Optional[T]:
+        """
+        Evaluates check(snapshot) now and then again after every screen change
+        until it returns something truthy or `timeout` expires.
+
+        Args:
+            check (Callable[[UISnapshot], Optional[T]]): Returns a truthy result when done.
+            timeout (float): Maximum time in seconds to wait. 0 checks exactly once.
+            poll_interval (float): Shortest gap between re-checks, and the polling
+                                   interval when change events are unavailable.
+
+        Returns:
+            Optional[T]: The first truthy check result, or None on timeout.
+        """
+        snapshots = get_hierarchy_cache(self.device)
+        deadline = time.time() + timeout
+        token = self.token()
+        while True:
+            result = check(snapshots.get())
+            if result:
+                return result
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            token = self.wait_for_change(token, remaining, poll_interval=poll_interval)
+
+
+_feeds: Dict[str, UIChangeFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def get_ui_change_feed(device) -> UIChangeFeed:
+    """
+    Returns the process-wide UIChangeFeed for the device's serial, configured
+    from the `ui_change_feed:` section of config.yaml.
+    """
+    key = getattr(device, "serial", None) or f"device-{id(device)}"
+    with _feeds_lock:
+        feed = _feeds.get(key)
+        if feed is None:
+            cfg = get_config_section("ui_change_feed", default={}) or {}
+            feed = UIChangeFeed(
+                device,
+                probe_interval=cfg.get("probe_interval", DEFAULT_PROBE_INTERVAL),
+                min_interval=cfg.get("min_interval", DEFAULT_MIN_INTERVAL),
+                heartbeat=cfg.get("heartbeat", DEFAULT_HEARTBEAT),
+                enabled=cfg.get("enabled", True),
+            )
+            _feeds[key] = feed
+        return feed
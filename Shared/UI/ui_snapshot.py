@@ -0,0 +1,449 @@
+# Shared/UI/ui_snapshot.py
+
+import hashlib
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from lxml import etree
+
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="UISnapshot")
+
+# Same namespace map uiautomator2 registers, so '^regex' selectors keep working
+XPATH_NAMESPACES = {"re": "http://exslt.org/regular-expressions"}
+
+# How long (seconds) a hierarchy dump may be reused by selector queries
+DEFAULT_MAX_AGE = 0.3
+
+
+def _string_quote(s: str) -> str:
+    return "{!r}".format(s)
+
+
+def strict_xpath(xpath: str) -> str:
+    """
+    Expands the uiautomator2 selector shorthands ('^regex', '%contains%', '@rid',
+    plain text) into a full XPath expression, mirroring u2's own conversion.
+    """
+    if xpath.startswith(("/", "(", ".")):
+        return xpath
+    if xpath.startswith("@"):
+        return "//*[@resource-id={}]".format(_string_quote(xpath[1:]))
+    if xpath.startswith("^"):
+        return "//*[re:match(@text, {0}) or re:match(@content-desc, {0}) or re:match(@resource-id, {0})]".format(
+            _string_quote(xpath)
+        )
+    if xpath.startswith("%") and xpath.endswith("%"):
+        return "//*[contains(@text, {0}) or contains(@content-desc, {0})]".format(
+            _string_quote(xpath[1:-1])
+        )
+    if xpath.startswith("%"):  # ends-with
+        text = xpath[1:]
+        return "//*[{0} = substring(@text, string-length(@text) - {1} + 1) or {0} = substring(@content-desc, string-length(@content-desc) - {1} + 1)]".format(
+            _string_quote(text), len(text)
+        )
+    if xpath.endswith("%"):  # starts-with
+        return "//*[starts-with(@text, {0}) or starts-with(@content-desc, {0})]".format(
+            _string_quote(xpath[:-1])
+        )
+    return "//*[@text={0} or @content-desc={0} or @resource-id={0}]".format(
+        _string_quote(xpath)
+    )
+
+
+@lru_cache(maxsize=2048)
+def compile_xpath(xpath: str) -> etree.XPath:
+    """Compiles (and caches) a selector so repeated queries skip XPath parsing."""
+    return etree.XPath(strict_xpath(xpath), namespaces=XPATH_NAMESPACES)
+
+
+def parse_bounds(bounds: Optional[str]) -> Tuple[int, int, int, int]:
+    """Parses a hierarchy bounds string like '[0,84][1080,220]' into (lx, ly, rx, ry)."""
+    if not bounds:
+        return (0, 0, 0, 0)
+    try:
+        parts = bounds.replace("][", ",").strip("[]").split(",")
+        lx, ly, rx, ry = (int(p) for p in parts)
+        return (lx, ly, rx, ry)
+    except ValueError:
+        return (0, 0, 0, 0)
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    One value to read from a snapshot: the first node matching `xpath`, and
+    which of its values to return. `attribute` is "text", a u2 info key
+    ("contentDescription", "resourceId", ...), a raw hierarchy attribute
+    ("content-desc", "bounds", ...), or "exists" for a bool presence check.
+    """
+
+    xpath: str
+    attribute: str = "text"
+
+
+class SnapshotNode:
+    """
+    A single element from a UISnapshot. Exposes the same read-only surface as
+    uiautomator2's XMLElement (attrib, text, bounds, center(), info) without
+    any device round-trip.
+    """
+
+    __slots__ = ("elem",)
+
+    def __init__(self, elem):
+        self.elem = elem
+
+    @property
+    def attrib(self):
+        return self.elem.attrib
+
+    @property
+    def text(self) -> str:
+        return self.elem.attrib.get("text", "")
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        return parse_bounds(self.elem.attrib.get("bounds"))
+
+    def center(self) -> Tuple[int, int]:
+        lx, ly, rx, ry = self.bounds
+        return (lx + rx) // 2, (ly + ry) // 2
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """uiautomator2-compatible info dict built from the cached attributes."""
+        attrib = self.elem.attrib
+        lx, ly, rx, ry = self.bounds
+        ret = {
+            key: attrib.get(key)
+            for key in (
+                "text",
+                "focusable",
+                "enabled",
+                "focused",
+                "scrollable",
+                "selected",
+                "clickable",
+            )
+        }
+        ret["className"] = self.elem.tag
+        ret["bounds"] = {"left": lx, "top": ly, "right": rx, "bottom": ry}
+        ret["contentDescription"] = attrib.get("content-desc")
+        ret["longClickable"] = attrib.get("long-clickable")
+        ret["packageName"] = attrib.get("package")
+        ret["resourceName"] = attrib.get("resource-id")
+        ret["resourceId"] = attrib.get("resource-id")
+        ret["childCount"] = len(self.elem)
+        return ret
+
+    def get(self, attribute: str) -> Optional[str]:
+        """Reads "text", a u2 info key or a raw hierarchy attribute."""
+        if attribute == "text":
+            return self.text
+        if attribute in self.elem.attrib:
+            return self.elem.attrib.get(attribute)
+        return self.info.get(attribute)
+
+    def xpath(self, xpath: str) -> List["SnapshotNode"]:
+        """Evaluates a (usually relative, './/...') XPath under this node."""
+        return [
+            SnapshotNode(e)
+            for e in compile_xpath(xpath)(self.elem)
+            if isinstance(e, etree._Element)
+        ]
+
+    def __repr__(self) -> str:
+        return f"<SnapshotNode {self.elem.tag} bounds={self.elem.attrib.get('bounds')}>"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a set of lower-cased keywords. One left-to-right
+    pass over a text reports every occurrence of every keyword, so the cost
+    doesn't grow with the number of keywords the way OR-ed contains() does.
+    """
+
+    __slots__ = ("keywords", "_goto", "_fail", "_out")
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(
+            dict.fromkeys(k.lower() for k in keywords if k and "\0" not in k)
+        )
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[str, ...]] = [()]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (keyword,)
+
+        # Breadth-first failure links; outputs inherit their fallback's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yields (end_index, keyword) for every occurrence in an already lower-cased text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in out[state]:
+                yield index, keyword
+
+    def found_in(self, text: str) -> bool:
+        """True if any keyword occurs in `text` (lower-cased here)."""
+        return next(self.iter_matches(text.lower()), None) is not None
+
+
+@lru_cache(maxsize=256)
+def get_keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Builds (and caches) the automaton for a keyword tuple."""
+    return KeywordMatcher(keywords)
+
+
+class TextIndex:
+    """
+    Lower-cased text and content-desc of every node in a snapshot, joined into
+    one corpus so keyword lookups are a single Aho-Corasick pass instead of an
+    XPath that runs translate() on every attribute of every node.
+    """
+
+    SEPARATOR = "\0"
+    ATTRIBUTES = ("text", "content-desc")
+
+    def __init__(self, root):
+        self._elems: List[Any] = []
+        self._starts: List[int] = []
+        self._owners: List[int] = []
+        parts: List[str] = []
+        offset = 0
+        for elem in root.iter():
+            attrib = elem.attrib
+            values = [attrib.get(a) for a in self.ATTRIBUTES]
+            values = [v.lower() for v in values if v]
+            if not values:
+                continue
+            owner = len(self._elems)
+            self._elems.append(elem)
+            for value in values:
+                self._starts.append(offset)
+                self._owners.append(owner)
+                parts.append(value)
+                offset += len(value) + 1
+        self._corpus = self.SEPARATOR.join(parts)
+
+    def __len__(self) -> int:
+        return len(self._elems)
+
+    def search(
+        self, keywords: Iterable[str], tag: str = "*"
+    ) -> List[Tuple[SnapshotNode, str]]:
+        """
+        Nodes whose text or content-desc contains any keyword (case-insensitive).
+
+        Args:
+            keywords (Iterable[str]): Substrings to look for.
+            tag (str): Element class to restrict to (e.g. 'android.widget.Button'), '*' for any.
+
+        Returns:
+            List[Tuple[SnapshotNode, str]]: (node, first keyword found in it), in document order.
+        """
+        matcher = get_keyword_matcher(tuple(keywords))
+        found: Dict[int, str] = {}
+        for end, keyword in matcher.iter_matches(self._corpus):
+            owner = self._owners[bisect_right(self._starts, end) - 1]
+            found.setdefault(owner, keyword)
+        return [
+            (SnapshotNode(self._elems[owner]), keyword)
+            for owner, keyword in sorted(found.items())
+            if tag == "*" or self._elems[owner].tag == tag
+        ]
+
+
+class UISnapshot:
+    """
+    A parsed UI hierarchy dump. Every selector query against it is evaluated
+    locally with lxml, so checking N selectors costs one dump instead of N.
+    """
+
+    def __init__(self, source: str, taken_at: Optional[float] = None):
+        self.source = source
+        self.taken_at = taken_at if taken_at is not None else time.time()
+        self.root = etree.fromstring(source.encode("utf-8"))
+        # uiautomator2 renames <node class="X"> to <X>, so selectors written
+        # for u2 (//android.widget.Button[...]) match the same elements here.
+        for node in list(self.root.iter("node")):
+            node.tag = node.attrib.pop("class", "").replace("$", "-") or "node"
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+    @cached_property
+    def digest(self) -> str:
+        """Hash of the raw dump; equal digests mean an identical screen structure."""
+        return hashlib.sha1(self.source.encode("utf-8")).hexdigest()
+
+    def find(self, xpath: Union[str, etree.XPath]) -> List[SnapshotNode]:
+        """
+        Returns all nodes matching the selector (u2 shorthands supported).
+        Accepts a precompiled etree.XPath as well as a selector string.
+        """
+        try:
+            selector = xpath if isinstance(xpath, etree.XPath) else compile_xpath(xpath)
+            result = selector(self.root)
+        except etree.XPathError as e:
+            logger.warning(f"Invalid selector '{xpath}': {e}")
+            return []
+        if not isinstance(result, list):
+            return []
+        return [SnapshotNode(e) for e in result if isinstance(e, etree._Element)]
+
+    @cached_property
+    def text_index(self) -> TextIndex:
+        """Keyword index over node text/content-desc, built on first use."""
+        return TextIndex(self.root)
+
+    def find_text(self, keywords: Iterable[str], tag: str = "*") -> List[SnapshotNode]:
+        """
+        Nodes whose text or content-desc contains any of `keywords`
+        (case-insensitive), in document order. See TextIndex.search().
+        """
+        return [node for node, _ in self.text_index.search(keywords, tag=tag)]
+
+    def first(self, xpath: Union[str, etree.XPath]) -> Optional[SnapshotNode]:
+        nodes = self.find(xpath)
+        return nodes[0] if nodes else None
+
+    def exists(self, xpath: Union[str, etree.XPath]) -> bool:
+        return bool(self.find(xpath))
+
+    def extract(self, spec: Dict[str, FieldSpec]) -> Dict[str, Any]:
+        """
+        Reads every field in `spec` from this one snapshot. Missing nodes give
+        None (or False for "exists" fields).
+        """
+        values: Dict[str, Any] = {}
+        for name, field_spec in spec.items():
+            node = self.first(field_spec.xpath)
+            if field_spec.attribute == "exists":
+                values[name] = node is not None
+            else:
+                values[name] = node.get(field_spec.attribute) if node is not None else None
+        return values
+
+    def match_any(
+        self, candidates: Dict[str, str]
+    ) -> Tuple[Optional[str], Optional[SnapshotNode]]:
+        """
+        Evaluates every candidate selector against this snapshot and returns
+        (name, node) for the first one (in dict order) that matches, or
+        (None, None) if none do.
+        """
+        for name, xpath in candidates.items():
+            node = self.first(xpath)
+            if node is not None:
+                return name, node
+        return None, None
+
+
+class HierarchyCache:
+    """
+    Per-device hierarchy snapshot cache. One dump is shared by every selector
+    query issued within `max_age` seconds; actions (click, swipe, press, text
+    input) must call invalidate() so the next query sees the new screen.
+    """
+
+    def __init__(self, device, max_age: float = DEFAULT_MAX_AGE):
+        self.device = device
+        self.max_age = max_age
+        self.dump_count = 0
+        self._snapshot: Optional[UISnapshot] = None
+        self._last: Optional[UISnapshot] = None  # survives invalidate()
+        self._lock = threading.Lock()
+
+    def get(self, max_age: Optional[float] = None) -> UISnapshot:
+        """Returns the cached snapshot if fresh enough, otherwise dumps a new one."""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age <= max_age:
+                return snapshot
+            return self._dump()
+
+    def refresh(self) -> UISnapshot:
+        """Forces a new dump regardless of the cached snapshot's age."""
+        with self._lock:
+            return self._dump()
+
+    def invalidate(self):
+        """Drops the cached snapshot; the next query will dump again."""
+        self._snapshot = None
+
+    @property
+    def last_digest(self) -> Optional[str]:
+        """Digest of the latest dump, even if invalidated since (the screen an action was sent on)."""
+        last = self._last
+        return last.digest if last is not None else None
+
+    def _dump(self) -> UISnapshot:
+        started = time.time()
+        source = self.device.dump_hierarchy()
+        self._snapshot = self._last = UISnapshot(source, taken_at=time.time())
+        self.dump_count += 1
+        logger.debug(
+            f"Hierarchy dump #{self.dump_count} took {(time.time() - started) * 1000:.0f}ms"
+        )
+        return self._snapshot
+
+
+_caches: Dict[str, HierarchyCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _device_key(device) -> str:
+    return getattr(device, "serial", None) or f"device-{id(device)}"
+
+
+def get_hierarchy_cache(device) -> HierarchyCache:
+    """Returns the process-wide HierarchyCache for the device's serial."""
+    key = _device_key(device)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = HierarchyCache(device)
+            _caches[key] = cache
+        return cache
+
+
+def invalidate_hierarchy(device):
+    """Invalidates the cached snapshot for a device after an action was sent."""
+    cache = _caches.get(_device_key(device))
+    if cache is not None:
+        cache.invalidate()
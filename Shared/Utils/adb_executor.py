@@ -0,0 +1,283 @@
+# Shared/Utils/adb_executor.py
+
+import os
+import stat
+import struct
+import subprocess
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import adbutils
+
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="AdbExecutor")
+
+DEFAULT_TIMEOUT = 30  # seconds
+DEFAULT_MAX_CONCURRENCY = 4  # parallel commands per device
+SYNC_CHUNK_SIZE = 64 * 1024  # largest DATA packet the sync protocol accepts
+
+
+class SyncPushResult(NamedTuple):
+    """Outcome of one file in AdbExecutor.push_many()."""
+
+    local_path: str
+    remote_path: str
+    size: int
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.size / (1024 * 1024) / self.seconds if self.seconds > 0 else 0.0
+
+
+class AdbExecutor:
+    """
+    Runs ADB commands for one device over the in-process ADB protocol
+    (adbutils talks to the local adb server socket directly), so no `adb`
+    process is forked per command.
+
+    Results mimic subprocess: run()/shell() return a CompletedProcess, and
+    with check=True failures raise CalledProcessError / TimeoutExpired, so
+    existing error handling keeps working.
+    """
+
+    def __init__(
+        self,
+        serial: Optional[str] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        default_timeout: float = DEFAULT_TIMEOUT,
+    ):
+        """
+        Args:
+            serial (Optional[str]): Device serial. None targets the only connected device.
+            max_concurrency (int): Maximum commands in flight for this device.
+            default_timeout (float): Timeout in seconds when a call passes none.
+        """
+        self.serial = serial
+        self.default_timeout = default_timeout
+        self.command_count = 0
+        self.total_ms = 0.0
+        self._device: Optional[adbutils.AdbDevice] = None
+        self._device_lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # counters are updated from every caller thread
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    @property
+    def device(self) -> adbutils.AdbDevice:
+        """The adbutils device handle, resolved once and reused."""
+        with self._device_lock:
+            if self._device is None:
+                self._device = adbutils.adb.device(serial=self.serial)
+                self.serial = self._device.serial
+            return self._device
+
+    def shell(
+        self,
+        command: Union[str, List[str]],
+        timeout: Optional[float] = None,
+        check: bool = False,
+    ) -> subprocess.CompletedProcess:
+        """
+        Runs a shell command on the device.
+
+        Args:
+            command (Union[str, List[str]]): Command string, or argument list joined
+                                             with spaces the way `adb shell` joins them.
+            timeout (Optional[float]): Seconds before the command is abandoned.
+            check (bool): Raise CalledProcessError on a non-zero exit code.
+
+        Returns:
+            subprocess.CompletedProcess: returncode and stdout (stderr is merged into stdout).
+        """
+        if isinstance(command, (list, tuple)):
+            command = " ".join(command)
+        timeout = self.default_timeout if timeout is None else timeout
+        args = ["adb", "-s", str(self.serial), "shell", command]
+
+        started = time.perf_counter()
+        try:
+            with self._slots:
+                ret = self.device.shell2(command, timeout=timeout, rstrip=False)
+        except adbutils.AdbTimeout as e:
+            raise subprocess.TimeoutExpired(args, timeout) from e
+        except adbutils.AdbError as e:
+            # Device offline / not found: report it the way the adb CLI would
+            if check:
+                raise subprocess.CalledProcessError(1, args, stderr=str(e)) from e
+            return subprocess.CompletedProcess(args, 1, "", str(e))
+        finally:
+            self._record(started)
+
+        result = subprocess.CompletedProcess(args, ret.returncode, ret.output, "")
+        if ret.returncode != 0:
+            # adb shell (v1) merges stderr into stdout; surface it as stderr too
+            result.stderr = ret.output
+            if check:
+                raise subprocess.CalledProcessError(
+                    ret.returncode, args, output=ret.output, stderr=ret.output
+                )
+        return result
+
+    def push(
+        self, local_path: str, remote_path: str, check: bool = False
+    ) -> subprocess.CompletedProcess:
+        """Pushes a local file to the device via the sync protocol."""
+        args = ["adb", "-s", str(self.serial), "push", local_path, remote_path]
+        started = time.perf_counter()
+        try:
+            with self._slots:
+                size = self.device.sync.push(local_path, remote_path)
+        except (adbutils.AdbError, OSError) as e:
+            if check:
+                raise subprocess.CalledProcessError(1, args, stderr=str(e)) from e
+            return subprocess.CompletedProcess(args, 1, "", str(e))
+        finally:
+            self._record(started)
+        return subprocess.CompletedProcess(
+            args, 0, f"{local_path}: 1 file pushed ({size} bytes)", ""
+        )
+
+    def push_many(
+        self, files: Sequence[Tuple[str, str]], mode: int = 0o644
+    ) -> List[SyncPushResult]:
+        """
+        Pushes several files over one sync session instead of opening a new
+        adb connection per file (what sync.push does). Remote directories must
+        already exist. If the device rejects a file, adbd ends the session, so
+        a fresh one is opened for the remaining files.
+
+        Args:
+            files (Sequence[Tuple[str, str]]): (local_path, remote_path) pairs.
+            mode (int): Permission bits for the created files.
+
+        Returns:
+            List[SyncPushResult]: One result per input pair, in order.
+        """
+        results: List[SyncPushResult] = []
+        pending = list(files)
+        started = time.perf_counter()
+        try:
+            with self._slots:
+                while pending:
+                    try:
+                        with self.device.open_transport(timeout=None) as c:
+                            c.send_command("sync:")
+                            c.check_okay()
+                            while pending:
+                                result = self._sync_send(c, *pending[0], mode)
+                                results.append(result)
+                                pending.pop(0)
+                                if not result.ok and result.size >= 0:
+                                    # adbd closed the session after FAIL
+                                    break
+                    except (adbutils.AdbError, OSError) as e:
+                        # The session itself failed; nothing left can be sent
+                        for local_path, remote_path in pending:
+                            results.append(SyncPushResult(local_path, remote_path, 0, 0.0, str(e)))
+                        pending = []
+        finally:
+            self._record(started)
+        return results
+
+    @staticmethod
+    def _sync_send(c, local_path: str, remote_path: str, mode: int) -> SyncPushResult:
+        """
+        One SEND/DATA.../DONE exchange on an open sync connection. A local
+        file that can't be opened is reported with size -1 before anything is
+        sent, so the session stays usable.
+        """
+        try:
+            src = open(local_path, "rb")
+            mtime = int(os.fstat(src.fileno()).st_mtime)
+        except OSError as e:
+            return SyncPushResult(local_path, remote_path, -1, 0.0, str(e))
+
+        started = time.perf_counter()
+        size = 0
+        with src:
+            path = f"{remote_path},{stat.S_IFREG | mode}".encode("utf-8")
+            c.conn.sendall(b"SEND" + struct.pack("<I", len(path)) + path)
+            while True:
+                chunk = src.read(SYNC_CHUNK_SIZE)
+                if not chunk:
+                    break
+                c.conn.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                size += len(chunk)
+            c.conn.sendall(b"DONE" + struct.pack("<I", mtime))
+            status = c.read_string(4)
+            length = c.read_uint32()
+        seconds = time.perf_counter() - started
+        if status == "OKAY":
+            return SyncPushResult(local_path, remote_path, size, seconds)
+        message = c.read_string(length) if length else status
+        return SyncPushResult(local_path, remote_path, size, seconds, message or status)
+
+    def pull(
+        self, remote_path: str, local_path: str, check: bool = False
+    ) -> subprocess.CompletedProcess:
+        """Pulls a file from the device via the sync protocol."""
+        args = ["adb", "-s", str(self.serial), "pull", remote_path, local_path]
+        started = time.perf_counter()
+        try:
+            with self._slots:
+                size = self.device.sync.pull(remote_path, local_path)
+        except (adbutils.AdbError, OSError) as e:
+            if check:
+                raise subprocess.CalledProcessError(1, args, stderr=str(e)) from e
+            return subprocess.CompletedProcess(args, 1, "", str(e))
+        finally:
+            self._record(started)
+        return subprocess.CompletedProcess(
+            args, 0, f"{remote_path}: 1 file pulled ({size} bytes)", ""
+        )
+
+    def run(
+        self,
+        adb_args: List[str],
+        timeout: Optional[float] = None,
+        check: bool = False,
+    ) -> subprocess.CompletedProcess:
+        """
+        Runs an `adb ...` style argument list (without the leading 'adb' / '-s').
+        Supports 'shell', 'push' and 'pull', the subcommands the bots use.
+        """
+        if not adb_args:
+            raise ValueError("Empty ADB command")
+        sub, rest = adb_args[0], list(adb_args[1:])
+        if sub == "shell":
+            return self.shell(rest, timeout=timeout, check=check)
+        if sub == "push" and len(rest) == 2:
+            return self.push(rest[0], rest[1], check=check)
+        if sub == "pull" and len(rest) == 2:
+            return self.pull(rest[0], rest[1], check=check)
+        raise ValueError(f"Unsupported ADB subcommand for executor: {adb_args}")
+
+    def _record(self, started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self.command_count += 1
+            self.total_ms += elapsed_ms
+            count = self.command_count
+        logger.debug(f"[{self.serial}] ADB command #{count} took {elapsed_ms:.0f}ms")
+
+
+_executors: Dict[str, AdbExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_adb_executor(serial: Optional[str] = None) -> AdbExecutor:
+    """Returns the process-wide AdbExecutor for a device serial (None = default device)."""
+    key = serial or "default"
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None:
+            executor = AdbExecutor(serial)
+            _executors[key] = executor
+        return executor
@@ -1,12 +1,16 @@
-# UploadBot/device_manager.py
+# Shared/Utils/device_manager.py
 
 import os
+import posixpath
 import re
+import shlex
 import subprocess
 import time
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from Shared.logger_config import setup_logger
+from Shared.Utils.adb_executor import SyncPushResult, get_adb_executor
+from Shared.Utils.logger_config import setup_logger
+from Shared.Utils.media_manifest import MediaManifest, get_media_manifest, sha256_file
 
 # Assuming uiautomator2 device object might be needed for serial, import if necessary
 # import uiautomator2 as u2
@@ -16,6 +20,14 @@ from Shared.logger_config import setup_logger
 logger_fm = setup_logger(name="DeviceFileManager")
 logger_mc = setup_logger(name="MediaCleaner")
 
+DELETE_BATCH_SIZE = 200  # paths per `rm` call, well under the shell's argument limit
+
+MEDIA_ROOT = "/sdcard/Pictures"
+# Files pushed ahead of their post wait here; .nomedia keeps them out of the
+# gallery until publish_staged() moves them into the account's album
+STAGING_DIR = "/sdcard/.igavantage_staging"
+MEDIA_SCAN_ACTION = "android.intent.action.MEDIA_SCANNER_SCAN_FILE"
+
 # --- Helper Function for ADB Commands ---
 # Moved into the class that uses it, or could be a standalone utility
 # def run_adb_command(command_list: list[str]) -> Optional[str]:
@@ -43,6 +55,7 @@ class DeviceFileManager:
         """
         self.device_serial = device_serial
         self.logger = logger_fm  # Use the specific logger
+        self.adb = get_adb_executor(device_serial)
 
     def _run_adb_command(self, command_list: list[str]) -> Optional[str]:
         """
@@ -63,10 +76,8 @@ class DeviceFileManager:
 
         self.logger.debug(f"Running ADB command: {' '.join(cmd)}")
         try:
-            # Using check=False and handling potential errors
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, check=False, timeout=30
-            )  # Added timeout
+            # Runs over the shared per-device executor (no adb fork per call)
+            result = self.adb.run(command_list[1:], timeout=30)
             if result.returncode != 0:
                 self.logger.error(
                     f"ADB command failed (code {result.returncode}): {result.stderr.strip()}"
@@ -74,11 +85,6 @@ class DeviceFileManager:
                 return None
             self.logger.debug(f"ADB command output: {result.stdout.strip()}")
             return result.stdout.strip()
-        except FileNotFoundError:
-            self.logger.error(
-                "❌ ADB command not found. Ensure ADB is installed and in your PATH."
-            )
-            return None
         except subprocess.TimeoutExpired:
             self.logger.error(f"❌ ADB command timed out: {' '.join(cmd)}")
             return None
@@ -88,69 +94,264 @@ class DeviceFileManager:
             )
             return None
 
+    @staticmethod
+    def album_name(account_name: str) -> str:
+        """Directory-safe album name for an account."""
+        return re.sub(r"[^\w\-]+", "_", account_name)
+
+    def album_path(self, account_name: str) -> str:
+        """Gallery album the account's media is published to."""
+        return f"{MEDIA_ROOT}/{self.album_name(account_name)}"
+
+    def _remote_file_name(self, local_file_path: str, account_name: str, index: int = 0) -> str:
+        ext = os.path.splitext(local_file_path)[-1]
+        suffix = f"_{index}" if index else ""
+        return f"{self.album_name(account_name)}_{int(time.time())}{suffix}{ext}"
+
     def push_media_to_device(
         self, local_file_path: str, account_name: str
     ) -> Tuple[bool, Optional[str]]:
         """
-        Pushes a local media file to a structured directory on the device via ADB
-        and triggers media scans.
+        Pushes a local media file to the account's album on the device and
+        scans just that file into the gallery.
 
         Args:
             local_file_path (str): The path to the local file to push.
             account_name (str): The username associated with the content, used for directory naming.
-            # device: The uiautomator2 device object is no longer needed here directly,
-            #         but the serial ID should be passed during __init__.
 
         Returns:
-            Tuple[bool, Optional[str]]: (Success status, Remote path on device or None).
+            Tuple[bool, Optional[str]]: (Success status, Remote path of the file on
+                device or None). This is an existing copy when the album already
+                had the same bytes.
         """
-        try:
-            if not os.path.exists(local_file_path):
-                self.logger.error(f"Local file does not exist: {local_file_path}")
-                return False, None
-
-            # --- Determine Remote Path ---
-            ext = os.path.splitext(local_file_path)[-1]
-            # Sanitize account_name for directory use if necessary (replace spaces, special chars)
-            dir_name = re.sub(r"[^\w\-]+", "_", account_name)  # Example sanitization
-            remote_file_name = f"{dir_name}_{int(time.time())}{ext}"
-            # Consider making base remote dir configurable
-            remote_dir = f"/sdcard/Pictures/{dir_name}"
-            remote_path = f"{remote_dir}/{remote_file_name}"
-            self.logger.info(f"Target remote path: {remote_path}")
-
-            # --- Create Remote Directory ---
-            self.logger.debug(f"Ensuring remote directory exists: {remote_dir}")
-            # Use _run_adb_command helper
-            mkdir_result = self._run_adb_command(
-                ["adb", "shell", "mkdir", "-p", remote_dir]
+        if not os.path.exists(local_file_path):
+            self.logger.error(f"Local file does not exist: {local_file_path}")
+            return False, None
+        remote_path = (
+            f"{self.album_path(account_name)}/"
+            f"{self._remote_file_name(local_file_path, account_name)}"
+        )
+        self.logger.info(f"Target remote path: {remote_path}")
+        results = self.push_media_batch([(local_file_path, remote_path)])
+        if not results or not results[0].ok:
+            self.logger.error(f"ADB push failed for {local_file_path}")
+            return False, None
+        # A copy already in the album is reused, so the file may have another name
+        return True, results[0].remote_path
+
+    @property
+    def manifest(self) -> MediaManifest:
+        """The device's content-addressed record of pushed media."""
+        return get_media_manifest(self.device_serial)
+
+    def push_media_batch(
+        self, files: Sequence[Tuple[str, str]], scan: bool = True
+    ) -> List[SyncPushResult]:
+        """
+        Pushes many files in one go: one `mkdir -p` for every target
+        directory, one adb sync session for all the data, and (if `scan`) one
+        shell call that scans only the new files into the MediaStore.
+
+        Bytes the device already has (by sha256, per the MediaManifest) are
+        not uploaded again: a copy in the target directory is reused as-is
+        (the result then points at that path), and a copy elsewhere on the
+        device is duplicated there with an on-device `cp`.
+
+        Args:
+            files (Sequence[Tuple[str, str]]): (local_path, remote_path) pairs.
+            scan (bool): Announce the new files to the media scanner.
+
+        Returns:
+            List[SyncPushResult]: Per-file size, time and error, in input order.
+        """
+        if not files:
+            return []
+        manifest = self.manifest
+        hashes: Dict[str, Optional[str]] = {}
+        for local, _ in files:
+            if local not in hashes:
+                try:
+                    hashes[local] = sha256_file(local)
+                except OSError as e:
+                    self.logger.error(f"❌ Cannot read {local}: {e}")
+                    hashes[local] = None
+        live = manifest.verify(h for h in hashes.values() if h)
+
+        results: List[Optional[SyncPushResult]] = [None] * len(files)
+        to_push: List[int] = []
+        pushing = set()
+        for i, (local, remote) in enumerate(files):
+            sha = hashes[local]
+            if sha is None:
+                results[i] = SyncPushResult(local, remote, -1, 0.0, "local file unreadable")
+            elif sha not in live and sha not in pushing:
+                pushing.add(sha)
+                to_push.append(i)
+
+        directories = sorted(
+            {posixpath.dirname(remote) for i, (_, remote) in enumerate(files) if results[i] is None}
+        )
+        if directories:
+            mkdir = self.adb.shell(
+                "mkdir -p " + " ".join(shlex.quote(d) for d in directories), timeout=30
             )
-            # mkdir command doesn't produce useful stdout on success, check error
-            if mkdir_result is None and not self._check_if_dir_exists(
-                remote_dir
-            ):  # Check if dir exists if command seemed to fail
-                self.logger.error(f"Failed to create remote directory: {remote_dir}")
-                return False, None
-
-            # --- Push File ---
-            self.logger.info(f"Pushing '{local_file_path}' to '{remote_path}'...")
-            push_result = self._run_adb_command(
-                ["adb", "push", local_file_path, remote_path]
+            if mkdir.returncode != 0:
+                self.logger.error(f"❌ Could not create {directories}: {mkdir.stderr.strip()}")
+                return [
+                    result or SyncPushResult(local, remote, 0, 0.0, "mkdir failed")
+                    for result, (local, remote) in zip(results, files)
+                ]
+
+        started = time.perf_counter()
+        if to_push:
+            self.logger.info(f"📤 Pushing {len(to_push)} file(s) in one sync session...")
+            for i, result in zip(to_push, self.adb.push_many([files[i] for i in to_push])):
+                results[i] = result
+                if result.ok:
+                    manifest.add(hashes[result.local_path], result.size, result.remote_path, save=False)
+                    live.setdefault(hashes[result.local_path], []).append(result.remote_path)
+        elapsed = time.perf_counter() - started
+
+        # Everything else is already on the device: reuse it or copy it there.
+        # A path is handed out once per batch so two items never share a file.
+        claimed = {r.remote_path for r in results if r is not None and r.ok}
+        reused, copies = 0, []
+        for i, (local, remote) in enumerate(files):
+            if results[i] is not None:
+                continue
+            sources = live.get(hashes[local], [])
+            same_dir = [
+                p
+                for p in sources
+                if posixpath.dirname(p) == posixpath.dirname(remote) and p not in claimed
+            ]
+            if same_dir:
+                claimed.add(same_dir[0])
+                results[i] = SyncPushResult(local, same_dir[0], os.path.getsize(local), 0.0)
+                reused += 1
+            elif sources:
+                copies.append((i, sources[0]))
+            else:
+                results[i] = SyncPushResult(local, remote, 0, 0.0, "source push failed")
+        if copies:
+            command = "; ".join(
+                f"cp {shlex.quote(src)} {shlex.quote(files[i][1])} && echo COPIED {shlex.quote(files[i][1])}"
+                for i, src in copies
             )
-            # ADB push provides output on success/failure in stdout/stderr, check return value
-            if push_result is None:
-                self.logger.error(f"ADB push failed for {local_file_path}")
-                return False, None
-            self.logger.info(f"📤 File pushed successfully to: {remote_path}")
+            output = self.adb.shell(command, timeout=120).stdout or ""
+            copied = {line[len("COPIED "):] for line in output.splitlines() if line.startswith("COPIED ")}
+            for i, _ in copies:
+                local, remote = files[i]
+                if remote in copied:
+                    size = os.path.getsize(local)
+                    results[i] = SyncPushResult(local, remote, size, 0.0)
+                    manifest.add(hashes[local], size, remote, save=False)
+                else:
+                    results[i] = SyncPushResult(local, remote, 0, 0.0, "on-device copy failed")
+        if to_push or copies:
+            manifest.save()
+
+        for i, result in enumerate(results):
+            if not result.ok:
+                self.logger.error(f"❌ Push failed for {result.local_path}: {result.error}")
+            elif i in to_push:
+                self.logger.info(
+                    f"📤 {os.path.basename(result.local_path)} -> {result.remote_path}: "
+                    f"{result.size / (1024 * 1024):.1f} MB in {result.seconds:.2f}s "
+                    f"({result.mb_per_s:.1f} MB/s)"
+                )
+        pushed = [results[i] for i in to_push if results[i].ok]
+        total_mb = sum(r.size for r in pushed) / (1024 * 1024)
+        self.logger.info(
+            f"📦 {len(files)} file(s): pushed {len(pushed)} ({total_mb:.1f} MB in {elapsed:.2f}s, "
+            f"{total_mb / elapsed if elapsed > 0 else 0:.1f} MB/s), "
+            f"reused {reused}, copied on device {len(copies)}"
+        )
 
-            # --- Trigger Media Scan ---
-            self.trigger_media_scan(remote_path)
+        new_paths = [results[i].remote_path for i in to_push if results[i].ok]
+        new_paths += [files[i][1] for i, _ in copies if results[i].ok]
+        if scan and new_paths:
+            self.scan_files(new_paths)
+        return results
 
-            return True, remote_path
+    def scan_files(self, remote_paths: Sequence[str]) -> bool:
+        """
+        Announces specific files to the media scanner in a single shell call,
+        instead of rescanning whole folders.
+        """
+        if not remote_paths:
+            return True
+        command = "; ".join(
+            f"am broadcast -a {MEDIA_SCAN_ACTION} -d {shlex.quote('file://' + path)} >/dev/null"
+            for path in remote_paths
+        )
+        result = self.adb.shell(command, timeout=30)
+        if result.returncode != 0:
+            self.logger.warning(f"⚠️ Media scan reported an error: {result.stderr.strip()}")
+            return False
+        self.logger.info(f"📣 Scanned {len(remote_paths)} new file(s) into the gallery.")
+        return True
 
-        except Exception as e:
-            self.logger.error(f"Push to device failed: {e}", exc_info=True)
-            return False, None
+    def stage_media_batch(
+        self, items: Sequence[Tuple[str, str]]
+    ) -> List[Optional[str]]:
+        """
+        Pushes a day's media for this device up front, in one batch, into a
+        hidden staging folder so it doesn't show up in the gallery (and in
+        "select first video") before its turn. publish_staged() makes a file
+        visible right before it is posted.
+
+        Args:
+            items (Sequence[Tuple[str, str]]): (local_path, account_name) pairs.
+
+        Returns:
+            List[Optional[str]]: The staged remote path per item, in input
+                order (None where the push failed). Every item gets its own
+                staged file, even if two items share a local path or bytes.
+        """
+        staged: List[Optional[str]] = [None] * len(items)
+        positions, files = [], []
+        for index, (local_path, account_name) in enumerate(items):
+            if not os.path.exists(local_path):
+                self.logger.error(f"Local file does not exist: {local_path}")
+                continue
+            name = self._remote_file_name(local_path, account_name, index)
+            positions.append(index)
+            files.append((local_path, f"{STAGING_DIR}/{name}"))
+        if not files:
+            return staged
+        self.adb.shell(f"mkdir -p {STAGING_DIR} && touch {STAGING_DIR}/.nomedia", timeout=30)
+        results = self.push_media_batch(files, scan=False)
+        for index, result in zip(positions, results):
+            if result.ok:
+                staged[index] = result.remote_path
+        return staged
+
+    def publish_staged(self, staged_path: str, account_name: str) -> Optional[str]:
+        """
+        Moves a staged file into the account's album and scans it, in one
+        shell call (a rename on the same storage, no data is copied).
+
+        Returns:
+            Optional[str]: The published remote path, or None on failure.
+        """
+        album = self.album_path(account_name)
+        remote_path = f"{album}/{posixpath.basename(staged_path)}"
+        command = (
+            f"mkdir -p {shlex.quote(album)} && "
+            f"mv {shlex.quote(staged_path)} {shlex.quote(remote_path)} && "
+            f"am broadcast -a {MEDIA_SCAN_ACTION} -d {shlex.quote('file://' + remote_path)} >/dev/null"
+            " && echo PUBLISHED"
+        )
+        result = self.adb.shell(command, timeout=30)
+        if "PUBLISHED" not in (result.stdout or ""):
+            self.logger.error(
+                f"❌ Could not publish staged file {staged_path}: {(result.stdout or '').strip()}"
+            )
+            return None
+        self.manifest.move(staged_path, remote_path)
+        self.logger.info(f"📲 Published staged media to {remote_path}")
+        return remote_path
 
     def _check_if_dir_exists(self, remote_dir: str) -> bool:
         """Checks if a directory exists on the device using ADB."""
@@ -228,6 +429,7 @@ class MediaCleaner:
         """
         self.device_serial = device_serial
         self.logger = logger_mc  # Use the specific logger
+        self.adb = get_adb_executor(device_serial)
 
     def _run_adb_command(self, command_list: list[str]) -> Optional[str]:
         """Internal helper to run ADB commands, specific to MediaCleaner."""
@@ -238,8 +440,8 @@ class MediaCleaner:
 
         self.logger.debug(f"Running ADB command: {' '.join(cmd)}")
         try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, check=False, timeout=60
+            result = self.adb.run(
+                command_list[1:], timeout=60
             )  # Longer timeout for deletion
             if result.returncode != 0:
                 self.logger.error(
@@ -248,11 +450,6 @@ class MediaCleaner:
                 return None
             self.logger.debug(f"ADB command output: {result.stdout.strip()}")
             return result.stdout.strip()
-        except FileNotFoundError:
-            self.logger.error(
-                "❌ ADB command not found. Ensure ADB is installed and in your PATH."
-            )
-            return None
         except subprocess.TimeoutExpired:
             self.logger.error(f"❌ ADB command timed out: {' '.join(cmd)}")
             return None
@@ -278,12 +475,66 @@ class MediaCleaner:
             )
             return False
 
+    @property
+    def manifest(self) -> MediaManifest:
+        return get_media_manifest(self.device_serial)
+
+    def delete_files(self, remote_paths: List[str]) -> bool:
+        """
+        Deletes specific files on the device (one shell call per
+        DELETE_BATCH_SIZE paths) and drops them from the media manifest.
+        """
+        if not remote_paths:
+            return True
+        ok = True
+        for i in range(0, len(remote_paths), DELETE_BATCH_SIZE):
+            batch = remote_paths[i : i + DELETE_BATCH_SIZE]
+            quoted = " ".join(shlex.quote(p) for p in batch)
+            result = self._run_adb_command(["adb", "shell", f"rm -f {quoted} && echo DELETED"])
+            if result and "DELETED" in result:
+                self.manifest.forget(batch)
+            else:
+                ok = False
+        if ok:
+            self.logger.info(f"✅ Deleted {len(remote_paths)} file(s) from the device.")
+        else:
+            self.logger.error(f"❌ Failed to delete some of {len(remote_paths)} file(s) from the device.")
+        return ok
+
     def clean_posted_media(self, album_path: str) -> bool:
-        """High-level method to clean up a specific album after posting."""
+        """
+        Cleans up an album after posting by deleting the files the media
+        manifest lists under it (and the album, once empty). Albums with no
+        recorded files - pushed before the manifest existed - are removed
+        with delete_album().
+        """
         self.logger.info(f"Cleaning posted media in album: {album_path}")
-        return self.delete_album(album_path)
+        tracked = self.manifest.paths_under(album_path)
+        if not tracked:
+            self.logger.info("No recorded files in album; deleting the album directory.")
+            return self.delete_album(album_path)
+        if not self.delete_files(tracked):
+            return False
+        self._run_adb_command(["adb", "shell", f"rmdir {shlex.quote(album_path)} 2>/dev/null; true"])
+        return True
 
-    def clean_all_media(self) -> bool:
+    def clean_all_media(self, include_untracked: bool = False) -> bool:
+        """
+        Deletes every file the media manifest records on the device.
+
+        Args:
+            include_untracked (bool): Also sweep all common media files from
+                DCIM and Pictures with a recursive find (slow on big galleries;
+                only needed for files pushed before the manifest existed).
+        """
+        tracked = self.manifest.all_paths()
+        self.logger.warning(f"Deleting all {len(tracked)} recorded media file(s)...")
+        ok = self.delete_files(tracked)
+        if include_untracked:
+            ok = self._sweep_common_media() and ok
+        return ok
+
+    def _sweep_common_media(self) -> bool:
         """Deletes common media file types from standard DCIM and Pictures folders."""
         self.logger.warning(
             "Attempting to delete ALL common media files from DCIM and Pictures..."
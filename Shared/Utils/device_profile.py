@@ -0,0 +1,219 @@
+# Shared/Utils/device_profile.py
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, List, Optional, Tuple
+
+from Shared.config_loader import get_cache_dir, get_config_section
+from Shared.Utils.adb_executor import get_adb_executor
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="DeviceProfile")
+
+# Gesture pixel values in the code were tuned on this screen (portrait)
+REFERENCE_WIDTH = 1080
+REFERENCE_HEIGHT = 2340
+
+DEFAULT_TTL_HOURS = 24
+ADB_KEYBOARD_IME = "com.android.adbkeyboard/.AdbIME"
+
+_SECTION = "@@section@@"
+# Every fact comes from one `adb shell` round-trip; sections are split on _SECTION
+_PROBE_COMMANDS = [
+    "wm size",
+    "wm density",
+    "getprop ro.build.version.release",
+    "getprop ro.build.version.sdk",
+    "getprop ro.product.model",
+    "ime list -s",
+    "pm list packages | grep -i instagram",
+]
+_SIZE_RE = re.compile(r"(\d+)x(\d+)")
+_DENSITY_RE = re.compile(r"(\d+)")
+
+
+@dataclass
+class DeviceProfile:
+    """
+    Display geometry and capabilities of one device, probed once and cached
+    on disk so sessions don't pay a device.info RPC per gesture.
+    """
+
+    serial: str
+    width: int = REFERENCE_WIDTH
+    height: int = REFERENCE_HEIGHT
+    density: int = 0
+    android_version: str = ""
+    sdk: int = 0
+    model: str = ""
+    imes: List[str] = field(default_factory=list)
+    instagram_packages: List[str] = field(default_factory=list)
+    probed_at: float = 0.0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.probed_at
+
+    @property
+    def has_adb_keyboard(self) -> bool:
+        return ADB_KEYBOARD_IME in self.imes
+
+    @property
+    def scale_x(self) -> float:
+        return self.width / REFERENCE_WIDTH
+
+    @property
+    def scale_y(self) -> float:
+        return self.height / REFERENCE_HEIGHT
+
+    def sx(self, x: float) -> int:
+        """Scales a reference-screen x (or horizontal distance) to this device."""
+        return int(round(x * self.scale_x))
+
+    def sy(self, y: float) -> int:
+        """Scales a reference-screen y (or vertical distance) to this device."""
+        return int(round(y * self.scale_y))
+
+    def scale(self, x: float, y: float) -> Tuple[int, int]:
+        return self.sx(x), self.sy(y)
+
+    def at(self, fx: float, fy: float) -> Tuple[int, int]:
+        """Absolute pixel for a fraction of the screen (0..1, 0..1)."""
+        return int(self.width * fx), int(self.height * fy)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DeviceProfile":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+def _parse_probe(serial: str, output: str) -> DeviceProfile:
+    sections = [s.strip() for s in output.split(_SECTION)]
+    sections += [""] * (len(_PROBE_COMMANDS) - len(sections))
+    size, density, release, sdk, model, imes, packages = sections[: len(_PROBE_COMMANDS)]
+
+    profile = DeviceProfile(serial=serial, probed_at=time.time())
+    # "Override size:" (if any) is listed last and is what apps actually get
+    sizes = _SIZE_RE.findall(size)
+    if sizes:
+        profile.width, profile.height = (int(v) for v in sizes[-1])
+    densities = _DENSITY_RE.findall(density)
+    if densities:
+        profile.density = int(densities[-1])
+    profile.android_version = release
+    profile.sdk = int(sdk) if sdk.isdigit() else 0
+    profile.model = model
+    profile.imes = [line.strip() for line in imes.splitlines() if "/" in line]
+    profile.instagram_packages = sorted(
+        line.split(":", 1)[1].strip()
+        for line in packages.splitlines()
+        if line.startswith("package:")
+    )
+    return profile
+
+
+def probe_device_profile(serial: str, device=None) -> Optional[DeviceProfile]:
+    """
+    Reads the profile from the device in a single adb shell call. Falls back
+    to uiautomator2's device.info for the display size if adb fails.
+    """
+    command = f"; echo {_SECTION}; ".join(_PROBE_COMMANDS)
+    try:
+        result = get_adb_executor(serial).shell(command, timeout=20)
+        profile = _parse_probe(serial, result.stdout or "")
+        if _SIZE_RE.search(result.stdout or ""):
+            return profile
+        logger.warning(f"⚠️ [{serial}] Could not read display size via adb")
+    except Exception as e:
+        logger.warning(f"⚠️ [{serial}] Device profile probe failed: {e}")
+
+    if device is not None:
+        try:
+            info = device.info
+            return DeviceProfile(
+                serial=serial,
+                width=info["displayWidth"],
+                height=info["displayHeight"],
+                probed_at=time.time(),
+            )
+        except Exception as e:
+            logger.error(f"❌ [{serial}] device.info fallback failed: {e}")
+    return None
+
+
+def _profile_path(serial: str) -> str:
+    directory = os.path.join(get_cache_dir(), "device_profiles")
+    os.makedirs(directory, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in serial)
+    return os.path.join(directory, f"{safe_name}.json")
+
+
+def _load_cached(serial: str, ttl: float) -> Optional[DeviceProfile]:
+    try:
+        with open(_profile_path(serial), encoding="utf-8") as f:
+            profile = DeviceProfile.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"⚠️ [{serial}] Ignoring unreadable cached profile: {e}")
+        return None
+    return profile if profile.age < ttl else None
+
+
+def _save(profile: DeviceProfile):
+    path = _profile_path(profile.serial)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(profile.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"⚠️ [{profile.serial}] Could not cache device profile: {e}")
+
+
+_profiles: Dict[str, DeviceProfile] = {}
+_profiles_lock = threading.Lock()
+
+
+def get_device_profile(device, refresh: bool = False) -> DeviceProfile:
+    """
+    Returns the DeviceProfile for a uiautomator2 device (or serial string).
+    Kept in memory per process and on disk under paths.cache_dir for
+    device_profile.ttl_hours; re-probed when stale or when `refresh` is set.
+    If the device can't be probed, a reference-sized profile is returned
+    (not cached) so gestures still work.
+    """
+    serial = device if isinstance(device, str) else getattr(device, "serial", None)
+    serial = serial or "unknown"
+    cfg = get_config_section("device_profile", default={}) or {}
+    ttl = float(cfg.get("ttl_hours", DEFAULT_TTL_HOURS)) * 3600
+
+    with _profiles_lock:
+        profile = _profiles.get(serial)
+        if profile is not None and not refresh and profile.age < ttl:
+            return profile
+        profile = None if refresh else _load_cached(serial, ttl)
+        if profile is None:
+            profile = probe_device_profile(
+                serial, device=None if isinstance(device, str) else device
+            )
+            if profile is None:
+                logger.warning(
+                    f"⚠️ [{serial}] Using reference {REFERENCE_WIDTH}x{REFERENCE_HEIGHT} profile"
+                )
+                return DeviceProfile(serial=serial)
+            _save(profile)
+            logger.info(
+                f"📱 [{serial}] Profile: {profile.model or '?'} {profile.width}x{profile.height} "
+                f"@{profile.density}dpi, Android {profile.android_version or '?'}, "
+                f"{len(profile.instagram_packages)} Instagram package(s)"
+            )
+        _profiles[serial] = profile
+        return profile
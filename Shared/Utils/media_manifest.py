@@ -0,0 +1,219 @@
+# Shared/Utils/media_manifest.py
+
+import hashlib
+import json
+import os
+import shlex
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from Shared.config_loader import get_cache_dir, get_config_section
+from Shared.Utils.adb_executor import AdbExecutor, get_adb_executor
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="MediaManifest")
+
+DEFAULT_DEVICE_PATH = "/sdcard/.igavantage_manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaManifest:
+    """
+    Content-addressed index of the media this project put on one device:
+    sha256 -> {"size": bytes, "paths": [remote paths]}.
+
+    The manifest lives on the device (so it survives switching hosts) and
+    is mirrored under paths.cache_dir/media_manifests so lookups cost no
+    ADB round-trip. Whichever copy has the newer "updated_at" wins when it
+    is first loaded. Pushes of bytes that are already on the device turn
+    into a lookup, and deletes go straight to the listed files instead of
+    walking /sdcard.
+    """
+
+    def __init__(self, adb: AdbExecutor, device_path: str = DEFAULT_DEVICE_PATH):
+        self.adb = adb
+        self.serial = adb.device.serial
+        self.device_path = device_path
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.serial)
+        directory = os.path.join(get_cache_dir(), "media_manifests")
+        os.makedirs(directory, exist_ok=True)
+        self.local_path = os.path.join(directory, f"{safe_name}.json")
+        self._lock = threading.RLock()
+        self._data = self._load()
+
+    # --- Persistence ---
+
+    def _read(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ [{self.serial}] Ignoring unreadable manifest {path}: {e}")
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("files"), dict):
+            return None
+        return data
+
+    def _load(self) -> Dict:
+        local = self._read(self.local_path)
+        remote = None
+        fd, tmp_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            if self.adb.pull(self.device_path, tmp_path).returncode == 0:
+                remote = self._read(tmp_path)
+        finally:
+            os.remove(tmp_path)
+
+        candidates = [d for d in (local, remote) if d]
+        if not candidates:
+            return {"updated_at": 0.0, "files": {}}
+        data = max(candidates, key=lambda d: d.get("updated_at", 0.0))
+        if data is remote:
+            self._write_local(data)
+        logger.debug(
+            f"[{self.serial}] Media manifest loaded: {len(data['files'])} file(s)"
+        )
+        return data
+
+    def _write_local(self, data: Dict):
+        tmp_path = f"{self.local_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.local_path)
+        except OSError as e:
+            logger.warning(f"⚠️ [{self.serial}] Could not save media manifest mirror: {e}")
+
+    def _save(self):
+        """Writes the local mirror and copies it to the device."""
+        self._data["updated_at"] = time.time()
+        self._write_local(self._data)
+        result = self.adb.push(self.local_path, self.device_path)
+        if result.returncode != 0:
+            logger.warning(
+                f"⚠️ [{self.serial}] Could not copy media manifest to device: {result.stderr}"
+            )
+
+    # --- Lookups ---
+
+    def paths(self, sha256: str) -> List[str]:
+        with self._lock:
+            return list(self._data["files"].get(sha256, {}).get("paths", []))
+
+    def all_paths(self) -> List[str]:
+        with self._lock:
+            return [p for entry in self._data["files"].values() for p in entry["paths"]]
+
+    def paths_under(self, directory: str) -> List[str]:
+        prefix = directory.rstrip("/") + "/"
+        return [p for p in self.all_paths() if p.startswith(prefix)]
+
+    def verify(self, sha256s: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Checks in one shell call that the recorded copies of the given hashes
+        still exist with the recorded size (files can be deleted in the
+        gallery), drops the ones that don't, and returns sha256 -> live paths.
+        """
+        with self._lock:
+            wanted = {
+                sha: self._data["files"][sha]
+                for sha in set(sha256s)
+                if sha in self._data["files"]
+            }
+        candidates = [p for entry in wanted.values() for p in entry["paths"]]
+        if not candidates:
+            return {}
+        command = "for f in " + " ".join(shlex.quote(p) for p in candidates)
+        command += '; do stat -c "%s %n" "$f" 2>/dev/null; done'
+        result = self.adb.shell(command, timeout=30)
+        sizes = {}
+        for line in (result.stdout or "").splitlines():
+            size, _, path = line.partition(" ")
+            if size.isdigit():
+                sizes[path] = int(size)
+
+        live: Dict[str, List[str]] = {}
+        stale = []
+        for sha, entry in wanted.items():
+            for path in entry["paths"]:
+                if sizes.get(path) == entry["size"]:
+                    live.setdefault(sha, []).append(path)
+                else:
+                    stale.append(path)
+        if stale:
+            logger.info(f"🧾 [{self.serial}] {len(stale)} recorded file(s) no longer on device")
+            self.forget(stale)
+        return live
+
+    # --- Updates ---
+
+    def add(self, sha256: str, size: int, remote_path: str, save: bool = True):
+        with self._lock:
+            entry = self._data["files"].setdefault(sha256, {"size": size, "paths": []})
+            entry["size"] = size
+            if remote_path not in entry["paths"]:
+                entry["paths"].append(remote_path)
+            if save:
+                self._save()
+
+    def move(self, old_path: str, new_path: str):
+        with self._lock:
+            for entry in self._data["files"].values():
+                if old_path in entry["paths"]:
+                    entry["paths"] = [new_path if p == old_path else p for p in entry["paths"]]
+                    self._save()
+                    return
+
+    def forget(self, remote_paths: Iterable[str]):
+        gone = set(remote_paths)
+        with self._lock:
+            changed = False
+            for sha in list(self._data["files"]):
+                entry = self._data["files"][sha]
+                kept = [p for p in entry["paths"] if p not in gone]
+                if len(kept) != len(entry["paths"]):
+                    changed = True
+                    if kept:
+                        entry["paths"] = kept
+                    else:
+                        del self._data["files"][sha]
+            if changed:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+
+_manifests: Dict[str, MediaManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_media_manifest(serial: Optional[str] = None) -> MediaManifest:
+    """
+    Returns the process-wide MediaManifest for a device serial (None = the
+    only connected device). Device path from the `media_manifest:` section
+    of config.yaml.
+    """
+    adb = get_adb_executor(serial)
+    key = adb.device.serial
+    with _manifests_lock:
+        manifest = _manifests.get(key)
+        if manifest is None:
+            cfg = get_config_section("media_manifest", default={}) or {}
+            manifest = MediaManifest(adb, cfg.get("device_path", DEFAULT_DEVICE_PATH))
+            _manifests[key] = manifest
+        return manifest
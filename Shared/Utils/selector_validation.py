@@ -0,0 +1,138 @@
+# Shared/Utils/selector_validation.py
+"""
+Offline check of every InstagramXPaths selector against saved hierarchy dumps.
+
+Each dump is parsed once in a worker process and every static selector is
+evaluated against it. The report lists selectors that are not valid XPath,
+selectors that matched nothing in any dump (likely stale after an app
+update), and per-dump match counts. Parameterised selectors are compiled
+with a placeholder argument to catch syntax errors.
+
+Usage (from the project root):
+    python -m Shared.Utils.selector_validation dumps/*.xml
+    python -m Shared.Utils.selector_validation --package com.instagram.androie --workers 4 dumps/
+"""
+
+import argparse
+import glob
+import inspect
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from lxml import etree
+
+from Shared.UI.ui_snapshot import UISnapshot, compile_xpath
+from Shared.Utils.xpath_config import get_instagram_xpaths
+
+TEMPLATE_PLACEHOLDER = "placeholder"
+
+
+def validate_dump(path: str, selectors: Dict[str, str]) -> Tuple[str, Dict[str, int], Optional[str]]:
+    """
+    Worker: counts matches for each selector in one dump.
+
+    Returns:
+        Tuple[str, Dict[str, int], Optional[str]]: (path, {name: matches}, error)
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = UISnapshot(f.read())
+    except (OSError, etree.XMLSyntaxError, ValueError) as e:
+        return path, {}, str(e)
+    counts = {}
+    for name, xpath in selectors.items():
+        try:
+            counts[name] = len(compile_xpath(xpath)(snapshot.root))
+        except (etree.XPathError, TypeError):
+            counts[name] = 0
+    return path, counts, None
+
+
+def template_errors(registry) -> Dict[str, str]:
+    """Compiles every parameterised selector with placeholder arguments."""
+    errors = {}
+    for name in registry._template_names:
+        template = getattr(registry, name)
+        params = inspect.signature(template.__wrapped__).parameters.values()
+        args = [
+            1 if "index" in p.name else TEMPLATE_PLACEHOLDER
+            for p in params
+            if p.default is inspect.Parameter.empty
+        ]
+        try:
+            compile_xpath(template(*args))
+        except Exception as e:
+            errors[name] = str(e)
+    return errors
+
+
+def expand_paths(patterns: List[str]) -> List[str]:
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.xml")
+        paths.extend(glob.glob(pattern))
+    return sorted(set(paths))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dumps", nargs="+", help="Hierarchy XML files or directories (globs ok)")
+    parser.add_argument("--package", default="com.instagram.android")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--per-dump", action="store_true", help="Print the selectors matched in each dump")
+    args = parser.parse_args()
+
+    paths = expand_paths(args.dumps)
+    if not paths:
+        parser.error("no dump files found")
+
+    registry = get_instagram_xpaths(args.package)
+    invalid = registry.invalid_selectors()
+    selectors = {
+        name: xpath
+        for name, xpath in registry.selectors().items()
+        if isinstance(xpath, str) and name not in invalid
+    }
+    bad_templates = template_errors(registry)
+
+    totals = {name: 0 for name in selectors}
+    failed_dumps = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for path, counts, error in pool.map(
+            validate_dump, paths, [selectors] * len(paths), chunksize=4
+        ):
+            if error:
+                failed_dumps[path] = error
+                continue
+            for name, count in counts.items():
+                totals[name] += count
+            if args.per_dump:
+                matched = sorted(n for n, c in counts.items() if c)
+                print(f"{os.path.basename(path)}: {len(matched)} selector(s) matched")
+                for name in matched:
+                    print(f"    {name} ({counts[name]})")
+
+    unmatched = sorted(name for name, total in totals.items() if not total)
+    print(
+        f"\nChecked {len(selectors)} selector(s) against {len(paths) - len(failed_dumps)} dump(s) "
+        f"for {args.package}"
+    )
+    for path, error in failed_dumps.items():
+        print(f"  ⚠️ Could not parse {path}: {error}")
+    for name, error in sorted({**invalid, **bad_templates}.items()):
+        print(f"  ❌ Invalid XPath: {name}: {error}")
+    print(f"  {len(selectors) - len(unmatched)} matched at least once, {len(unmatched)} never matched:")
+    for name in unmatched:
+        print(f"    - {name}")
+    return 1 if invalid or bad_templates else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,149 @@
-# Shared/stealth_typing.py
+# Shared/Utils/stealth_typing.py
+import base64
 import logging
 import random
-import subprocess
+import re
+import threading
 import time
+from typing import Dict, List, Optional
 
 import uiautomator2 as u2
 
+from Shared.UI.ui_change_feed import get_ui_change_feed
+from Shared.UI.ui_snapshot import SnapshotNode, get_hierarchy_cache, invalidate_hierarchy
+from Shared.Utils.adb_executor import get_adb_executor
+
 # === CONFIG ===
 TARGET_WPM = 75
 TYPING_DELAY_RANGE = (0.05, 0.1)
+ADB_KEYBOARD_IME = "com.android.adbkeyboard/.AdbIME"
+DELETE_BATCH_SIZE = 100  # DEL key events per `input keyevent` call
+VERIFY_TIMEOUT = 3.0  # Seconds to wait for typed text to show in the field
 
 logger = logging.getLogger("StealthTyper")
 
 
 class StealthTyper:
-    def __init__(self, device_id: str = None):
-        self.device_id = device_id
+    def __init__(self, device_id: str = None, device=None):
+        """
+        Args:
+            device_id (str): Device serial.
+            device: An existing uiautomator2 device to reuse instead of connecting again.
+        """
+        self.device_id = device_id or getattr(device, "serial", None)
         self.base_delay = 60 / (TARGET_WPM * 5)
-        self.d = u2.connect(device_id)
+        self.d = device if device is not None else u2.connect(device_id)
+        self.adb = get_adb_executor(self.device_id)
+        # Last IME we know is active; None = unknown, re-read before relying on it
+        self.active_ime: Optional[str] = None
+        self._ime_lock = threading.Lock()
         self.set_adb_keyboard()
 
     def _adb_shell(self, command: str):
-        cmd = ["adb"]
-        if self.device_id:
-            cmd += ["-s", self.device_id]
-        cmd += ["shell", command]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self.adb.shell(command)
+        # Typed text / key events change the field contents shown in the hierarchy
+        invalidate_hierarchy(self.d)
         return result.stdout.strip()
 
-    def set_adb_keyboard(self):
-        logger.info("Activating ADBKeyBoard")
-        self._adb_shell("ime enable com.android.adbkeyboard/.AdbIME")
-        self._adb_shell("ime set com.android.adbkeyboard/.AdbIME")
+    def current_ime(self) -> str:
+        """Reads the active input method from the device (one shell call)."""
+        result = self.adb.shell("settings get secure default_input_method", timeout=10)
+        return (result.stdout or "").strip()
+
+    def forget_ime(self):
+        """Marks the IME as unknown, e.g. after uiautomator2 may have switched it."""
+        self.active_ime = None
+
+    def set_adb_keyboard(self, force: bool = False) -> bool:
+        """
+        Makes ADBKeyboard the active IME. The known state is cached, so this
+        is free when it's already active; otherwise the device is asked once
+        and the switch (enable + set in one shell call) only happens if needed.
+
+        Returns:
+            bool: True if the IME had to be switched.
+        """
+        with self._ime_lock:
+            if not force and self.active_ime == ADB_KEYBOARD_IME:
+                return False
+            if not force and self.current_ime() == ADB_KEYBOARD_IME:
+                self.active_ime = ADB_KEYBOARD_IME
+                return False
+            logger.info("Activating ADBKeyBoard")
+            self.adb.shell(f"ime enable {ADB_KEYBOARD_IME}; ime set {ADB_KEYBOARD_IME}")
+            self.active_ime = ADB_KEYBOARD_IME
+            return True
 
     def _send_adb_input(self, text: str):
-        safe_text = text.replace('"', '\\"')
-        self._adb_shell(f'am broadcast -a ADB_INPUT_TEXT --es msg "{safe_text}"')
+        """Commits text at the cursor via ADBKeyboard. Base64 avoids shell quoting and keeps emojis intact."""
+        payload = base64.b64encode(text.encode("utf-8")).decode("ascii")
+        self._adb_shell(f"am broadcast -a ADB_INPUT_B64 --es msg {payload}")
+
+    def delete_chars(self, count: int):
+        """Sends `count` DEL key events in one `input keyevent 67 67 ...` call per batch."""
+        while count > 0:
+            batch = min(count, DELETE_BATCH_SIZE)
+            self._adb_shell("input keyevent " + " ".join(["67"] * batch))
+            count -= batch
+
+    def _split_chunks(self, text: str) -> List[str]:
+        """
+        Splits text into the bursts a person types between pauses: usually a
+        word with its trailing space, sometimes two or three short words.
+        Splitting only on whitespace keeps emoji sequences whole.
+        """
+        words = re.findall(r"\S+\s*|\s+", text)
+        chunks = []
+        i = 0
+        while i < len(words):
+            take = 1
+            if len(words[i]) <= 4 and random.random() < 0.35:
+                take = random.randint(2, 3)
+            chunks.append("".join(words[i : i + take]))
+            i += take
+        return chunks
+
+    def _chunk_delay(self, chunk: str) -> float:
+        """Time a TARGET_WPM typist spends on `chunk`, plus the pause before the next burst."""
+        delay = len(chunk) * self.base_delay * random.uniform(0.7, 1.3)
+        delay += random.uniform(*TYPING_DELAY_RANGE)
+        if chunk.rstrip().endswith((".", "!", "?", "\n")):
+            delay += random.uniform(0.3, 0.8)  # Sentence end: short think
+        return delay
+
+    def _type_chunks(self, text: str):
+        """Sends text in human-cadence chunks, pacing each to TARGET_WPM."""
+        self.set_adb_keyboard()
+        chunks = self._split_chunks(text)
+        logger.debug(f"⌨️ Typing {len(text)} chars in {len(chunks)} chunk(s) at ~{TARGET_WPM} WPM")
+        for index, chunk in enumerate(chunks):
+            self._send_adb_input(chunk)
+            if index < len(chunks) - 1:
+                time.sleep(self._chunk_delay(chunk))
+
+    def focused_field(self) -> Optional[SnapshotNode]:
+        """The focused input node from a fresh hierarchy snapshot, if any."""
+        snapshot = get_hierarchy_cache(self.d).refresh()
+        return snapshot.first("//*[@focused='true']")
+
+    def wait_for_field_text(self, expected: str, timeout: float = VERIFY_TIMEOUT) -> bool:
+        """
+        Waits until the focused field shows `expected`. Password fields are
+        masked in the hierarchy, so only their length is compared.
+        """
+        expected = expected.strip()
+
+        def check(snapshot) -> bool:
+            node = snapshot.first("//*[@focused='true']")
+            if node is None:
+                return False
+            current = node.text or ""
+            if node.get("password") == "true":
+                return len(current) >= len(expected)
+            return expected in current
+
+        invalidate_hierarchy(self.d)
+        return bool(get_ui_change_feed(self.d).wait_until(check, timeout, poll_interval=0.25))
 
     def clear_field_before_typing(self, xpath: str):
         logger.info("🧹 Checking field for existing text")
@@ -51,69 +159,85 @@ class StealthTyper:
                 time.sleep(0.3)
                 self._adb_shell("input keyevent 123")
                 time.sleep(0.2)
-                for _ in range(len(current)):
-                    self.d.press("DEL")
-                    time.sleep(0.05)
+                self.delete_chars(len(current))
             else:
                 logger.info("✅ Field already empty")
         except Exception as e:
             logger.warning(f"⚠️ Could not clear field: {e}")
 
-    def type_text(self, text: str):
+    def type_text(self, text: str) -> bool:
+        """
+        Types text into the focused field in human-cadence chunks and confirms
+        it by reading the field back.
+
+        Returns:
+            bool: True if the field shows the text afterwards.
+        """
         text = text.strip()
-        logger.info(f"Typing text using adb shell input: {text}")
+        logger.info(f"Typing text via ADB keyboard: {text}")
 
         try:
             self.d.clear_text()
             time.sleep(0.3)
         except Exception as e:
             logger.warning(f"⚠️ clear_text() failed: {e}")
-
-        # ADB shell input requires escaping spaces
-        safe_text = text.replace(" ", "%s")
-        command = f'input text "{safe_text}"'
+        # uiautomator2 may switch to its own IME to clear text
+        self.forget_ime()
 
         try:
-            self._adb_shell(command)
-            time.sleep(1)
-            logger.info("✅ Text input sent via adb shell input")
+            self._type_chunks(text)
         except Exception as e:
-            logger.error(f"❌ Failed to type via adb shell input: {e}")
+            logger.error(f"❌ Failed to type via ADB keyboard: {e}")
+            return False
+
+        if self.wait_for_field_text(text):
+            logger.info("✅ Text confirmed in focused field")
+            return True
+        logger.warning("⚠️ Typed text not confirmed in focused field")
+        return False
 
-    def type_caption_with_emojis(self, caption: str):
+    def type_caption_with_emojis(self, caption: str) -> bool:
         """
         Types a full caption (including emojis) using custom ADB keyboard via broadcast.
         Assumes the input field is already focused and visible.
+
+        Returns:
+            bool: True if the field shows the caption afterwards.
         """
         caption = caption.strip()
         logger.info(f"📝 Typing caption with emojis: {caption}")
 
-        # 1. Set ADBKeyboard as IME
-        self.set_adb_keyboard()
-        time.sleep(0.5)  # Give time for IME to activate
-
-        # 2. Clear existing text if any (assumes field is already focused)
+        # 1. Clear existing text if any (assumes field is already focused)
         try:
             self.d.clear_text()
             time.sleep(0.3)
         except Exception as e:
             logger.warning(f"⚠️ clear_text() failed: {e}")
+        # uiautomator2 may switch to its own IME to clear text
+        self.forget_ime()
+
+        # 2. Make sure ADBKeyboard is the IME (no-op if it still is)
+        if self.set_adb_keyboard():
+            time.sleep(0.5)  # Give time for IME to activate
 
-        # 3. Send full caption (including emojis) via broadcast
+        # 3. Send the caption (including emojis) in typing-speed chunks
         try:
-            self._send_adb_input(caption)
-            time.sleep(1.5)
+            self._type_chunks(caption)
             logger.info("✅ Caption broadcast sent via ADB keyboard")
         except Exception as e:
             logger.error(f"❌ Failed to type caption via broadcast: {e}")
-
-        # 4. Optional: log what’s now in the field
-        focused = self.d(focused=True)
-        if focused.exists:
-            field_text = focused.info.get("text", "")
-            logger.info(f"🕵️ Text field now contains: {field_text}")
-        else:
+            return False
+
+        # 4. Confirm from the focused field instead of a fixed sleep
+        if self.wait_for_field_text(caption):
+            logger.info("🕵️ Caption confirmed in text field")
+            return True
+        node = self.focused_field()
+        if node is None:
             logger.warning("⚠️ No focused field found for verification")
+        else:
+            logger.warning(f"⚠️ Text field contains: {node.text}")
+        return False
 
     def press_enter(self):
         self._adb_shell("input keyevent ENTER")
@@ -122,6 +246,28 @@ class StealthTyper:
         self._adb_shell("input keyevent 61")
 
 
+_typers: Dict[str, StealthTyper] = {}
+_typers_lock = threading.Lock()
+
+
+def get_stealth_typer(device) -> StealthTyper:
+    """
+    Returns the process-wide StealthTyper for a uiautomator2 device (or
+    serial). The device object is reused rather than reconnecting, and the
+    IME is only switched when it isn't already ADBKeyboard.
+    """
+    serial = device if isinstance(device, str) else getattr(device, "serial", None)
+    with _typers_lock:
+        typer = _typers.get(serial)
+        if typer is None:
+            if isinstance(device, str) or device is None:
+                typer = StealthTyper(device_id=serial)
+            else:
+                typer = StealthTyper(device_id=serial, device=device)
+            _typers[serial] = typer
+        return typer
+
+
 # === TEST HARNESS ===
 
 TEST_XPATH = (
@@ -133,7 +279,7 @@ FULL_XPATH = '//android.widget.FrameLayout[@resource-id="com.instagram.androkp:i
 def test_stealth_typing(device_id, xpath=FULL_XPATH):
     logger.info(f"🔌 Connecting to device {device_id}")
     d = u2.connect(device_id)
-    typer = StealthTyper(device_id)
+    typer = get_stealth_typer(d)
 
     logger.info(f"🔍 Waiting for field at XPath: {xpath}")
     el = d.xpath(xpath)
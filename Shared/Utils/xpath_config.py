@@ -3,6 +3,22 @@
 
 # Shared/Utils/xpath_config.py
 
+import sys
+import threading
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from lxml import etree
+
+from Shared.UI.ui_snapshot import compile_xpath
+from Shared.Utils.logger_config import setup_logger
+
+logger = setup_logger(name="XPathConfig")
+
+# Widget class of the explore/search grid's cell containers; code that walks
+# up from a cell to its container needs the class itself, not an XPath
+SEARCH_CONTAINER_CLASS = "android.widget.FrameLayout"
+
 
 class InstagramXPaths:
     def __init__(
@@ -288,7 +304,7 @@ class InstagramXPaths:
 
     @property
     def search_layout_container_frame(self):
-        return "//android.widget.FrameLayout"
+        return f"//{SEARCH_CONTAINER_CLASS}"
 
     @property
     def search_layout_container_rid_pattern(self):
@@ -773,6 +789,169 @@ class FirefoxEmailXPaths:
         return '//android.view.View[contains(@text, "Wyloguj") or contains(@content-desc, "Sign out")]'  # Text is language-specific
 
 
+# --- Compiled selector registry ---
+#
+# InstagramXPaths rebuilds an f-string on every property access. The registry
+# resolves every selector once per package name, interns the strings,
+# precompiles them for snapshot queries and then freezes, so hot loops pay a
+# slot lookup instead. Parameterised selectors are memoised with an LRU.
+
+TEMPLATE_CACHE_SIZE = 256
+
+
+def _static_selector_names(source_cls) -> Tuple[str, ...]:
+    """Names of the @property selectors defined on source_cls (and its bases)."""
+    names = []
+    for klass in reversed(source_cls.__mro__):
+        for name, attr in vars(klass).items():
+            if isinstance(attr, property) and name not in names:
+                names.append(name)
+    return tuple(names)
+
+
+def _template_selector_names(source_cls) -> Tuple[str, ...]:
+    """Names of the public methods that build a selector from arguments."""
+    names = []
+    for klass in reversed(source_cls.__mro__):
+        if klass is object:
+            continue
+        for name, attr in vars(klass).items():
+            if callable(attr) and not name.startswith("_") and name not in names:
+                names.append(name)
+    return tuple(names)
+
+
+def _interning(template: Callable[..., str]) -> Callable[..., str]:
+    @wraps(template)
+    def build(*args, **kwargs):
+        value = template(*args, **kwargs)
+        return sys.intern(value) if isinstance(value, str) else value
+
+    return build
+
+
+class FrozenSelectors:
+    """
+    Read-only view of a selector class for one package name. Instances are
+    created by build_selector_registry(); each source class gets its own
+    subclass whose __slots__ are the selector names, so attribute access
+    works exactly like the source class (`xpaths.tab_bar`,
+    `xpaths.album_selector("Reels")`).
+    """
+
+    __slots__ = ("package_name", "_compiled", "_invalid", "_frozen")
+    _static_names: Tuple[str, ...] = ()
+    _template_names: Tuple[str, ...] = ()
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"{type(self).__name__} is frozen; cannot set '{name}'")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is frozen; cannot delete '{name}'")
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} package={self.package_name!r} selectors={len(self._static_names)}>"
+
+    def compiled(self, name: str) -> Optional[etree.XPath]:
+        """Precompiled XPath for a static selector, or None if it isn't valid XPath."""
+        return self._compiled.get(name)
+
+    def selectors(self) -> Dict[str, Optional[str]]:
+        """All static selectors by property name."""
+        return {name: getattr(self, name) for name in self._static_names}
+
+    def invalid_selectors(self) -> Dict[str, str]:
+        """Static selectors that failed to compile, with the lxml error."""
+        return dict(self._invalid)
+
+    def template_cache_info(self) -> Dict[str, Any]:
+        """LRU statistics for each parameterised selector."""
+        return {name: getattr(self, name).cache_info() for name in self._template_names}
+
+
+_registry_classes: Dict[type, type] = {}
+
+
+def _registry_class(source_cls) -> type:
+    cls = _registry_classes.get(source_cls)
+    if cls is None:
+        static_names = _static_selector_names(source_cls)
+        template_names = _template_selector_names(source_cls)
+        cls = type(
+            f"Frozen{source_cls.__name__}",
+            (FrozenSelectors,),
+            {
+                "__slots__": static_names + template_names,
+                "__module__": __name__,
+                "__doc__": f"Frozen, precompiled {source_cls.__name__} selectors.",
+                "_static_names": static_names,
+                "_template_names": template_names,
+            },
+        )
+        _registry_classes[source_cls] = cls
+    return cls
+
+
+def build_selector_registry(
+    source_cls, package_name: str, template_cache_size: int = TEMPLATE_CACHE_SIZE
+) -> FrozenSelectors:
+    """
+    Resolves every selector of `source_cls(package_name)` once and returns a
+    frozen registry holding the interned strings and their compiled XPath.
+    Selectors that aren't valid XPath (e.g. typos) are logged and kept as
+    plain strings so callers behave exactly as before.
+    """
+    source = source_cls(package_name)
+    registry = object.__new__(_registry_class(source_cls))
+    registry.package_name = sys.intern(package_name)
+
+    compiled: Dict[str, etree.XPath] = {}
+    invalid: Dict[str, str] = {}
+    for name in registry._static_names:
+        value = getattr(source, name)
+        if isinstance(value, str):
+            value = sys.intern(value)
+            try:
+                compiled[name] = compile_xpath(value)
+            except etree.XPathError as e:
+                invalid[name] = str(e)
+        setattr(registry, name, value)
+
+    for name in registry._template_names:
+        template = _interning(getattr(source, name))
+        setattr(registry, name, lru_cache(maxsize=template_cache_size)(template))
+
+    registry._compiled = compiled
+    registry._invalid = invalid
+    registry._frozen = True
+    if invalid:
+        logger.warning(
+            f"⚠️ {len(invalid)} {source_cls.__name__} selector(s) are not valid XPath: "
+            + ", ".join(sorted(invalid))
+        )
+    return registry
+
+
+_instagram_registries: Dict[str, FrozenSelectors] = {}
+_instagram_registries_lock = threading.Lock()
+
+
+def get_instagram_xpaths(package_name: str) -> FrozenSelectors:
+    """
+    Returns the process-wide frozen InstagramXPaths registry for a package
+    name, building it on first use. Drop-in for InstagramXPaths(package_name).
+    """
+    package_name = package_name.strip()
+    with _instagram_registries_lock:
+        registry = _instagram_registries.get(package_name)
+        if registry is None:
+            registry = build_selector_registry(InstagramXPaths, package_name)
+            _instagram_registries[package_name] = registry
+        return registry
+
+
 # TODO Implement these xpath correcty
 
 # def _is_explore_page(self):
@@ -118,6 +118,17 @@ def get_path_config() -> Dict[str, Any]:
     return get_config_section("paths", default={})
 
 
+def get_cache_dir() -> str:
+    """
+    Gets the absolute local cache directory (paths.cache_dir), creating it if needed.
+    """
+    cache_dir = get_path_config().get("cache_dir", ".cache")
+    if not os.path.isabs(cache_dir):
+        cache_dir = os.path.join(PROJECT_ROOT, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
 # --- Environment Variable Access ---
 def get_env_var(var_name: str, default: Optional[str] = None) -> Optional[str]:
     """
@@ -5,14 +5,28 @@ import random
 import re
 import subprocess
 import time
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import uiautomator2 as u2
 
 # Assuming SwipeHelper class is moved to its own file
+from Shared.UI.selector_chain import (
+    SelectorChain,
+    get_selector_context,
+    get_selector_preferences,
+)
 from Shared.UI.swipe_helper import SwipeHelper
+from Shared.UI.ui_change_feed import get_ui_change_feed
+from Shared.UI.ui_snapshot import (
+    FieldSpec,
+    SnapshotNode,
+    UISnapshot,
+    get_hierarchy_cache,
+)
+from Shared.Utils.adb_executor import get_adb_executor
+from Shared.Utils.device_profile import DeviceProfile, get_device_profile
 from Shared.Utils.logger_config import setup_logger
-from Shared.Utils.xpath_config import InstagramXPaths
+from Shared.Utils.xpath_config import get_instagram_xpaths
 
 # Module-level logger (can be used by helper functions if any)
 # logger = setup_logger(__name__) # You can keep this if needed elsewhere
@@ -36,12 +50,126 @@ class InstagramInteractions:
         """
         self.device = device
         self.app_package = app_package.strip()  # Ensure it's stripped
-        self.xpath_config = InstagramXPaths(self.app_package)
+        self.xpath_config = get_instagram_xpaths(self.app_package)
         self.airtable_manager = airtable_manager
         # Use class name for logger for better context in logs
         self.logger = setup_logger(self.__class__.__name__)
         # Instantiate SwipeHelper for human-like gestures
         self.swipe_helper = SwipeHelper(self.device)
+        # Shared per-device hierarchy cache: selector checks reuse one dump
+        self.snapshots = get_hierarchy_cache(self.device)
+        # Shared per-serial ADB executor (no adb fork per shell command)
+        self.adb = get_adb_executor(getattr(self.device, "serial", None))
+        # Screen-change signal: waits re-check selectors only after a redraw
+        self.ui_changes = get_ui_change_feed(self.device)
+        # Time spent in await_ui_settled() vs the fixed sleeps it replaced
+        self.settle_stats = {"calls": 0, "settled": 0, "waited": 0.0, "baseline": 0.0}
+
+    # --- Hierarchy Snapshots ---
+
+    def snapshot(self, max_age: Optional[float] = None) -> UISnapshot:
+        """
+        Returns a parsed UI hierarchy snapshot, reusing the cached dump if it is
+        younger than `max_age` seconds (defaults to the cache's window).
+        """
+        return self.snapshots.get(max_age=max_age)
+
+    @property
+    def device_profile(self) -> DeviceProfile:
+        """Cached display size and capabilities (no device.info RPC per gesture)."""
+        return get_device_profile(self.device)
+
+    def invalidate_snapshot(self):
+        """Drops the cached hierarchy. Call after any action that changes the screen."""
+        self.snapshots.invalidate()
+
+    def await_ui_settled(
+        self,
+        max_wait: float = 2.0,
+        baseline_sleep: Optional[float] = None,
+        min_wait: float = 0.1,
+        poll_interval: float = 0.1,
+        before: Optional[str] = None,
+    ) -> bool:
+        """
+        Waits until the UI stops changing after an action, instead of a fixed sleep.
+
+        Takes hierarchy dumps back to back and returns once the screen differs
+        from the one the action was sent on and two dumps in a row are
+        identical. Dumps of the old screen, taken before the transition starts
+        rendering, never count as settled; if the screen never changes this
+        waits the full `max_wait`, like the sleep it replaces. The last dump
+        stays in the snapshot cache, so the next selector query usually needs
+        no new dump.
+
+        Args:
+            max_wait (float): Upper bound in seconds (typically the old sleep).
+            baseline_sleep (Optional[float]): Fixed sleep this replaces, for the
+                                              time-saved stats. Defaults to max_wait.
+            min_wait (float): Initial delay so the action has started rendering.
+            poll_interval (float): Pause between consecutive dumps.
+            before (Optional[str]): Digest of the screen before the action. Defaults
+                                    to the latest dump taken before this call.
+
+        Returns:
+            bool: True if the UI settled, False if max_wait ran out first.
+        """
+        baseline = max_wait if baseline_sleep is None else baseline_sleep
+        started = time.time()
+        deadline = started + max_wait
+        if before is None:
+            before = self.snapshots.last_digest
+        time.sleep(min(min_wait, max_wait))
+
+        settled = False
+        previous = None
+        try:
+            while True:
+                digest = self.snapshots.refresh().digest
+                # Without a pre-action dump, any first dump counts as changed
+                if digest == previous and digest != before:
+                    settled = True
+                    break
+                previous = digest
+                if time.time() + poll_interval >= deadline:
+                    break
+                time.sleep(poll_interval)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Settle check failed ({e}); sleeping out max_wait.")
+        if not settled:
+            time.sleep(max(0.0, deadline - time.time()))
+
+        elapsed = time.time() - started
+        stats = self.settle_stats
+        stats["calls"] += 1
+        stats["settled"] += int(settled)
+        stats["waited"] += elapsed
+        stats["baseline"] += baseline
+        self.logger.debug(
+            f"UI {'settled' if settled else 'still changing'} after {elapsed:.2f}s "
+            f"(fixed sleep {baseline:.2f}s, saved {baseline - elapsed:.2f}s)"
+        )
+        return settled
+
+    def settle_summary(self) -> str:
+        """One-line summary of await_ui_settled() time saved versus fixed sleeps."""
+        stats = self.settle_stats
+        return (
+            f"{stats['calls']} settle waits ({stats['settled']} settled early): "
+            f"{stats['waited']:.1f}s waited vs {stats['baseline']:.1f}s of fixed sleeps, "
+            f"saved {stats['baseline'] - stats['waited']:.1f}s"
+        )
+
+    def _wait_for_node(
+        self, xpath: str, timeout: float = 10, poll_interval: float = 0.5
+    ) -> Optional[SnapshotNode]:
+        """
+        Waits until `xpath` matches, returning the first matching node. The
+        selector is re-evaluated when the screen changes (see UIChangeFeed).
+        """
+        return self.ui_changes.wait_until(
+            lambda snap: snap.first(xpath), timeout, poll_interval=poll_interval
+        )
 
     # --- App Management ---
 
@@ -54,25 +182,18 @@ class InstagramInteractions:
             f"🔧 Attempting to launch {self.app_package} via ADB (monkey shell)"
         )
         try:
-            # Construct the command. Using self.device.serial if available,
-            # otherwise assumes only one device or ADB configured for a specific one.
-            cmd = ["adb"]
-            if hasattr(self.device, "serial") and self.device.serial:
-                cmd.extend(["-s", self.device.serial])
-            cmd.extend(
+            self.adb.shell(
                 [
-                    "shell",
                     "monkey",
                     "-p",
                     self.app_package,
                     "-c",
                     "android.intent.category.LAUNCHER",
                     "1",
-                ]
+                ],
+                timeout=15,
+                check=True,
             )
-            subprocess.run(
-                cmd, check=True, capture_output=True, text=True, timeout=15
-            )  # Added timeout
             self.logger.info(
                 f"✅ ADB monkey launch command executed for {self.app_package}"
             )
@@ -85,10 +206,6 @@ class InstagramInteractions:
             self.logger.error(
                 f"❌ ADB monkey launch failed for {self.app_package}: {e.stderr}"
             )
-        except FileNotFoundError:
-            self.logger.error(
-                "❌ ADB command not found. Ensure ADB is installed and in your PATH."
-            )
         except Exception as e:
             self.logger.error(f"❌ Unexpected error during ADB monkey launch: {e}")
         return False
@@ -122,6 +239,7 @@ class InstagramInteractions:
             )
             app_is_foreground = False
             app_launched_this_attempt = False
+            self.invalidate_snapshot()
 
             try:
                 # 1. Check current app and try to bring to foreground if already running
@@ -171,10 +289,10 @@ class InstagramInteractions:
                         # Or rely on package launch which is usually enough
                         component = f"{self.app_package}/.activity.MainTabActivity"  # Example, might need adjustment
                         try:
-                            subprocess.run(
-                                ["adb", "shell", "am", "start", "-n", component],
-                                check=True,
+                            self.adb.shell(
+                                ["am", "start", "-n", component],
                                 timeout=10,
+                                check=True,
                             )
                             time.sleep(3)  # Wait for app to initialize
                             app_launched_this_attempt = True
@@ -269,6 +387,7 @@ class InstagramInteractions:
 
         try:
             self.device.app_stop(pkg)
+            self.invalidate_snapshot()
             time.sleep(1)  # Allow time for process to terminate
 
             # Verify if stopped
@@ -278,13 +397,7 @@ class InstagramInteractions:
                     f"⚠️ uiautomator2 app_stop failed for {pkg}, falling back to ADB force-stop"
                 )
                 try:
-                    cmd = ["adb"]
-                    if hasattr(self.device, "serial") and self.device.serial:
-                        cmd.extend(["-s", self.device.serial])
-                    cmd.extend(["shell", "am", "force-stop", pkg])
-                    subprocess.run(
-                        cmd, check=True, capture_output=True, text=True, timeout=10
-                    )
+                    self.adb.shell(["am", "force-stop", pkg], timeout=10, check=True)
                     self.logger.debug(
                         f"✅ App {pkg} stopped via ADB force-stop fallback"
                     )
@@ -304,11 +417,6 @@ class InstagramInteractions:
                         f"❌ ADB force-stop command failed for {pkg}: {e.stderr}"
                     )
                     return False
-                except FileNotFoundError:
-                    self.logger.error(
-                        "❌ ADB command not found for force-stop fallback."
-                    )
-                    return False
             else:
                 self.logger.debug(f"✅ App {pkg} stopped successfully via uiautomator2")
 
@@ -334,12 +442,11 @@ class InstagramInteractions:
             bool: True if the element appears within the timeout, False otherwise.
         """
         self.logger.debug(f"Waiting up to {timeout}s for element to appear: {xpath}")
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.device.xpath(xpath).exists:
-                self.logger.debug(f"Element found: {xpath}")
-                return True
-            time.sleep(poll_interval)
+        if self.ui_changes.wait_until(
+            lambda snap: snap.exists(xpath), timeout, poll_interval=poll_interval
+        ):
+            self.logger.debug(f"Element found: {xpath}")
+            return True
         self.logger.debug(f"Timeout waiting for element: {xpath}")
         return False
 
@@ -358,18 +465,97 @@ class InstagramInteractions:
             bool: True if the element disappears within the timeout, False otherwise.
         """
         self.logger.debug(f"Waiting up to {timeout}s for element to vanish: {xpath}")
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if not self.device.xpath(xpath).exists:
-                self.logger.debug(f"Element vanished: {xpath}")
-                return True
-            time.sleep(poll_interval)
+        if self.ui_changes.wait_until(
+            lambda snap: not snap.exists(xpath), timeout, poll_interval=poll_interval
+        ):
+            self.logger.debug(f"Element vanished: {xpath}")
+            return True
         self.logger.debug(f"Timeout waiting for element to vanish: {xpath}")
         return False
 
+    def wait_for_any(
+        self,
+        candidates: Dict[str, str],
+        timeout: float = 10,
+        poll_interval: float = 0.5,
+    ) -> Tuple[Optional[str], Optional[SnapshotNode]]:
+        """
+        Waits until any of several named selectors appears. Each check (on start
+        and after every screen change) evaluates all candidates against a single
+        hierarchy snapshot.
+
+        Args:
+            candidates (Dict[str, str]): Mapping of name -> XPath. When several match
+                                         in the same snapshot, dict order wins.
+            timeout (float): Maximum time in seconds to wait. 0 checks exactly once.
+            poll_interval (float): Time in seconds between snapshots when screen-change
+                                   events are unavailable.
+
+        Returns:
+            Tuple[Optional[str], Optional[SnapshotNode]]: (name, node) of the first
+            match, or (None, None) on timeout.
+        """
+        self.logger.debug(
+            f"Waiting up to {timeout}s for any of: {list(candidates.keys())}"
+        )
+
+        def check(snap: UISnapshot):
+            name, node = snap.match_any(candidates)
+            return (name, node) if name is not None else None
+
+        match = self.ui_changes.wait_until(check, timeout, poll_interval=poll_interval)
+        if match:
+            name, node = match
+            self.logger.debug(f"Matched '{name}': {candidates[name]}")
+            return name, node
+        self.logger.debug(f"Timeout waiting for any of: {list(candidates.keys())}")
+        return None, None
+
+    @property
+    def selector_context(self) -> str:
+        """'<serial>|<package>|<versionName>' key for learned selector preferences."""
+        return get_selector_context(self.device, self.app_package)
+
+    def wait_for_chain(
+        self, chain: SelectorChain, timeout: float = 10, poll_interval: float = 0.5
+    ) -> Tuple[Optional[str], Optional[SnapshotNode]]:
+        """
+        Waits until any alternative of `chain` matches. All alternatives are
+        checked against each snapshot, the one that won last time for this
+        device/app version first, so a primary selector that never matches on
+        this clone costs nothing.
+
+        Returns:
+            Tuple[Optional[str], Optional[SnapshotNode]]: (label, node) of the
+            match, or (None, None) on timeout.
+        """
+        context = self.selector_context
+        match = self.ui_changes.wait_until(
+            lambda snap: chain.match(snap, context), timeout, poll_interval=poll_interval
+        )
+        if match:
+            self.logger.debug(f"'{chain.name}' matched via '{match[0]}'")
+            return match
+        self.logger.debug(f"Timeout waiting for '{chain.name}' ({list(chain.alternatives)})")
+        return None, None
+
+    def click_chain(self, chain: SelectorChain, timeout: float = 10) -> bool:
+        """Clicks the first matching alternative of `chain` (see wait_for_chain)."""
+        try:
+            label, node = self.wait_for_chain(chain, timeout=timeout)
+            if node is None:
+                return False
+            self.device.click(*node.center())
+            self.invalidate_snapshot()
+            self.logger.debug(f"Clicked '{chain.name}' via '{label}'")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error clicking '{chain.name}': {e}", exc_info=True)
+            return False
+
     def element_exists(self, xpath: str) -> bool:
         """Checks if an element exists without waiting."""
-        exists = self.device.xpath(xpath).exists
+        exists = self.snapshot().exists(xpath)
         self.logger.debug(f"Checking existence of '{xpath}': {exists}")
         return exists
 
@@ -386,13 +572,11 @@ class InstagramInteractions:
         """
         self.logger.debug(f"Attempting to click element: {xpath}")
         try:
-            element = self.device.xpath(xpath)
-            if element.wait(timeout=timeout):
-                # Using uiautomator2's built-in click which handles more cases
-                element.click()
-                # Optional: ADB click as fallback or if u2 click fails for specific elements
-                # center = element.center()
-                # self.device.click(*center)
+            node = self._wait_for_node(xpath, timeout=timeout)
+            if node is not None:
+                # Click the center from the snapshot instead of re-dumping via u2
+                self.device.click(*node.center())
+                self.invalidate_snapshot()
                 self.logger.debug(f"Clicked element via XPath: {xpath}")
                 return True
             else:
@@ -421,9 +605,10 @@ class InstagramInteractions:
         """
         self.logger.debug(f"Checking and clicking if exists: {xpath}")
         try:
-            element = self.device.xpath(xpath)
-            if element.wait(timeout=timeout):
-                element.click()
+            node = self._wait_for_node(xpath, timeout=timeout)
+            if node is not None:
+                self.device.click(*node.center())
+                self.invalidate_snapshot()
                 self.logger.debug(f"Clicked optional element: {xpath}")
                 return True
             else:
@@ -458,6 +643,7 @@ class InstagramInteractions:
                     element.clear_text()
                     time.sleep(0.2)  # Short pause after clearing
                 element.set_text(text)
+                self.invalidate_snapshot()
                 # Verification (optional but recommended)
                 # entered_text = element.get_text()
                 # if entered_text == text:
@@ -488,9 +674,9 @@ class InstagramInteractions:
         """Gets the text content of an element."""
         self.logger.debug(f"Getting text from: {xpath}")
         try:
-            element = self.device.xpath(xpath)
-            if element.wait(timeout=timeout):
-                return element.get_text()
+            node = self._wait_for_node(xpath, timeout=timeout)
+            if node is not None:
+                return node.text
             else:
                 self.logger.debug(f"Element not found for get_text: {xpath}")
                 return None
@@ -504,10 +690,10 @@ class InstagramInteractions:
         """Gets a specific attribute value of an element."""
         self.logger.debug(f"Getting attribute '{attribute}' from: {xpath}")
         try:
-            element = self.device.xpath(xpath)
-            if element.wait(timeout=timeout):
-                # uiautomator2 uses .info dictionary for attributes
-                return element.info.get(attribute)
+            node = self._wait_for_node(xpath, timeout=timeout)
+            if node is not None:
+                # Same keys as uiautomator2's .info, read from the cached dump
+                return node.info.get(attribute)
             else:
                 self.logger.debug(f"Element not found for get_attribute: {xpath}")
                 return None
@@ -518,6 +704,47 @@ class InstagramInteractions:
             )
             return None
 
+    def extract_fields(
+        self,
+        spec: Dict[str, FieldSpec],
+        ready_xpath: Optional[str] = None,
+        timeout: float = 2,
+        poll_interval: float = 0.25,
+    ) -> Dict[str, Any]:
+        """
+        Reads many element values from a single hierarchy snapshot.
+
+        Waits once (up to `timeout`) for `ready_xpath` - or, if not given, for
+        any field in the spec - to appear, then extracts every field from that
+        same snapshot, so absent fields cost nothing extra.
+
+        Args:
+            spec (Dict[str, FieldSpec]): Mapping of field name -> FieldSpec.
+            ready_xpath (Optional[str]): Element that marks the screen as loaded.
+            timeout (float): Maximum time in seconds to wait for the screen.
+            poll_interval (float): Time in seconds between snapshots while waiting.
+
+        Returns:
+            Dict[str, Any]: Field name -> value (None / False when not found).
+        """
+        if ready_xpath:
+            ready = self._wait_for_node(
+                ready_xpath, timeout=timeout, poll_interval=poll_interval
+            )
+        else:
+            ready = self.wait_for_any(
+                {name: f.xpath for name, f in spec.items()},
+                timeout=timeout,
+                poll_interval=poll_interval,
+            )[1]
+        if ready is None:
+            self.logger.debug(f"Screen not ready after {timeout}s; extracting anyway")
+        try:
+            return self.snapshot().extract(spec)
+        except Exception as e:
+            self.logger.error(f"Error extracting fields {list(spec)}: {e}", exc_info=True)
+            return {name: None for name in spec}
+
     # --- Human-like Gestures (using SwipeHelper) ---
 
     def scroll_up_humanlike(self, intensity="medium"):
@@ -572,15 +799,16 @@ class InstagramInteractions:
         """
         self.logger.info(f"👀 Simulating peek on element: {element_xpath}")
         try:
-            element_to_peek = self.device.xpath(element_xpath)
-            if not element_to_peek.wait(timeout=tap_timeout):
+            element_to_peek = self._wait_for_node(element_xpath, timeout=tap_timeout)
+            if element_to_peek is None:
                 self.logger.warning(
                     f"⚠️ Element not found for peeking within {tap_timeout}s: {element_xpath}"
                 )
                 return False
 
             # Use direct click after wait confirms presence
-            element_to_peek.click()
+            self.device.click(*element_to_peek.center())
+            self.invalidate_snapshot()
             self.logger.debug(f"Element clicked: {element_xpath}")
 
             view_duration = random.uniform(min_view_duration, max_view_duration)
@@ -589,6 +817,7 @@ class InstagramInteractions:
 
             self.logger.debug("Pressing back button...")
             self.device.press("back")
+            self.invalidate_snapshot()
             time.sleep(0.5)  # Short delay for UI to settle after back press
             self.logger.info(f"✅ Peek successful for: {element_xpath}")
             return True
@@ -602,6 +831,7 @@ class InstagramInteractions:
             try:
                 self.logger.info("Attempting to press back after peek exception...")
                 self.device.press("back")
+                self.invalidate_snapshot()
                 time.sleep(0.5)
             except Exception as back_e:
                 self.logger.error(
@@ -653,8 +883,8 @@ class InstagramInteractions:
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
-                # Get all potential containers in the grid
-                elements = self.device.xpath(grid_xpath).all()
+                # Get all potential containers in the grid (one dump per poll)
+                elements = self.snapshot().find(grid_xpath)
 
                 if not elements:
                     self.logger.debug(f"Gallery grid appears empty, waiting...")
@@ -667,12 +897,15 @@ class InstagramInteractions:
                         # Using .xpath() on the element object searches within its subtree
                         thumbnail_indicator = container.xpath(loaded_thumb_sub_xpath)
                         if (
-                            thumbnail_indicator.exists
+                            thumbnail_indicator
                         ):  # Check existence within the container
                             self.logger.info(
                                 f"🎯 Found loaded video thumbnail at index {idx}. Clicking container."
                             )
-                            container.click()  # Click the parent container
+                            self.device.click(
+                                *container.center()
+                            )  # Click the parent container
+                            self.invalidate_snapshot()
                             # Add a wait here for the *next* screen (e.g., editor screen 'Add audio' button)
                             # if self.wait_for_element_appear(self.xpath_config.add_audio_text_or_desc_general, timeout=15):
                             #     return True
@@ -725,26 +958,25 @@ class InstagramInteractions:
         profile_xpath = f"//android.widget.ImageView[contains(@content-desc, 'Profile picture of {username}') or contains(@content-desc, '{username}')]"
         insights_xpath = self.xpath_config.reel_viewer_insights_pill
 
-        self.logger.info(f"🔍 Waiting up to {timeout}s to verify Reel post appears...")
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            # Check conditions in order of likelihood or preference
-            if self.element_exists(caption_xpath):
-                self.logger.info("✅ Caption detected in reel view.")
-                return True
-            if self.element_exists(insights_xpath):
-                self.logger.info("✅ Reel insights pill detected.")
-                return True
-            if self.element_exists(profile_xpath):
-                self.logger.info(
-                    "✅ Username profile picture detected in posted reel view."
-                )
-                return True
+        confirmations = {
+            "caption": caption_xpath,
+            "insights": insights_xpath,
+            "profile": profile_xpath,
+        }
+        messages = {
+            "caption": "✅ Caption detected in reel view.",
+            "insights": "✅ Reel insights pill detected.",
+            "profile": "✅ Username profile picture detected in posted reel view.",
+        }
 
-            self.logger.debug(
-                "⏳ Post confirmation elements not found yet, polling again..."
-            )
-            time.sleep(poll_interval)
+        self.logger.info(f"🔍 Waiting up to {timeout}s to verify Reel post appears...")
+        # Check conditions in order of likelihood or preference, one dump per poll
+        matched, _ = self.wait_for_any(
+            confirmations, timeout=timeout, poll_interval=poll_interval
+        )
+        if matched:
+            self.logger.info(messages[matched])
+            return True
 
         self.logger.error(
             f"❌ Reel post verification failed: Confirmation elements not found after {timeout} seconds."
@@ -762,7 +994,7 @@ class InstagramInteractions:
         try:
             # Method 1: Story Avatar (usually reliable on home screen)
             story_avatar_xpath = self.xpath_config.story_avatar
-            elements = self.device.xpath(story_avatar_xpath).all()
+            elements = self.snapshot().find(story_avatar_xpath)
             self.logger.debug(
                 f"Found {len(elements)} elements matching story avatar XPath."
             )
@@ -792,9 +1024,9 @@ class InstagramInteractions:
             profile_title_xpath = self.xpath_config.action_bar_large_title_auto_size
             # We might need to navigate to the profile tab first if not already there
             # self.navigate_to_profile_tab() # Assuming such a method exists
-            profile_element = self.device.xpath(profile_title_xpath)
-            if profile_element.wait(timeout=5):  # Wait briefly for profile title
-                profile_username = profile_element.get_text()
+            profile_element = self._wait_for_node(profile_title_xpath, timeout=5)
+            if profile_element is not None:  # Wait briefly for profile title
+                profile_username = profile_element.text
                 if profile_username:
                     self.logger.info(
                         f"✅ Fallback: Found username from profile page title: {profile_username}"
@@ -945,64 +1177,23 @@ class InstagramInteractions:
         self.logger.info(
             f"Attempting smart click on button matching text: {text_patterns}"
         )
-        start_time = time.time()
-
-        # Construct a combined XPath for text matching (more efficient)
-        text_conditions = " or ".join(
-            [
-                f"contains(translate(@text, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{p.lower()}')"
-                for p in text_patterns
-            ]
+        alternatives = {
+            "text": lambda snap: next(
+                iter(snap.find_text(text_patterns, tag="android.widget.Button")), None
+            )
+        }
+        if fallback_xpath:
+            alternatives["fallback"] = fallback_xpath
+        chain = SelectorChain(
+            f"smart_button:{'|'.join(text_patterns)}|{fallback_xpath or ''}", alternatives
         )
-        text_xpath = f"//android.widget.Button[{text_conditions}]"
-        self.logger.debug(f"Constructed text XPath: {text_xpath}")
-
-        while time.time() - start_time < timeout:
-            # Try text match first
-            try:
-                button = self.device.xpath(text_xpath)
-                if button.exists:
-                    self.logger.info(f"Found button via text match: {text_patterns}")
-                    # Use click_exists for safety after finding
-                    if button.click_exists(timeout=1):
-                        self.logger.info(
-                            f"✅ Successfully clicked button using text: {text_patterns}"
-                        )
-                        return True
-                    else:
-                        self.logger.warning(f"Found button via text, but click failed.")
-                        # Continue loop in case it becomes clickable later or fallback works
 
-            except Exception as e_text:
-                self.logger.warning(
-                    f"Error checking text XPath '{text_xpath}': {e_text}"
-                )  # Log error but continue
-
-            # Try fallback if specified and text hasn't worked yet
-            if fallback_xpath:
-                try:
-                    fb_button = self.device.xpath(fallback_xpath)
-                    if fb_button.exists:
-                        self.logger.info(f"Trying fallback XPath: {fallback_xpath}")
-                        if fb_button.click_exists(timeout=1):
-                            self.logger.info(
-                                f"✅ Successfully clicked button using fallback XPath"
-                            )
-                            return True
-                        else:
-                            self.logger.warning(
-                                f"Found button via fallback, but click failed."
-                            )
-                except Exception as e_fallback:
-                    self.logger.warning(
-                        f"Error checking fallback XPath '{fallback_xpath}': {e_fallback}"
-                    )
-
-            # Wait before next iteration
-            if (
-                time.time() - start_time < timeout - 0.5
-            ):  # Avoid sleep if timeout is very close
-                time.sleep(0.5)
+        # Text and fallback are checked in the same snapshot, learned winner first
+        if self.click_chain(chain, timeout=timeout):
+            self.logger.info(
+                f"✅ Successfully clicked button matching {text_patterns} or fallback"
+            )
+            return True
 
         self.logger.error(
             f"❌ Failed to click button matching '{text_patterns}' or fallback '{fallback_xpath}' within {timeout}s."
@@ -1029,10 +1220,20 @@ class InstagramInteractions:
         self.logger.debug(
             f"Attempting click with fallback. Primary XPath: {primary_xpath}, Fallback Coords: {fallback_coords}"
         )
+        preferences = get_selector_preferences()
+        chain_name = f"click_with_fallback:{primary_xpath}"
+        context = self.selector_context
         try:
+            # If the coordinates won last time on this device/app version, give
+            # the XPath a single look instead of waiting out its full timeout
+            xpath_timeout = timeout
+            if fallback_coords and preferences.preferred(context, chain_name) == "coords":
+                xpath_timeout = 0
+
             # Try clicking the primary XPath
-            if self.click_by_xpath(primary_xpath, timeout=timeout):
+            if self.click_by_xpath(primary_xpath, timeout=xpath_timeout):
                 self.logger.info(f"Clicked element via primary XPath: {primary_xpath}")
+                preferences.record(context, chain_name, "xpath")
                 return True
             else:
                 self.logger.warning(
@@ -1045,7 +1246,9 @@ class InstagramInteractions:
                 try:
                     x, y = fallback_coords
                     self.device.click(x, y)
+                    self.invalidate_snapshot()
                     self.logger.info(f"Clicked fallback coordinates: ({x}, {y})")
+                    preferences.record(context, chain_name, "coords")
                     return True
                 except Exception as coord_e:
                     self.logger.error(
@@ -1094,17 +1297,18 @@ class InstagramInteractions:
 
             for i, icon_xpath in enumerate(possible_xpaths):
                 self.logger.debug(f"Trying strategy {i+1}: {icon_xpath}")
-                selector = self.device.xpath(icon_xpath)
-                if selector.exists:
+                snapshot = self.snapshot()
+                selector = snapshot.first(icon_xpath)
+                if selector is not None:
                     # Prioritize elements with relevant content descriptions if possible
                     info = selector.info
-                    desc = info.get("contentDescription", "").lower()
-                    text = info.get("text", "").lower()
+                    desc = (info.get("contentDescription") or "").lower()
+                    text = (info.get("text") or "").lower()
                     if "show" in desc or "show" in text or "password" in desc:
                         self.logger.info(
                             f"Found likely show password button via strategy {i+1} (desc='{desc}', text='{text}')"
                         )
-                        if selector.click_exists(timeout=1):
+                        if self.click_if_exists(icon_xpath, timeout=1):
                             self.logger.info("✅ Clicked show password button.")
                             time.sleep(0.5)  # Allow UI to update
                             return True
@@ -1115,12 +1319,12 @@ class InstagramInteractions:
                     # If no description match, but it's the only sibling button/image, click it
                     elif (
                         len(possible_xpaths) == i + 1
-                        or not self.device.xpath(possible_xpaths[i + 1]).exists
+                        or not snapshot.exists(possible_xpaths[i + 1])
                     ):
                         self.logger.info(
                             f"Found button/image via strategy {i+1}, clicking as likely candidate."
                         )
-                        if selector.click_exists(timeout=1):
+                        if self.click_if_exists(icon_xpath, timeout=1):
                             self.logger.info("✅ Clicked likely show password button.")
                             time.sleep(0.5)
                             return True
@@ -1165,6 +1369,7 @@ class InstagramInteractions:
                 f"👆 Tapping {label} randomly at ({x}, {y}) within bounds [{left},{top}][{right},{bottom}]"
             )
             self.device.click(x, y)
+            self.invalidate_snapshot()
             return True
         except KeyError:
             self.logger.error(f"Invalid bounds dictionary for {label}: {bounds}")
@@ -1193,8 +1398,8 @@ class InstagramInteractions:
         """
         self.logger.debug(f"Attempting random tap within {label}: {xpath}")
         try:
-            el = self.device.xpath(xpath)
-            if not el.wait(timeout=timeout):
+            el = self._wait_for_node(xpath, timeout=timeout)
+            if el is None:
                 self.logger.warning(f"{label} not found for random tap: {xpath}")
                 return False
 
@@ -1207,6 +1412,7 @@ class InstagramInteractions:
                 if center:
                     self.logger.info(f"Tapping center of {label} as fallback.")
                     self.device.click(*center)
+                    self.invalidate_snapshot()
                     return True
                 else:
                     self.logger.error(f"Cannot get bounds or center for {label}")
@@ -1223,7 +1429,7 @@ class InstagramInteractions:
 
     def find_element_by_keyword(
         self, keywords: list[str], element_type: str = "*", timeout: int = 5
-    ) -> Optional[u2.xpath.XPathSelector]:
+    ) -> Optional[SnapshotNode]:
         """
         Searches for an element containing any of the keywords in its text or content-desc.
         More efficient than iterating through all elements.
@@ -1234,7 +1440,7 @@ class InstagramInteractions:
             timeout (int): Time to wait for a matching element to appear.
 
         Returns:
-            Optional[u2.xpath.XPathSelector]: The selector if found, None otherwise.
+            Optional[SnapshotNode]: The first matching node (click via .center()), None otherwise.
         """
         self.logger.info(
             f"Searching for {element_type} containing keywords: {keywords}"
@@ -1242,39 +1448,23 @@ class InstagramInteractions:
         if not keywords:
             return None
 
-        # Create case-insensitive 'contains' conditions for text and content-desc
-        conditions = []
-        for kw in keywords:
-            kw_lower = kw.lower().replace("'", "\\'")  # Escape single quotes for XPath
-            conditions.append(
-                f"contains(translate(@text, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{kw_lower}')"
-            )
-            conditions.append(
-                f"contains(translate(@contentDescription, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{kw_lower}')"
-            )
-
-        # Combine conditions with 'or'
-        full_condition = " or ".join(conditions)
-        xpath = f"//{element_type}[{full_condition}]"
-        self.logger.debug(f"Constructed keyword search XPath: {xpath}")
-
+        # Keyword-index lookup per snapshot instead of a translate() XPath
         try:
-            element = self.device.xpath(xpath)
-            if element.wait(timeout=timeout):
-                self.logger.info(
-                    f"✅ Found element matching keywords via XPath: {xpath}"
-                )
-                return element
-            else:
-                self.logger.info(
-                    f"No element found matching keywords within {timeout}s."
-                )
-                return None
+            node = self.ui_changes.wait_until(
+                lambda snap: next(iter(snap.find_text(keywords, tag=element_type)), None),
+                timeout=timeout,
+                poll_interval=0.25,
+            )
         except Exception as e:
             self.logger.error(
                 f"Error during find_element_by_keyword: {e}", exc_info=True
             )
             return None
+        if node is not None:
+            self.logger.info(f"✅ Found element matching keywords: {node}")
+        else:
+            self.logger.info(f"No element found matching keywords within {timeout}s.")
+        return node
 
     # --- Page Detection Methods (from PageDetector logic) ---
     # NOTE: Add corresponding XPaths to Shared/xpath_config.py
@@ -1283,21 +1473,27 @@ class InstagramInteractions:
         """Checks if the current screen looks like the main Home feed."""
         # Example: Check for the Home tab selector or the main feed container
         xpath = self.xpath_config.home_page_indicator  # Define this in xpath_config
-        exists = self.device.xpath(xpath).wait(timeout=timeout)
+        exists = self.wait_for_element_appear(
+            xpath, timeout=timeout, poll_interval=0.25
+        )
         self.logger.debug(f"Checking for Home Page ({xpath}): {exists}")
         return exists
 
     def is_on_explore_page(self, timeout: int = 1) -> bool:
         """Checks if the current screen looks like the Explore page."""
         xpath = self.xpath_config.explore_page_indicator  # Define this in xpath_config
-        exists = self.device.xpath(xpath).wait(timeout=timeout)
+        exists = self.wait_for_element_appear(
+            xpath, timeout=timeout, poll_interval=0.25
+        )
         self.logger.debug(f"Checking for Explore Page ({xpath}): {exists}")
         return exists
 
     def is_on_reels_page(self, timeout: int = 1) -> bool:
         """Checks if the current screen looks like the Reels feed."""
         xpath = self.xpath_config.reels_page_indicator  # Define this in xpath_config
-        exists = self.device.xpath(xpath).wait(timeout=timeout)
+        exists = self.wait_for_element_appear(
+            xpath, timeout=timeout, poll_interval=0.25
+        )
         self.logger.debug(f"Checking for Reels Page ({xpath}): {exists}")
         return exists
 
@@ -1305,7 +1501,9 @@ class InstagramInteractions:
         """Checks if the current screen looks like the user's own Profile page."""
         # Could check for "Edit profile" button or specific profile header elements
         xpath = self.xpath_config.profile_page_indicator  # Define this in xpath_config
-        exists = self.device.xpath(xpath).wait(timeout=timeout)
+        exists = self.wait_for_element_appear(
+            xpath, timeout=timeout, poll_interval=0.25
+        )
         self.logger.debug(f"Checking for Profile Page ({xpath}): {exists}")
         return exists
 
@@ -1314,7 +1512,9 @@ class InstagramInteractions:
         xpath = (
             self.xpath_config.notifications_page_indicator
         )  # Define this in xpath_config
-        exists = self.device.xpath(xpath).wait(timeout=timeout)
+        exists = self.wait_for_element_appear(
+            xpath, timeout=timeout, poll_interval=0.25
+        )
         self.logger.debug(f"Checking for Notifications Page ({xpath}): {exists}")
         return exists
 
@@ -1323,24 +1523,27 @@ class InstagramInteractions:
         Attempts to detect the current major page/tab the user is on.
 
         Args:
-            timeout_per_check (int): Short timeout for each individual page check.
+            timeout_per_check (int): Total time to wait for any page indicator to appear.
 
         Returns:
             str: Name of the detected page ('home', 'explore', 'reels', 'profile', 'notifications', 'unknown').
         """
         self.logger.info("Detecting current page...")
-        # Check in a likely order
-        if self.is_on_home_page(timeout=timeout_per_check):
-            return "home"
-        if self.is_on_reels_page(timeout=timeout_per_check):
-            return "reels"
-        if self.is_on_explore_page(timeout=timeout_per_check):
-            return "explore"
-        if self.is_on_profile_page(timeout=timeout_per_check):
-            return "profile"
-        if self.is_on_notifications_page(timeout=timeout_per_check):
-            return "notifications"
+        # Check in a likely order; all indicators share one dump per poll
+        indicators = {
+            "home": self.xpath_config.home_page_indicator,
+            "reels": self.xpath_config.reels_page_indicator,
+            "explore": self.xpath_config.explore_page_indicator,
+            "profile": self.xpath_config.profile_page_indicator,
+            "notifications": self.xpath_config.notifications_page_indicator,
+        }
         # Add checks for other important pages like DMs, New Post screen, etc. if needed
+        page, _ = self.wait_for_any(
+            indicators, timeout=timeout_per_check, poll_interval=0.25
+        )
+        if page:
+            self.logger.debug(f"Detected current page: {page}")
+            return page
 
         self.logger.warning(
             "❓ Could not determine current page based on known indicators."
@@ -1359,28 +1562,23 @@ class InstagramInteractions:
         try:
             if action == "tap_to_pause_resume":
                 # Tap near the center of the screen
-                display_info = self.device.info
-                width, height = (
-                    display_info["displayWidth"],
-                    display_info["displayHeight"],
-                )
+                profile = self.device_profile
+                width, height = profile.width, profile.height
                 x = random.randint(int(width * 0.4), int(width * 0.6))
                 y = random.randint(int(height * 0.4), int(height * 0.6))
                 self.device.click(x, y)
+                self.invalidate_snapshot()
                 self.logger.debug(f"Light interaction: Tapped near center ({x},{y})")
 
             elif action == "mini_horizontal_scrub":
                 # Perform a small horizontal swipe using SwipeHelper
-                display_info = self.device.info
-                width, height = (
-                    display_info["displayWidth"],
-                    display_info["displayHeight"],
-                )
+                profile = self.device_profile
+                width, height = profile.width, profile.height
                 x_start = random.randint(int(width * 0.3), int(width * 0.5))
                 y = random.randint(
                     int(height * 0.6), int(height * 0.8)
                 )  # Lower part of screen
-                offset = random.randint(30, 80) * random.choice(
+                offset = profile.sx(random.randint(30, 80)) * random.choice(
                     [-1, 1]
                 )  # Small left/right swipe
                 x_end = x_start + offset
@@ -1388,20 +1586,15 @@ class InstagramInteractions:
                 # self.swipe_humanlike((x_start, y), (x_end, y), duration=random.randint(50, 150), intensity="gentle")
                 # Or direct swipe if SwipeHelper isn't used for this:
                 self.device.swipe(x_start, y, x_end, y, duration=0.05)  # Short duration
+                self.invalidate_snapshot()
                 self.logger.debug(
                     f"Light interaction: Mini horizontal scrub from {x_start} to {x_end} at y={y}"
                 )
 
             elif action == "minor_volume_change":
-                # Use ADB shell command to press volume key
+                # Use ADB shell command to press volume key (via the shared executor)
                 key = random.choice(["KEYCODE_VOLUME_UP", "KEYCODE_VOLUME_DOWN"])
-                cmd = ["adb"]
-                if hasattr(self.device, "serial") and self.device.serial:
-                    cmd.extend(["-s", self.device.serial])
-                cmd.extend(["shell", "input", "keyevent", key])
-                subprocess.run(
-                    cmd, check=True, capture_output=True, text=True, timeout=5
-                )
+                self.adb.shell(["input", "keyevent", key], timeout=5, check=True)
                 self.logger.debug(f"Light interaction: Sent {key}")
 
         except Exception as e:
@@ -1423,8 +1616,8 @@ class InstagramInteractions:
         self.logger.info("Attempting to like current post/reel...")
         like_xpath = self.xpath_config.like_button_desc  # Define in xpath_config
         try:
-            like_button = self.device.xpath(like_xpath)
-            if not like_button.wait(timeout=timeout):
+            like_button = self._wait_for_node(like_xpath, timeout=timeout)
+            if like_button is None:
                 self.logger.warning(
                     f"Like button not found within {timeout}s: {like_xpath}"
                 )
@@ -1451,16 +1644,16 @@ class InstagramInteractions:
 
             # Verify if the button state changed to 'selected'
             # Re-find the element to get updated info
-            like_button_after = self.device.xpath(like_xpath)
-            if like_button_after.exists:
+            like_button_after = self.snapshot().first(like_xpath)
+            if like_button_after is not None:
                 # Check the 'selected' attribute in the element's info
-                is_selected = like_button_after.info.get("selected", False)
+                is_selected = like_button_after.info.get("selected") == "true"
                 if is_selected:
                     self.logger.info("❤️ Like successful and verified.")
                     return True
                 else:
                     # Check if the contentDescription changed to "Unlike"
-                    desc = like_button_after.info.get("contentDescription", "")
+                    desc = like_button_after.info.get("contentDescription") or ""
                     if "unlike" in desc.lower():
                         self.logger.info(
                             "❤️ Like successful (verified by 'Unlike' description)."
@@ -1509,11 +1702,11 @@ class InstagramInteractions:
 
             # Perform a small swipe up (scroll down comments slightly)
             # Using swipe_humanlike if available, otherwise basic swipe
-            display_info = self.device.info
-            width, height = display_info["displayWidth"], display_info["displayHeight"]
-            x = int(width * 0.5) + random.randint(-30, 30)
-            y_start = int(height * 0.8) + random.randint(-50, 50)
-            y_end = int(height * 0.5) + random.randint(-50, 50)
+            profile = self.device_profile
+            width, height = profile.width, profile.height
+            x = int(width * 0.5) + profile.sx(random.randint(-30, 30))
+            y_start = int(height * 0.8) + profile.sy(random.randint(-50, 50))
+            y_end = int(height * 0.5) + profile.sy(random.randint(-50, 50))
             self.swipe_humanlike(
                 (x, y_start),
                 (x, y_end),
@@ -1528,6 +1721,7 @@ class InstagramInteractions:
             # Press back to close comments
             self.logger.debug("Pressing back to close comments.")
             self.device.press("back")
+            self.invalidate_snapshot()
             time.sleep(random.uniform(0.5, 1.0))  # Wait for UI to settle
 
             # Optional: Verify comments are closed by checking if comment button is visible again
@@ -1551,6 +1745,7 @@ class InstagramInteractions:
                     "Attempting back press after comment simulation exception..."
                 )
                 self.device.press("back")
+                self.invalidate_snapshot()
             except Exception as back_e:
                 self.logger.error(f"Failed to press back after exception: {back_e}")
             return False
@@ -1590,6 +1785,7 @@ class InstagramInteractions:
             )
             try:
                 self.device.press("back")
+                self.invalidate_snapshot()
                 time.sleep(random.uniform(0.8, 1.2))
             except Exception as e:
                 self.logger.error(f"Failed to execute system back press: {e}")
@@ -1615,6 +1811,7 @@ class InstagramInteractions:
                     )
                     try:
                         self.device.press("back")
+                        self.invalidate_snapshot()
                         time.sleep(random.uniform(0.8, 1.2))
                         if self.wait_for_element_vanish(
                             verify_xpath, timeout=2
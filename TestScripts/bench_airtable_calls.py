@@ -0,0 +1,316 @@
+# TestScripts/bench_airtable_calls.py
+"""
+Counts the Airtable HTTP calls of a simulated posting day and warmup day,
+run through Shared/Data/airtable_manager.py against the local fake server
+(TestScripts/fake_airtable_server.py), and fails if either day needs more
+calls than its budget. Catches regressions in call volume (lost batching,
+a read that bypasses the mirror, a page size that went back to default)
+before they cost real quota.
+
+Leftovers: a crashed run left updates in the outbox; today's reads must
+send them first and never return those records.
+Posting day: read today's scheduled posts, mark `--failures` of them as
+'Something Went Wrong', queue the 'Posted' update for the rest.
+Async posting day: the same posting day through AsyncAirtableClient, all
+updates sent concurrently; also checks its bound on requests in flight.
+Warmup day: read pending warmup accounts (full mirror load), queue one
+result per account, read again (must be served locally), then delta-sync
+the mirror as the next run would and check only the failed accounts are
+still pending.
+
+Usage (from the project root):
+    python -m TestScripts.bench_airtable_calls
+    python -m TestScripts.bench_airtable_calls --posts 40 --accounts 60 --throttle-every 5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+import pytz
+
+from Shared.config_loader import get_config_section, load_yaml_config
+from Shared.Data.airtable_async import AsyncAirtableClient
+from Shared.Data.airtable_manager import (
+    PENDING_WARMUP_WHERE,
+    WARMUP_FIELDS,
+    AirtableClient,
+    get_airtable_client,
+)
+from Shared.Data.airtable_mirror import get_airtable_mirror
+from Shared.Data.airtable_outbox import _SCHEMA, drain_airtable_outbox
+from TestScripts.fake_airtable_server import FakeAirtable, FakeAirtableServer
+
+CONTENT_BASE, CONTENT_TABLE = "appBenchContent", "tblBenchContent"
+ACCOUNTS_BASE, WARMUP_TABLE = "appBenchAccounts", "tblBenchWarmup"
+LEFTOVER_TABLE = "tblBenchLeftover"
+ASYNC_TABLE = "tblBenchAsync"
+ASYNC_MAX_CONCURRENCY = 4
+LIST_PAGE_SIZE = 100  # Airtable's (and pyairtable's default) page size
+
+
+def _pages(rows: int) -> int:
+    return max(1, math.ceil(rows / LIST_PAGE_SIZE))
+
+
+def seed(fake: FakeAirtable, posts: int, accounts: int):
+    today = datetime.now(pytz.timezone("America/Bogota")).date()
+    content = [
+        {"Username": f"poster{i}", "Schedule Date": today.isoformat(),
+         "Drive URL": f"https://example.invalid/{i}.mp4", "Package Name": ["com.instagram.android"]}
+        for i in range(posts)
+    ]
+    # Noise the filters must keep out: other days, already posted
+    content += [
+        {"Username": f"later{i}", "Schedule Date": (today + timedelta(days=1 + i % 3)).isoformat()}
+        for i in range(posts)
+    ]
+    content += [
+        {"Username": f"done{i}", "Schedule Date": today.isoformat(), "Posted?": True}
+        for i in range(posts // 2)
+    ]
+    fake.add_table(CONTENT_BASE, CONTENT_TABLE, content, views={"Unposted": "NOT({Posted?})"})
+    fake.add_table(CONTENT_BASE, ASYNC_TABLE, content, views={"Unposted": "NOT({Posted?})"})
+
+    warmup = [
+        {"Username": [f"acct{i}"], "Device ID": [f"device{i % 8}"],
+         "Package Name": [f"com.instagram.android{i}"], "Status": "Warmup"}
+        for i in range(accounts)
+    ]
+    warmup += [{"Username": [f"done{i}"], "Status": "Warmup", "Daily Warmup Complete": True} for i in range(accounts // 4)]
+    warmup += [{"Username": [f"banned{i}"], "Status": "Banned"} for i in range(accounts // 4)]
+    fake.add_table(ACCOUNTS_BASE, WARMUP_TABLE, warmup, views={"Warmup": "{Status} = 'Warmup'"})
+
+
+def leftovers(fake: FakeAirtable, cache_dir: str):
+    """
+    A crashed run left one sendable and one parked update per table in the
+    outbox. The next run's work-queue reads must send the first and skip
+    both records, so nothing is posted or warmed up twice.
+    """
+    today = datetime.now(pytz.timezone("America/Bogota")).date().isoformat()
+    posts = fake.add_table(
+        CONTENT_BASE, LEFTOVER_TABLE,
+        [{"Username": f"leftover{i}", "Schedule Date": today} for i in range(3)],
+        views={"Unposted": "NOT({Posted?})"},
+    )
+    accounts = fake.add_table(
+        ACCOUNTS_BASE, LEFTOVER_TABLE,
+        [{"Username": [f"leftover{i}"], "Status": "Warmup"} for i in range(3)],
+        views={"Warmup": "{Status} = 'Warmup'"},
+    )
+    max_attempts = (get_config_section("airtable_outbox", default={}) or {}).get("max_attempts", 8)
+    conn = sqlite3.connect(os.path.join(cache_dir, "airtable_outbox.sqlite3"))
+    with conn:
+        conn.execute(_SCHEMA)
+        for base_id, ids, fields in (
+            (CONTENT_BASE, posts, {"Posted?": True}),
+            (ACCOUNTS_BASE, accounts, {"Daily Warmup Complete": True}),
+        ):
+            for record_id, attempts in ((ids[0], 0), (ids[1], max_attempts)):
+                conn.execute(
+                    "INSERT INTO pending_updates (base_id, table_id, record_id, fields, enqueued_at, attempts)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (base_id, LEFTOVER_TABLE, record_id, json.dumps(fields), time.time(), attempts),
+                )
+    conn.close()
+
+    unposted = AirtableClient(base_id=CONTENT_BASE, table_id=LEFTOVER_TABLE, view_name="Unposted")
+    warmup = get_airtable_client(base_id=ACCOUNTS_BASE, table_id=LEFTOVER_TABLE)
+    got_posts = [r["id"] for r in unposted.get_unposted_records_for_today(max_count=3)]
+    got_accounts = [r["record_id"] for r in warmup.get_pending_warmup_records()]
+
+    problems = []
+    if got_posts != posts[2:]:
+        problems.append(f"unposted read returned {got_posts}, expected only {posts[2:]}")
+    if got_accounts != accounts[2:]:
+        problems.append(f"warmup read returned {got_accounts}, expected only {accounts[2:]}")
+    sent = [
+        r["id"] for r in fake.records(CONTENT_BASE, LEFTOVER_TABLE) + fake.records(ACCOUNTS_BASE, LEFTOVER_TABLE)
+        if r["fields"].get("Posted?") or r["fields"].get("Daily Warmup Complete")
+    ]
+    if sorted(sent) != sorted([posts[0], accounts[0]]):
+        problems.append(f"leftover updates on the server: {sent}")
+    # One batch per base for the leftovers, one list per read
+    return 4, problems
+
+
+def posting_day(fake: FakeAirtable, posts: int, failures: int):
+    client = get_airtable_client(table_key="content_alexis")
+    records = client.get_unposted_records_for_today(max_count=posts)
+    for i, record in enumerate(records):
+        if i < failures:
+            client.mark_something_went_wrong_and_rotate(record["id"])
+        else:
+            client.enqueue_record_update(record["id"], {"Posted?": True, "Status": "Posted"})
+    drained = drain_airtable_outbox(timeout=60)
+
+    rows = fake.records(CONTENT_BASE, CONTENT_TABLE)
+    posted = sum(1 for r in rows if r["fields"].get("Status") == "Posted")
+    flagged = sum(1 for r in rows if r["fields"].get("Something Went Wrong"))
+    problems = []
+    if len(records) != posts:
+        problems.append(f"read {len(records)} of {posts} scheduled posts")
+    if not drained or posted != posts - failures or flagged != failures:
+        problems.append(f"{posted} posted / {flagged} flagged on the server")
+    budget = _pages(posts) + failures + math.ceil((posts - failures) / 10)
+    return budget, problems
+
+
+async def _async_posting_day(posts: int, failures: int) -> int:
+    async with AsyncAirtableClient(
+        base_id=CONTENT_BASE,
+        table_id=ASYNC_TABLE,
+        view_name="Unposted",
+        max_concurrency=ASYNC_MAX_CONCURRENCY,
+    ) as client:
+        records = await client.get_unposted_records_for_today(max_count=posts)
+        failed, done = records[:failures], records[failures:]
+        await asyncio.gather(
+            *(client.mark_something_went_wrong_and_rotate(r["id"]) for r in failed),
+            client.batch_update_records(
+                [{"id": r["id"], "fields": {"Posted?": True, "Status": "Posted"}} for r in done]
+            ),
+        )
+    return len(records)
+
+
+def async_posting_day(fake: FakeAirtable, posts: int, failures: int):
+    read = asyncio.run(_async_posting_day(posts, failures))
+
+    rows = fake.records(CONTENT_BASE, ASYNC_TABLE)
+    posted = sum(1 for r in rows if r["fields"].get("Status") == "Posted")
+    flagged = sum(1 for r in rows if r["fields"].get("Something Went Wrong"))
+    peak = fake.stats().get("peak_in_flight", 0)
+    problems = []
+    if read != posts:
+        problems.append(f"read {read} of {posts} scheduled posts")
+    if posted != posts - failures or flagged != failures:
+        problems.append(f"{posted} posted / {flagged} flagged on the server")
+    if peak > ASYNC_MAX_CONCURRENCY:
+        problems.append(f"{peak} requests in flight, limit is {ASYNC_MAX_CONCURRENCY}")
+    budget = _pages(posts) + failures + math.ceil((posts - failures) / 10)
+    return budget, problems
+
+
+def warmup_day(fake: FakeAirtable, accounts: int):
+    client = get_airtable_client(table_key="warmup_accounts")
+    pending = client.get_pending_warmup_records()
+    for i, record in enumerate(pending):
+        if i % 5 == 4:
+            client.enqueue_record_update(record["record_id"], {"Warmup Errors": "Runtime Error: bench"})
+        else:
+            client.enqueue_record_update(record["record_id"], {"Daily Warmup Complete": True})
+    drained = drain_airtable_outbox(timeout=60)
+    # Rows we wrote stay hidden locally until Airtable says they're still in the view
+    hidden = client.get_pending_warmup_records()
+    # What the next run sees after its delta sync: only the failed accounts
+    get_airtable_mirror(
+        client.api,
+        client.base_id,
+        client.table_id,
+        WARMUP_FIELDS,
+        view="Warmup",
+        index_fields=list(PENDING_WARMUP_WHERE),
+    ).refresh(force=True)
+    still_pending = client.get_pending_warmup_records()
+
+    problems = []
+    if len(pending) != accounts:
+        problems.append(f"read {len(pending)} of {accounts} pending accounts")
+    if hidden:
+        problems.append(f"{len(hidden)} updated account(s) still served as pending")
+    if not drained or len(still_pending) != sum(1 for i in range(accounts) if i % 5 == 4):
+        problems.append(f"{len(still_pending)} account(s) pending after the delta sync")
+    rows_in_view = accounts + accounts // 4
+    rows_in_table = rows_in_view + accounts // 4
+    # Full load + batched results + one delta. Every seeded row is inside the
+    # delta window, so it lists the whole view and (to find rows that left
+    # it) every row id of the table.
+    budget = (
+        _pages(rows_in_view)
+        + math.ceil(accounts / 10)
+        + _pages(rows_in_view)
+        + _pages(rows_in_table)
+    )
+    return budget, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20, help="posts scheduled today")
+    parser.add_argument("--failures", type=int, default=2, help="posts that fail")
+    parser.add_argument("--accounts", type=int, default=30, help="accounts pending warmup")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per request")
+    parser.add_argument("--throttle-every", type=int, default=0, help="429 every Nth request")
+    parser.add_argument(
+        "--throttle-penalty", type=float, default=1.0,
+        help="seconds clients wait after an injected 429 (Airtable's real penalty is 30)",
+    )
+    args = parser.parse_args()
+
+    fake = FakeAirtable(latency=args.latency, throttle_every=args.throttle_every)
+    seed(fake, args.posts, args.accounts)
+    cache_dir = tempfile.mkdtemp(prefix="airtable_bench_")
+
+    with FakeAirtableServer(fake) as server:
+        # Set before the first client loads .env, so these win over it;
+        # clients only read the environment and config when created
+        os.environ.update(
+            {
+                "AIRTABLE_ENDPOINT_URL": server.url,
+                "AIRTABLE_API_KEY": "keyBench",
+                "ALEXIS_BASE_ID": CONTENT_BASE,
+                "ALEXIS_CONTENT_TABLE_ID": CONTENT_TABLE,
+                "IG_ARMY_BASE_ID": ACCOUNTS_BASE,
+                "IG_ARMY_WARMUP_ACCOUNTS_TABLE_ID": WARMUP_TABLE,
+            }
+        )
+        # Fresh outbox queue and mirror, so earlier runs can't serve reads
+        load_yaml_config().setdefault("paths", {})["cache_dir"] = cache_dir
+        load_yaml_config().setdefault("airtable_rate_limit", {})["throttle_penalty"] = args.throttle_penalty
+
+        failed = False
+        print(f"{'scenario':<14} {'calls':>5} {'budget':>6} {'list':>5} {'update':>6} {'batch':>5} {'429s':>5} {'secs':>6}")
+        for name, run in (
+            # First, so the outbox is opened on the leftover rows
+            ("leftovers", lambda: leftovers(fake, cache_dir)),
+            ("posting day", lambda: posting_day(fake, args.posts, args.failures)),
+            ("async posting", lambda: async_posting_day(fake, args.posts, args.failures)),
+            ("warmup day", lambda: warmup_day(fake, args.accounts)),
+        ):
+            fake.reset_stats()
+            started = time.perf_counter()
+            budget, problems = run()
+            elapsed = time.perf_counter() - started
+            stats = fake.stats()
+            calls = stats.get("requests", 0)
+            print(
+                f"{name:<14} {calls:>5} {budget:>6} {stats.get('list', 0):>5} "
+                f"{stats.get('update', 0):>6} {stats.get('batch_update', 0):>5} "
+                f"{stats.get('throttled', 0):>5} {elapsed:>6.1f}"
+            )
+            if calls > budget:
+                problems.append(f"{calls} calls exceed the budget of {budget}")
+            for problem in problems:
+                print(f"  FAIL {name}: {problem}")
+            failed = failed or bool(problems)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    print("FAIL" if failed else "OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
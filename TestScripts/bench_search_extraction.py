@@ -0,0 +1,142 @@
+# TestScripts/bench_search_extraction.py
+"""
+Benchmarks Explore search-grid reel extraction over saved hierarchy dumps.
+
+Compares the old per-container walk (replayed here against the snapshot, so
+it measures the algorithm only - on a device every .xpath()/.info in it was
+an extra RPC) with the single-pass parse_search_page_reels(), and checks that
+both return the same reels.
+
+Usage (from the project root):
+    python -m TestScripts.bench_search_extraction dumps/*.xml
+    python -m TestScripts.bench_search_extraction --capture <serial> dumps/search_01.xml
+    python -m TestScripts.bench_search_extraction --live <serial> [--rounds 5]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from Shared.UI.ui_snapshot import UISnapshot
+from Shared.Utils.xpath_config import get_instagram_xpaths
+from WarmupBot.scroller import _search_post_key, parse_search_page_reels
+
+
+def legacy_extract(snapshot: UISnapshot, xpath_config) -> list:
+    """
+    The previous extract_search_page_reels loop, run against a snapshot, with
+    its image-post check reading the right key. The original read
+    "resourceID", which .info never has, so on devices it skipped no image
+    posts; this replay compares against the intended behaviour.
+    """
+    reels = []
+    seen = set()
+    for container in snapshot.find(xpath_config.search_layout_container_frame):
+        is_image_post = False
+        for btn in container.xpath(xpath_config.search_image_post_button):
+            info = btn.info
+            if "image_button" in (info.get("resourceId") or "") and "photos by" in (
+                info.get("contentDescription") or ""
+            ).lower():
+                is_image_post = True
+                break
+        if is_image_post:
+            continue
+        for iv in container.xpath(xpath_config.search_reel_imageview):
+            info = iv.info
+            desc = (info.get("contentDescription") or "").strip()
+            b = info.get("bounds")
+            bounds = f"[{b['left']},{b['top']}][{b['right']},{b['bottom']}]"
+            if not desc or "Reel by" not in desc or desc in seen:
+                continue
+            seen.add(desc)
+            reels.append(
+                {**_search_post_key(desc), "type": "REEL", "desc": desc, "bounds": bounds}
+            )
+    return reels
+
+
+def _time(fn, rounds: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def bench_dumps(paths: list, package: str, rounds: int):
+    xpath_config = get_instagram_xpaths(package)
+    print(f"{'dump':<40} {'reels':>5} {'legacy ms':>10} {'single ms':>10} {'match':>6}")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        snapshot = UISnapshot(source)
+        old = legacy_extract(snapshot, xpath_config)
+        new = parse_search_page_reels(snapshot, xpath_config)
+        match = {r["id"]: r["bounds"] for r in old} == {r["id"]: r["bounds"] for r in new}
+        old_ms = _time(lambda: legacy_extract(snapshot, xpath_config), rounds)
+        new_ms = _time(lambda: parse_search_page_reels(snapshot, xpath_config), rounds)
+        print(
+            f"{os.path.basename(path):<40} {len(new):>5} {old_ms:>10.2f} {new_ms:>10.2f} {'yes' if match else 'NO':>6}"
+        )
+
+
+def bench_live(serial: str, package: str, rounds: int):
+    """Times the full per-screen cost on a device: one dump + local parse."""
+    import uiautomator2 as u2
+
+    d = u2.connect(serial)
+    xpath_config = get_instagram_xpaths(package)
+    dump_ms, parse_ms, count = [], [], 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        snapshot = UISnapshot(d.dump_hierarchy())
+        dumped = time.perf_counter()
+        count = len(parse_search_page_reels(snapshot, xpath_config))
+        dump_ms.append((dumped - started) * 1000)
+        parse_ms.append((time.perf_counter() - dumped) * 1000)
+    print(
+        f"{serial}: {count} reels | dump {statistics.median(dump_ms):.0f}ms "
+        f"+ parse {statistics.median(parse_ms):.1f}ms (median of {rounds})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dumps", nargs="*", help="Saved hierarchy XML files (globs ok)")
+    parser.add_argument("--package", default="com.instagram.android")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--capture", metavar="SERIAL", help="Save the current screen to the dump path")
+    parser.add_argument("--live", metavar="SERIAL", help="Time dump + parse on a device")
+    args = parser.parse_args()
+
+    if args.capture:
+        import uiautomator2 as u2
+
+        if len(args.dumps) != 1:
+            parser.error("--capture needs exactly one output path")
+        os.makedirs(os.path.dirname(os.path.abspath(args.dumps[0])), exist_ok=True)
+        with open(args.dumps[0], "w", encoding="utf-8") as f:
+            f.write(u2.connect(args.capture).dump_hierarchy())
+        print(f"Saved {args.dumps[0]}")
+        return
+    if args.live:
+        bench_live(args.live, args.package, args.rounds)
+        return
+
+    paths = sorted(p for pattern in args.dumps for p in glob.glob(pattern))
+    if not paths:
+        parser.error("no dump files given")
+    bench_dumps(paths, args.package, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+# TestScripts/fake_airtable_server.py
+"""
+Local stand-in for the Airtable REST endpoints this project uses, for load
+tests and request-count benchmarks that must not burn real quota.
+
+Implements:
+    GET   /v0/<base>/<table>              list (view, filterByFormula, fields[],
+                                           pageSize, maxRecords, offset)
+    POST  /v0/<base>/<table>/listRecords  the same list, options in the JSON body
+    PATCH /v0/<base>/<table>/<record>     update one record
+    PATCH /v0/<base>/<table>              batch update (max 10 records)
+    GET   /_fake/stats                    request counters
+    POST  /_fake/reset                    zero the counters
+
+Views are filterByFormula strings registered per table. Only the formula
+subset the clients send is understood (AND/OR/NOT, comparisons,
+DATETIME_FORMAT/DATETIME_PARSE, IS_AFTER/IS_BEFORE, LAST_MODIFIED_TIME,
+RECORD_ID, ...); anything else is a 422, as Airtable would answer.
+Latency and 429s can be injected, and `rate_limit` enforces Airtable's
+per-base requests/second the way the real service does.
+
+Point the clients at it with AIRTABLE_ENDPOINT_URL (see
+Shared/Data/airtable_rate_limit.py). Usage (from the project root):
+    python -m TestScripts.fake_airtable_server --seed seed.json [--port 8765]
+        [--latency 0.05] [--throttle-every 7] [--rate-limit 5]
+
+seed.json: {"<base>": {"<table>": {"views": {"<name>": "<formula>"},
+                                   "records": [{<fields>}, ...]}}}
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 10
+
+
+class FormulaError(ValueError):
+    pass
+
+
+# --- Formula subset ---
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<field>\{[^}]*\})
+      | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op>!=|<=|>=|=|<|>|&|,|\(|\))
+    )""",
+    re.VERBOSE,
+)
+_DATE_TOKENS = [("YYYY", "%Y"), ("MM", "%m"), ("DD", "%d"), ("HH", "%H"), ("mm", "%M"), ("ss", "%S")]
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _format_datetime(value, pattern: str) -> str:
+    parsed = _parse_datetime(value)
+    if parsed is None:
+        return ""
+    for token, directive in _DATE_TOKENS:
+        pattern = pattern.replace(token, directive)
+    return parsed.strftime(pattern)
+
+
+def _blank(value) -> bool:
+    return value is None or value == "" or value == [] or value is False
+
+
+def _compare(op: str, left, right) -> bool:
+    # Airtable compares a blank cell as the empty string
+    left = "" if left is None else left
+    right = "" if right is None else right
+    if isinstance(left, datetime) or isinstance(right, datetime):
+        left, right = _parse_datetime(left), _parse_datetime(right)
+    elif isinstance(left, (int, float)) != isinstance(right, (int, float)):
+        left, right = str(left), str(right)
+    return {
+        "=": lambda: left == right,
+        "!=": lambda: left != right,
+        "<": lambda: left < right,
+        ">": lambda: left > right,
+        "<=": lambda: left <= right,
+        ">=": lambda: left >= right,
+    }[op]()
+
+
+_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "AND": lambda *args: all(not _blank(a) for a in args),
+    "OR": lambda *args: any(not _blank(a) for a in args),
+    "NOT": lambda value: _blank(value),
+    "TRUE": lambda: True,
+    "FALSE": lambda: False,
+    "BLANK": lambda: None,
+    "LOWER": lambda value: str(value or "").lower(),
+    "UPPER": lambda value: str(value or "").upper(),
+    "DATETIME_PARSE": lambda value, *_: _parse_datetime(value),
+    "DATETIME_FORMAT": lambda value, pattern="YYYY-MM-DDTHH:mm:ss": _format_datetime(value, pattern),
+    "IS_AFTER": lambda a, b: _compare(">", _parse_datetime(a), _parse_datetime(b)),
+    "IS_BEFORE": lambda a, b: _compare("<", _parse_datetime(a), _parse_datetime(b)),
+}
+
+
+class _FormulaParser:
+    """Recursive-descent evaluator of one formula against one record."""
+
+    def __init__(self, formula: str):
+        self.tokens = []
+        position = 0
+        formula = formula.strip()
+        while position < len(formula):
+            match = _TOKEN_RE.match(formula, position)
+            if not match or match.end() == position:
+                raise FormulaError(f"Unexpected input at {position}: {formula[position:position + 20]!r}")
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind)))
+            position = match.end()
+            while position < len(formula) and formula[position].isspace():
+                position += 1
+        self.index = 0
+
+    def evaluate(self, record: Dict) -> Any:
+        self.index = 0
+        self.record = record
+        value = self._comparison()
+        if self.index != len(self.tokens):
+            raise FormulaError(f"Unexpected token {self.tokens[self.index][1]!r}")
+        return value
+
+    def _peek(self, value: Optional[str] = None):
+        if self.index >= len(self.tokens):
+            return None
+        token = self.tokens[self.index]
+        return token if value is None or token[1] == value else None
+
+    def _expect(self, value: str):
+        if not self._peek(value):
+            raise FormulaError(f"Expected {value!r}")
+        self.index += 1
+
+    def _comparison(self):
+        left = self._concat()
+        token = self._peek()
+        if token and token[0] == "op" and token[1] in ("=", "!=", "<", ">", "<=", ">="):
+            self.index += 1
+            return _compare(token[1], left, self._concat())
+        return left
+
+    def _concat(self):
+        value = self._primary()
+        while self._peek("&"):
+            self.index += 1
+            value = f"{'' if value is None else value}{'' if (v := self._primary()) is None else v}"
+        return value
+
+    def _primary(self):
+        if self.index >= len(self.tokens):
+            raise FormulaError("Unexpected end of formula")
+        kind, text = self.tokens[self.index]
+        self.index += 1
+        if kind == "field":
+            return self.record["fields"].get(text[1:-1])
+        if kind == "string":
+            return re.sub(r"\\(.)", r"\1", text[1:-1])
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        if kind == "op" and text == "(":
+            value = self._comparison()
+            self._expect(")")
+            return value
+        if kind == "name":
+            name = text.upper()
+            self._expect("(")
+            args = []
+            if not self._peek(")"):
+                args.append(self._comparison())
+                while self._peek(","):
+                    self.index += 1
+                    args.append(self._comparison())
+            self._expect(")")
+            if name == "RECORD_ID":
+                return self.record["id"]
+            if name == "LAST_MODIFIED_TIME":
+                return _parse_datetime(self.record["_modified"])
+            if name == "CREATED_TIME":
+                return _parse_datetime(self.record["createdTime"])
+            if name not in _FUNCTIONS:
+                raise FormulaError(f"Unknown function {text}()")
+            return _FUNCTIONS[name](*args)
+        raise FormulaError(f"Unexpected token {text!r}")
+
+
+def evaluate_formula(formula: Optional[str], record: Dict) -> bool:
+    if not formula:
+        return True
+    return not _blank(_FormulaParser(formula).evaluate(record))
+
+
+# --- Data and traffic shaping ---
+
+
+class FakeAirtable:
+    """
+    In-memory bases/tables plus request counters, shared by every handler
+    thread of a FakeAirtableServer.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        throttle_every: int = 0,
+        rate_limit: float = 0.0,
+    ):
+        """
+        Args:
+            latency (float): Seconds added to every response.
+            throttle_every (int): Answer every Nth request with a 429 (0 = never).
+            rate_limit (float): Requests/second allowed per base before 429s,
+                like Airtable's limit of 5 (0 = unlimited).
+        """
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.rate_limit = rate_limit
+        self.tables: Dict[tuple, Dict] = {}
+        self.counts: Counter = Counter()
+        self._recent: Dict[str, deque] = {}
+        self._seen = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def add_table(
+        self,
+        base_id: str,
+        table_id: str,
+        records: List[Dict],
+        views: Optional[Dict[str, Optional[str]]] = None,
+    ) -> List[str]:
+        """Creates (or replaces) a table; returns the new record ids in order."""
+        now = _now()
+        rows = {}
+        for fields in records:
+            record_id = "rec" + uuid.uuid4().hex[:14]
+            rows[record_id] = {"id": record_id, "createdTime": now, "_modified": now, "fields": dict(fields)}
+        with self._lock:
+            self.tables[(base_id, table_id)] = {"records": rows, "views": dict(views or {})}
+        return list(rows)
+
+    def load_seed(self, seed: Dict):
+        for base_id, tables in seed.items():
+            for table_id, spec in tables.items():
+                self.add_table(base_id, table_id, spec.get("records", []), spec.get("views"))
+
+    def records(self, base_id: str, table_id: str) -> List[Dict]:
+        """Current rows (id + fields), for assertions."""
+        with self._lock:
+            rows = self.tables[(base_id, table_id)]["records"].values()
+            return [{"id": r["id"], "fields": dict(r["fields"])} for r in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts.clear()
+            self._seen = 0
+            self._recent.clear()
+
+    def started(self):
+        """Marks a request as in flight; counts["peak_in_flight"] keeps the maximum."""
+        with self._lock:
+            self._in_flight += 1
+            self.counts["peak_in_flight"] = max(self.counts["peak_in_flight"], self._in_flight)
+
+    def finished(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def admit(self, kind: str, base_id: str) -> bool:
+        """Counts a request; False means it must be answered with a 429."""
+        with self._lock:
+            self._seen += 1
+            throttled = bool(self.throttle_every) and self._seen % self.throttle_every == 0
+            if self.rate_limit and not throttled:
+                window = self._recent.setdefault(base_id, deque())
+                now = time.monotonic()
+                while window and now - window[0] >= 1.0:
+                    window.popleft()
+                throttled = len(window) >= self.rate_limit
+                if not throttled:
+                    window.append(now)
+            if throttled:
+                self.counts["throttled"] += 1
+            else:
+                self.counts["requests"] += 1
+                self.counts[kind] += 1
+            return not throttled
+
+    # --- Endpoints ---
+
+    def list_records(self, base_id: str, table_id: str, options: Dict) -> Dict:
+        with self._lock:
+            table = self.tables.get((base_id, table_id))
+            if table is None:
+                raise _HttpError(404, "NOT_FOUND", f"Table {table_id} not found")
+            view = options.get("view")
+            if view and view not in table["views"]:
+                raise _HttpError(422, "VIEW_NAME_NOT_FOUND", f"View {view!r} not found")
+            rows = list(table["records"].values())
+        try:
+            rows = [r for r in rows if evaluate_formula(table["views"].get(view), r)]
+            rows = [r for r in rows if evaluate_formula(options.get("filterByFormula"), r)]
+        except FormulaError as e:
+            raise _HttpError(422, "INVALID_FILTER_BY_FORMULA", str(e))
+
+        max_records = int(options.get("maxRecords") or 0)
+        if max_records:
+            rows = rows[:max_records]
+        page_size = min(int(options.get("pageSize") or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        start = int(options.get("offset") or 0)
+        page = rows[start : start + page_size]
+        fields = options.get("fields")
+        result = {"records": [_public(r, fields) for r in page]}
+        if start + page_size < len(rows):
+            result["offset"] = str(start + page_size)
+        return result
+
+    def update_records(self, base_id: str, table_id: str, updates: List[Dict]) -> List[Dict]:
+        if len(updates) > MAX_BATCH_SIZE:
+            raise _HttpError(422, "INVALID_RECORDS", f"At most {MAX_BATCH_SIZE} records per request")
+        with self._lock:
+            table = self.tables.get((base_id, table_id))
+            if table is None:
+                raise _HttpError(404, "NOT_FOUND", f"Table {table_id} not found")
+            missing = [u.get("id") for u in updates if u.get("id") not in table["records"]]
+            if missing:
+                raise _HttpError(404, "NOT_FOUND", f"Record(s) not found: {missing}")
+            now = _now()
+            updated = []
+            for update in updates:
+                row = table["records"][update["id"]]
+                row["fields"].update(update.get("fields", {}))
+                row["_modified"] = now
+                updated.append(_public(row, None))
+            return updated
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, error_type: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.body = {"error": {"type": error_type, "message": message}}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _public(row: Dict, fields: Optional[List[str]]) -> Dict:
+    # Airtable leaves empty cells (and unchecked checkboxes) out of responses
+    values = {
+        name: value
+        for name, value in row["fields"].items()
+        if not _blank(value) and (not fields or name in fields)
+    }
+    return {"id": row["id"], "createdTime": row["createdTime"], "fields": values}
+
+
+# --- HTTP ---
+
+_RECORDS_PATH = re.compile(r"^/v0/(?P<base>[^/]+)/(?P<table>[^/]+)(?:/(?P<record>[^/]+))?/?$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeAirtableServer"
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _handle(self, method: str):
+        fake = self.server.fake
+        url = urlsplit(self.path)
+        try:
+            body = self._body() if method in ("POST", "PATCH") else {}
+            if url.path == "/_fake/stats" and method == "GET":
+                return self._send(200, fake.stats())
+            if url.path == "/_fake/reset" and method == "POST":
+                fake.reset_stats()
+                return self._send(200, {})
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                raise _HttpError(401, "AUTHENTICATION_REQUIRED", "Missing bearer token")
+
+            match = _RECORDS_PATH.match(url.path)
+            if not match:
+                raise _HttpError(404, "NOT_FOUND", f"No route for {method} {url.path}")
+            base_id, table_id, record_id = match.group("base", "table", "record")
+
+            if method == "GET" and not record_id:
+                kind, handler = "list", lambda: self._list(base_id, table_id, url.query)
+            elif method == "POST" and record_id == "listRecords":
+                kind, handler = "list", lambda: fake.list_records(base_id, table_id, body)
+            elif method == "PATCH" and record_id:
+                kind = "update"
+                handler = lambda: fake.update_records(
+                    base_id, table_id, [{"id": record_id, "fields": body.get("fields", {})}]
+                )[0]
+            elif method == "PATCH":
+                kind = "batch_update"
+                handler = lambda: {"records": fake.update_records(base_id, table_id, body.get("records", []))}
+            else:
+                raise _HttpError(404, "NOT_FOUND", f"No route for {method} {url.path}")
+
+            fake.started()
+            try:
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if not fake.admit(kind, base_id):
+                    raise _HttpError(429, "RATE_LIMIT_REACHED", "Rate limit exceeded")
+                self._send(200, handler())
+            finally:
+                fake.finished()
+        except _HttpError as e:
+            self._send(e.status, e.body)
+        except (ValueError, KeyError) as e:
+            self._send(422, {"error": {"type": "INVALID_REQUEST_UNKNOWN", "message": str(e)}})
+
+    def _list(self, base_id: str, table_id: str, query: str) -> Dict:
+        options: Dict[str, Any] = {}
+        for name, value in parse_qsl(query, keep_blank_values=True):
+            if name in ("fields[]", "fields"):
+                options.setdefault("fields", []).append(value)
+            else:
+                options[name] = value
+        return self.server.fake.list_records(base_id, table_id, options)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+
+class FakeAirtableServer(ThreadingHTTPServer):
+    """
+    Serves a FakeAirtable over HTTP. `with FakeAirtableServer() as server:`
+    runs it on a background thread; server.url is the endpoint to use.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fake: Optional[FakeAirtable] = None, port: int = 0, verbose: bool = False):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.fake = fake or FakeAirtable()
+        self.verbose = verbose
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAirtableServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="FakeAirtable", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeAirtableServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", help="JSON file of bases/tables/views/records")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per request")
+    parser.add_argument("--throttle-every", type=int, default=0, help="429 every Nth request")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second per base")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    fake = FakeAirtable(args.latency, args.throttle_every, args.rate_limit)
+    if args.seed:
+        with open(args.seed, encoding="utf-8") as f:
+            fake.load_seed(json.load(f))
+    server = FakeAirtableServer(fake, port=args.port, verbose=args.verbose)
+    print(f"Fake Airtable on {server.url}  (export AIRTABLE_ENDPOINT_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Requests: {fake.stats()}")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
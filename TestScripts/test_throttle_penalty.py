@@ -0,0 +1,71 @@
+# TestScripts/test_throttle_penalty.py
+"""
+Checks that simultaneous 429s on one base hold its token bucket for one
+throttle penalty, not one penalty per rejected request. Airtable has a
+single penalty window per base, so stacking them would stall every worker
+on the base for N x 30s.
+
+Usage (from the project root):
+    python -m TestScripts.test_throttle_penalty [--workers 4] [--penalty 30]
+"""
+
+import argparse
+import os
+import sys
+import threading
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from Shared.Data.airtable_rate_limit import DEFAULT_BURST, DEFAULT_REQUESTS_PER_SECOND, TokenBucket
+
+
+def simultaneous_429s(workers: int, penalty: float) -> float:
+    """Drains one bucket from `workers` threads at once; returns the next token wait."""
+    bucket = TokenBucket(DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST)
+    # Every worker already holds a token, as it would when its request got the 429
+    for _ in range(workers):
+        bucket.reserve()
+    barrier = threading.Barrier(workers)
+
+    def rejected():
+        barrier.wait()
+        bucket.drain(penalty=penalty)
+
+    threads = [threading.Thread(target=rejected) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return bucket.reserve()
+
+
+def shorter_penalty_keeps_hold(penalty: float) -> float:
+    """A later, shorter penalty must not cut an earlier hold short."""
+    bucket = TokenBucket(DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST)
+    bucket.drain(penalty=penalty)
+    bucket.drain(penalty=penalty / 10)
+    return bucket.reserve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="requests rejected at once")
+    parser.add_argument("--penalty", type=float, default=30.0, help="seconds per 429")
+    args = parser.parse_args()
+
+    # One token interval of slack: the first request after the hold pays for its own token
+    slack = 1 / DEFAULT_REQUESTS_PER_SECOND
+    failed = False
+    for name, wait in (
+        (f"{args.workers} simultaneous 429s", simultaneous_429s(args.workers, args.penalty)),
+        ("shorter penalty after a longer one", shorter_penalty_keeps_hold(args.penalty)),
+    ):
+        ok = args.penalty - slack <= wait <= args.penalty + slack
+        failed = failed or not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {name}: next token in {wait:.2f}s (penalty {args.penalty:.0f}s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# WarmupBot/fleet_runner.py
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from Shared.config_loader import PROJECT_ROOT
+from Shared.Data.airtable_manager import AirtableClient, get_airtable_client
+from Shared.Data.airtable_outbox import drain_airtable_outbox
+from Shared.Utils.logger_config import setup_logger
+from WarmupBot.scroller import SCROLLER_CONFIG, run_account_warmup
+
+logger = setup_logger(name="FleetRunner")
+
+DEFAULT_MAX_PARALLEL_DEVICES = 4
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def group_records_by_device(records: List[dict]) -> "OrderedDict[str, List[dict]]":
+    """
+    Groups warmup records by device_id, keeping Airtable order within each
+    device. Records without a device_id are collected under "" so they are
+    still reported (as skipped) in the summary.
+    """
+    groups: "OrderedDict[str, List[dict]]" = OrderedDict()
+    for record in records:
+        groups.setdefault(record.get("device_id") or "", []).append(record)
+    return groups
+
+
+class _ThreadFilter(logging.Filter):
+    """Passes only records emitted from one worker thread."""
+
+    def __init__(self, thread_name: str):
+        super().__init__()
+        self.thread_name = thread_name
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.threadName == self.thread_name
+
+
+def _attach_device_log(device_id: str, log_dir: str) -> logging.Handler:
+    """
+    Sends everything the current thread logs (any module logger, since they
+    all propagate to root) to <log_dir>/<device_id>.log.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in device_id)
+    handler = logging.FileHandler(os.path.join(log_dir, f"{safe_name}.log"))
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(_ThreadFilter(threading.current_thread().name))
+    logging.getLogger().addHandler(handler)
+    return handler
+
+
+def run_device_queue(
+    device_id: str, records: List[dict], client: AirtableClient, log_dir: str
+) -> List[dict]:
+    """
+    Worker: runs every account assigned to one device, one after another.
+    The pause between accounts only applies within a device; other devices
+    keep running meanwhile.
+    """
+    threading.current_thread().name = f"warmup-{device_id or 'unassigned'}"
+    handler = _attach_device_log(device_id or "unassigned", log_dir)
+    results = []
+    try:
+        logger.info(f"📱 [{device_id}] Worker started with {len(records)} account(s)")
+        for index, record in enumerate(records):
+            if index:
+                time.sleep(random.uniform(5, 10))
+            results.append(run_account_warmup(record, client))
+        logger.info(f"🏁 [{device_id}] Worker finished")
+    finally:
+        logging.getLogger().removeHandler(handler)
+        handler.close()
+    return results
+
+
+def run_fleet(
+    records: List[dict],
+    client: AirtableClient,
+    max_parallel: Optional[int] = None,
+    log_dir: Optional[str] = None,
+) -> List[dict]:
+    """
+    Runs warmups for all records with one worker per device, at most
+    `max_parallel` devices at a time.
+
+    Args:
+        records (List[dict]): Pending warmup records (see get_pending_warmup_records).
+        client (AirtableClient): Shared client; updates go through the outbox.
+        max_parallel (Optional[int]): Concurrency cap. Defaults to
+                                      scroller.max_parallel_devices.
+        log_dir (Optional[str]): Directory for per-device logs. Defaults to
+                                 scroller.device_log_dir/<timestamp>.
+
+    Returns:
+        List[dict]: One result per record (see run_account_warmup).
+    """
+    if max_parallel is None:
+        max_parallel = SCROLLER_CONFIG.get(
+            "max_parallel_devices", DEFAULT_MAX_PARALLEL_DEVICES
+        )
+    if log_dir is None:
+        base_dir = SCROLLER_CONFIG.get("device_log_dir", "logs/warmup")
+        if not os.path.isabs(base_dir):
+            base_dir = os.path.join(PROJECT_ROOT, base_dir)
+        log_dir = os.path.join(base_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+
+    groups = group_records_by_device(records)
+    workers = max(1, min(int(max_parallel), len(groups)))
+    logger.info(
+        f"🚀 Warming up {len(records)} account(s) on {len(groups)} device(s), "
+        f"{workers} at a time. Device logs: {log_dir}"
+    )
+
+    results: List[dict] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_device_queue, device_id, device_records, client, log_dir): device_id
+            for device_id, device_records in groups.items()
+        }
+        for future in as_completed(futures):
+            device_id = futures[future]
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                logger.error(f"💥 Worker for {device_id} crashed: {e}", exc_info=True)
+                results.extend(
+                    {
+                        "username": r.get("username"),
+                        "device_id": device_id,
+                        "record_id": r.get("record_id"),
+                        "status": "error",
+                        "error": f"Worker crashed: {e}",
+                        "reels_processed": 0,
+                        "liked": 0,
+                        "commented": 0,
+                        "runtime": 0.0,
+                    }
+                    for r in groups[device_id]
+                )
+    return results
+
+
+def log_fleet_summary(results: List[dict], elapsed: float):
+    """Logs one line per account plus fleet-wide totals."""
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+
+    logger.info("📊 Fleet Summary:")
+    for r in sorted(results, key=lambda r: (r.get("device_id") or "", r.get("username") or "")):
+        line = (
+            f"  - {r.get('device_id') or '?':<20} @{r.get('username')}: {r['status']} | "
+            f"reels {r['reels_processed']}, liked {r['liked']}, "
+            f"comments {r['commented']}, {r['runtime']}s"
+        )
+        if r.get("error"):
+            line += f" | {r['error']}"
+        logger.info(line)
+    logger.info(
+        f"  Totals: {len(results)} account(s) "
+        + ", ".join(f"{count} {status}" for status, count in sorted(by_status.items()))
+    )
+    logger.info(
+        f"  Reels {sum(r['reels_processed'] for r in results)}, "
+        f"liked {sum(r['liked'] for r in results)}, "
+        f"comments {sum(r['commented'] for r in results)}"
+    )
+    logger.info(f"  Wall time: {elapsed:.1f}s")
+
+
+def main():
+    """Runs today's pending warmups across all devices in parallel."""
+    client = get_airtable_client(table_key="warmup_accounts")
+    warmup_records = client.get_pending_warmup_records()
+
+    if not warmup_records:
+        logger.info("No accounts scheduled for warmup today.")
+        return
+
+    started = time.time()
+    results = run_fleet(warmup_records, client)
+    log_fleet_summary(results, time.time() - started)
+
+    if not drain_airtable_outbox(timeout=60):
+        logger.warning("⚠️ Some Airtable updates are still queued; they will be retried next run.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,26 @@
 import hashlib
 import random
 import time
+from dataclasses import dataclass
 from typing import Optional, Tuple
 
 import uiautomator2 as u2  # Keep for type hints if needed
 
 # --- Import the main Instagram UI driver ---
 # Adjust path if InstagramInteractions moves to Shared later
-from UploadBot.instagram_actions import InstagramInteractions
-
-from Shared.airtable_manager import AirtableClient  # Keep for main function logic
+from Shared.instagram_actions import InstagramInteractions
 
 # Import the config loader functions
 from Shared.config_loader import get_scroller_config, load_yaml_config
+from Shared.Data.airtable_manager import AirtableClient, get_airtable_client
+from Shared.Data.airtable_outbox import drain_airtable_outbox
 
 # --- Core Dependencies ---
-from Shared.logger_config import setup_logger
-from Shared.popup_handler import PopupHandler  # Keep for popup handling
-from Shared.stealth_typing import StealthTyper  # Keep for keyword search typing
+from Shared.UI.popup_handler import PopupHandler  # Keep for popup handling
+from Shared.UI.ui_snapshot import FieldSpec, UISnapshot, compile_xpath, parse_bounds
+from Shared.Utils.logger_config import setup_logger
+from Shared.Utils.stealth_typing import get_stealth_typer  # Keep for keyword search typing
+from Shared.Utils.xpath_config import SEARCH_CONTAINER_CLASS
 
 logger = setup_logger(name="Scroller")  # Use the specific logger name
 
@@ -84,98 +87,175 @@ def random_delay(label: str):
 # --- Core Logic Functions (Refactored to use InstagramInteractions and Centralized XPaths) ---
 
 
-def extract_search_page_reels(insta_actions: InstagramInteractions) -> list[dict]:
+def _search_post_key(desc: str) -> dict:
+    """Builds the id/username part of a search-grid reel dict from its content-desc."""
+    key = hashlib.sha1(desc.encode("utf-8")).hexdigest()
+    username = "unknown"
+    try:
+        username_part = desc.split("by", 1)[1]
+        username = username_part.split("at", 1)[0].strip()
+    except IndexError:
+        logger.warning(f"Could not parse username from desc: {desc}")
+    return {"id": key, "short_id": key[:7], "username": username}
+
+
+def parse_search_page_reels(snapshot: UISnapshot, xpath_config) -> list[dict]:
     """
-    Extracts reel information specifically from the search/explore results page.
-    Uses insta_actions for device access and XPath configuration.
+    Extracts reel dicts from one search/explore grid hierarchy snapshot,
+    entirely in-process (no device round-trips).
+
+    An ImageView whose content-desc contains "Reel by" is a reel unless its
+    container is an image post (an image_button whose description says
+    "photos by"). Since containers are nested FrameLayouts, checking the
+    nearest FrameLayout ancestor is equivalent to checking every container
+    that holds the view. (The old device walk read a "resourceID" key that
+    .info never has, so it never actually skipped image posts.)
+
+    Args:
+        snapshot (UISnapshot): Parsed hierarchy of the search results screen.
+        xpath_config: InstagramXPaths providing the search_* selectors.
+
+    Returns:
+        list[dict]: {"id", "short_id", "username", "type", "desc", "bounds"} per reel.
     """
+    button_xpath = compile_xpath(xpath_config.search_image_post_button)
+    imageview_xpath = compile_xpath(xpath_config.search_reel_imageview)
+
+    image_post_cache = {}
+
+    def is_image_post(container) -> bool:
+        if container not in image_post_cache:
+            image_post_cache[container] = any(
+                "image_button" in btn.get("resource-id", "")
+                and "photos by" in btn.get("content-desc", "").lower()
+                for btn in button_xpath(container)
+            )
+        return image_post_cache[container]
+
     reels = []
     seen_this_screen = set()
-    device = insta_actions.device
-    xpath_config = insta_actions.xpath_config  # Get XPath config
-
-    try:
-        # Find potential containers using XPath from config
-        containers = device.xpath(xpath_config.search_layout_container_frame).all()
-        # Optional: Further filter containers if a more specific pattern exists, e.g., by resource-id
-        # containers = [c for c in containers if re.match(xpath_config.search_layout_container_rid_pattern, c.info.get("resourceID", ""))]
+    for iv in imageview_xpath(snapshot.root):
+        # TODO: Move "Reel by" literal to config if needed
+        desc = iv.get("content-desc", "").strip()
+        if not desc or "Reel by" not in desc or desc in seen_this_screen:
+            continue
+        bounds = iv.get("bounds")
+        if not bounds:
+            continue
+        container = next(iv.iterancestors(SEARCH_CONTAINER_CLASS), None)
+        if container is None:
+            continue
+        if is_image_post(container):
+            logger.debug("🧨 Skipping image post (found 'photos by' button)")
+            continue
+        seen_this_screen.add(desc)
+
+        lx, ly, rx, ry = parse_bounds(bounds)
+        post = {
+            **_search_post_key(desc),
+            "type": "REEL",
+            "desc": desc,
+            "bounds": f"[{lx},{ly}][{rx},{ry}]",
+        }
         logger.info(
-            f"Found {len(containers)} potential layout containers on search page"
+            f"[{post['short_id']}] ✅ Extracted Reel | @{post['username']} | bounds={post['bounds']}"
         )
+        reels.append(post)
 
-        for container in containers:
-            try:
-                # Skip image posts with 'photos by'
-                # Search relative to container
-                bad_btns = container.xpath(xpath_config.search_image_post_button).all()
-                is_image_post = False
-                for btn in bad_btns:
-                    btn_info = btn.info
-                    btn_rid = btn_info.get("resourceID", "")
-                    btn_desc = btn_info.get("contentDescription", "")
-                    # TODO: Move "image_button", "photos by" literals to config if needed
-                    if "image_button" in btn_rid and "photos by" in btn_desc.lower():
-                        logger.debug(
-                            "🧨 Skipping image post (found 'photos by' button)"
-                        )
-                        is_image_post = True
-                        break
-                if is_image_post:
-                    continue
-
-                # Look for reel ImageViews inside this container (relative search)
-                ivs = container.xpath(xpath_config.search_reel_imageview).all()
-                for iv in ivs:
-                    iv_info = iv.info
-                    desc = iv_info.get("contentDescription", "").strip()
-                    bounds = iv_info.get("bounds")  # Get bounds dict
-
-                    bounds_str = ""
-                    if bounds:
-                        bounds_str = f"[{bounds.get('left', 0)},{bounds.get('top', 0)}][{bounds.get('right', 0)},{bounds.get('bottom', 0)}]"
-
-                    if not desc or not bounds_str:
-                        continue
-                    # TODO: Move "Reel by" literal to config if needed
-                    if "Reel by" not in desc:
-                        continue
-
-                    screen_key = desc
-                    if screen_key in seen_this_screen:
-                        continue
-                    seen_this_screen.add(screen_key)
-
-                    key = hashlib.sha1(screen_key.encode("utf-8")).hexdigest()
-                    username = "unknown"
-                    try:
-                        username_part = desc.split("by", 1)[1]
-                        username = username_part.split("at", 1)[0].strip()
-                    except IndexError:
-                        logger.warning(f"Could not parse username from desc: {desc}")
-
-                    post = {
-                        "id": key,
-                        "short_id": key[:7],
-                        "username": username,
-                        "type": "REEL",
-                        "desc": desc,
-                        "bounds": bounds_str,
-                    }
-                    logger.info(
-                        f"[{post['short_id']}] ✅ Extracted Reel | @{username} | bounds={bounds_str}"
-                    )
-                    reels.append(post)
-
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to parse a container: {e}", exc_info=False)
-                continue
-
-    except Exception as outer_e:
-        logger.error(
-            f"💥 Error extracting reels from search page: {outer_e}", exc_info=True
+    logger.info(f"Found {len(reels)} reels on search page")
+    return reels
+
+
+def extract_search_page_reels(insta_actions: InstagramInteractions) -> list[dict]:
+    """
+    Extracts reel information specifically from the search/explore results page.
+    Uses one hierarchy dump (via insta_actions' snapshot cache) and parses it locally.
+    """
+    try:
+        return parse_search_page_reels(
+            insta_actions.snapshot(), insta_actions.xpath_config
+        )
+    except Exception as e:
+        logger.error(f"💥 Error extracting reels from search page: {e}", exc_info=True)
+        return []
+
+
+@dataclass
+class ReelMetadata:
+    """Metadata read from an open reel's viewer screen."""
+
+    username: Optional[str] = None
+    caption: Optional[str] = None
+    likes: Optional[str] = None
+    reshares: Optional[str] = None
+    sound: Optional[str] = None
+    follow_visible: bool = False
+
+    @classmethod
+    def from_fields(cls, fields: dict) -> "ReelMetadata":
+        """Builds the record from extract_fields() output, cleaning the raw descriptions."""
+        username = fields.get("username")
+        if username and "Profile picture of" in username:
+            username = username.replace("Profile picture of", "").strip()
+        sound = fields.get("sound")
+        if sound and "• Original audio" in sound:
+            sound = sound.split("• Original audio")[0].strip()
+        likes = fields.get("likes")
+        if likes and "likes" in likes.lower():
+            likes = likes.lower().replace("view likes", "").strip()
+        return cls(
+            username=username,
+            caption=fields.get("caption"),
+            likes=likes,
+            reshares=fields.get("reshares"),
+            sound=sound,
+            follow_visible=bool(fields.get("follow_visible")),
         )
 
-    return reels
+    def as_result(self) -> dict:
+        """The keys process_reel has always returned."""
+        return {
+            "username": self.username,
+            "likes_text": self.likes,
+            "reshares_text": self.reshares,
+            "caption": self.caption,
+            "sound": self.sound,
+            "follow_visible": self.follow_visible,
+        }
+
+
+def reel_metadata_fields(xpath_config) -> dict:
+    """FieldSpecs for everything process_reel reads from the reel viewer."""
+    return {
+        "username": FieldSpec(
+            xpath_config.reel_profile_picture_desc_contains, "contentDescription"
+        ),
+        "caption": FieldSpec(xpath_config.reel_caption_container),
+        "likes": FieldSpec(xpath_config.reel_likes_button_desc, "contentDescription"),
+        "reshares": FieldSpec(
+            xpath_config.reel_reshare_button_desc, "contentDescription"
+        ),
+        "sound": FieldSpec(
+            xpath_config.reel_audio_link_desc_contains, "contentDescription"
+        ),
+        "follow_visible": FieldSpec(xpath_config.reel_follow_button_text, "exists"),
+    }
+
+
+def extract_reel_metadata(
+    insta_actions: InstagramInteractions, timeout: float = 2
+) -> ReelMetadata:
+    """
+    Reads the open reel's metadata from one hierarchy snapshot, after a single
+    short wait for the reel viewer (its Like button) to appear.
+    """
+    xpath_config = insta_actions.xpath_config
+    fields = insta_actions.extract_fields(
+        reel_metadata_fields(xpath_config),
+        ready_xpath=xpath_config.reel_like_or_unlike_button_desc,
+        timeout=timeout,
+    )
+    return ReelMetadata.from_fields(fields)
 
 
 def process_reel(
@@ -233,50 +313,10 @@ def process_reel(
 
     random_delay("after_post_tap")
 
-    # --- Extract reel metadata ---
-    # Use XPaths from config
-    username = insta_actions.get_element_attribute(
-        insta_actions.xpath_config.reel_profile_picture_desc_contains,
-        "contentDescription",
-        timeout=2,
-    )
-    if username and "Profile picture of" in username:
-        username = username.replace("Profile picture of", "").strip()
-
-    caption = insta_actions.get_element_text(
-        insta_actions.xpath_config.reel_caption_container,  # Use the defined property
-        timeout=2,
-    )
-
-    likes = insta_actions.get_element_attribute(
-        insta_actions.xpath_config.reel_likes_button_desc,
-        "contentDescription",
-        timeout=2,
-    )
-
-    reshares = insta_actions.get_element_attribute(
-        insta_actions.xpath_config.reel_reshare_button_desc,
-        "contentDescription",
-        timeout=2,
-    )
-
-    sound = insta_actions.get_element_attribute(
-        insta_actions.xpath_config.reel_audio_link_desc_contains,
-        "contentDescription",
-        timeout=2,
-    )
-
-    follow_btn_exists = insta_actions.element_exists(
-        insta_actions.xpath_config.reel_follow_button_text
-    )
-
-    if sound and "• Original audio" in sound:
-        sound = sound.split("• Original audio")[0].strip()
-    if likes and "likes" in likes.lower():
-        likes = likes.lower().replace("view likes", "").strip()
-
+    # --- Extract reel metadata (one snapshot) ---
+    metadata = extract_reel_metadata(insta_actions)
     logger.info(
-        f"[REEL DATA] user={username}, likes={likes}, reshares={reshares}, caption_preview={caption[:50] if caption else 'N/A'}..., sound={sound}, follow_visible={follow_btn_exists}"
+        f"[REEL DATA] user={metadata.username}, likes={metadata.likes}, reshares={metadata.reshares}, caption_preview={metadata.caption[:50] if metadata.caption else 'N/A'}..., sound={metadata.sound}, follow_visible={metadata.follow_visible}"
     )
 
     # --- Central timing loop for interactions ---
@@ -325,18 +365,11 @@ def process_reel(
     like_unlike_xpath_for_verify = (
         insta_actions.xpath_config.reel_like_or_unlike_button_desc
     )
-    insta_actions.navigate_back_from_reel(  # Renamed from navigate_back_from_reel
-        verify_element_disappears=like_unlike_xpath_for_verify
-    )
+    insta_actions.navigate_back_from_reel(verify_xpath=like_unlike_xpath_for_verify)
     random_delay("back_delay")
 
     return {
-        "username": username,
-        "likes_text": likes,
-        "reshares_text": reshares,
-        "caption": caption,
-        "sound": sound,
-        "follow_visible": follow_btn_exists,
+        **metadata.as_result(),
         "liked": liked,
         "commented": commented,
     }
@@ -354,7 +387,7 @@ def perform_keyword_search(insta_actions: InstagramInteractions, keyword: str) -
     search_xpath = xpath_config.explore_search_bar_rid
     results_recycler_xpath = xpath_config.search_results_recycler_view
 
-    typer = StealthTyper(device_id=insta_actions.device.serial)
+    typer = get_stealth_typer(insta_actions.device)
 
     try:
         if not insta_actions.wait_for_element_appear(search_xpath, timeout=10):
@@ -393,15 +426,22 @@ def perform_keyword_search(insta_actions: InstagramInteractions, keyword: str) -
         return False
 
 
-def run_warmup_session(insta_actions: InstagramInteractions):
+def run_warmup_session(
+    insta_actions: InstagramInteractions, max_runtime_seconds: Optional[int] = None
+) -> dict:
     """
     Runs the main warmup/scrolling session logic. Uses insta_actions instance and SCROLLER_CONFIG.
 
     Args:
         insta_actions: The initialized InstagramInteractions instance.
+        max_runtime_seconds: Session time limit; defaults to the configured value.
+
+    Returns:
+        dict: Session stats {"ok", "reels_processed", "liked", "commented", "runtime"}.
     """
     # Get config values safely
-    max_runtime_seconds = SCROLLER_CONFIG.get("max_runtime_seconds", 180)
+    if max_runtime_seconds is None:
+        max_runtime_seconds = SCROLLER_CONFIG.get("max_runtime_seconds", 180)
     max_scrolls = SCROLLER_CONFIG.get("max_scrolls", 50)
     percent_reels_to_watch = SCROLLER_CONFIG.get("percent_reels_to_watch", 0.7)
     idle_after_actions_range = SCROLLER_CONFIG.get("idle_after_actions", [3, 6])
@@ -428,7 +468,7 @@ def run_warmup_session(insta_actions: InstagramInteractions):
         logger.error("❌ Failed to launch/ready Instagram app. Exiting warmup session.")
         if popup_handler:
             popup_handler.stop_watcher_loop()
-        return
+        return _session_stats(False, [], 0.0)
 
     logger.info("✅ Instagram app is ready.")
 
@@ -443,7 +483,7 @@ def run_warmup_session(insta_actions: InstagramInteractions):
         if popup_handler:
             popup_handler.stop_watcher_loop()
         insta_actions.close_app()
-        return
+        return _session_stats(False, [], 0.0)
 
     # --- Perform Keyword Search ---
     keyword = random.choice(KEYWORDS)  # Use keywords loaded from config
@@ -455,7 +495,7 @@ def run_warmup_session(insta_actions: InstagramInteractions):
         if popup_handler:
             popup_handler.stop_watcher_loop()
         insta_actions.close_app()
-        return
+        return _session_stats(False, [], 0.0)
 
     # --- Main Scrolling Loop ---
     start_time = time.time()
@@ -539,101 +579,150 @@ def run_warmup_session(insta_actions: InstagramInteractions):
     insta_actions.close_app()
 
     # --- Log Summary ---
-    total_liked = sum(1 for r in all_reels_processed_info if r.get("liked"))
-    total_comments_simulated = sum(
-        1 for r in all_reels_processed_info if r.get("commented")
-    )
+    stats = _session_stats(True, all_reels_processed_info, duration)
     logger.info("📊 Session Summary:")
-    logger.info(f"  - Total Reels Processed: {len(all_reels_processed_info)}")
-    logger.info(f"  - Total Reels Liked:     {total_liked}")
-    logger.info(f"  - Comment Interactions:  {total_comments_simulated}")
+    logger.info(f"  - Total Reels Processed: {stats['reels_processed']}")
+    logger.info(f"  - Total Reels Liked:     {stats['liked']}")
+    logger.info(f"  - Comment Interactions:  {stats['commented']}")
+    return stats
 
 
-def main():
-    """Main function to run the warmup session based on Airtable records."""
-    # --- Configuration and Setup ---
-    client = AirtableClient(table_key="warmup_accounts")
-    warmup_records = client.get_pending_warmup_records()
+def _session_stats(ok: bool, processed: list, runtime: float) -> dict:
+    return {
+        "ok": ok,
+        "reels_processed": len(processed),
+        "liked": sum(1 for r in processed if r.get("liked")),
+        "commented": sum(1 for r in processed if r.get("commented")),
+        "runtime": round(runtime, 1),
+    }
 
-    if not warmup_records:
-        logger.info("No accounts scheduled for warmup today.")
-        return
 
-    logger.info(f"📦 Starting warmup session for {len(warmup_records)} accounts")
+def run_account_warmup(record: dict, client: AirtableClient) -> dict:
+    """
+    Runs one warmup session for a single account record on its device and
+    queues the result to Airtable. Safe to call from a per-device worker
+    thread: everything device-specific (u2 connection, InstagramInteractions,
+    PopupHandler) is created here.
 
-    # --- Loop Through Accounts ---
-    for record in warmup_records:
-        username = record.get("username", "UnknownUser")
-        device_id = record.get("device_id")
-        package_name = record.get("package_name")
-        record_id = record.get("record_id")
+    Args:
+        record (dict): {"record_id", "username", "device_id", "package_name"}.
+        client (AirtableClient): Client used to queue the result update.
 
-        if not device_id or not package_name or not record_id:
-            logger.error(
-                f"Skipping record for user '{username}' due to missing device_id, package_name, or record_id."
-            )
-            continue
+    Returns:
+        dict: The record's identifiers plus "status" ("complete", "failed",
+              "error" or "skipped"), "error" and the session stats.
+    """
+    username = record.get("username", "UnknownUser")
+    device_id = record.get("device_id")
+    package_name = record.get("package_name")
+    record_id = record.get("record_id")
+    result = {
+        "username": username,
+        "device_id": device_id,
+        "record_id": record_id,
+        "status": "skipped",
+        "error": None,
+        **_session_stats(False, [], 0.0),
+    }
 
-        logger.info(
-            f"--- Running warmup for @{username} on {device_id} ({package_name}) ---"
+    if not device_id or not package_name or not record_id:
+        logger.error(
+            f"Skipping record for user '{username}' due to missing device_id, package_name, or record_id."
         )
+        result["error"] = "missing device_id, package_name or record_id"
+        return result
+
+    logger.info(
+        f"--- Running warmup for @{username} on {device_id} ({package_name}) ---"
+    )
 
-        insta_actions = None
+    insta_actions = None
+    try:
+        logger.info(f"🔌 Connecting to device: {device_id}")
+        device = u2.connect(device_id, connect_timeout=20)
         try:
-            logger.info(f"🔌 Connecting to device: {device_id}")
-            device = u2.connect(device_id, connect_timeout=20)
-            try:
-                info = device.info
-                logger.info(
-                    f"✅ Connected to {device.serial} - Product: {info.get('productName', 'N/A')}"
-                )
-            except Exception as conn_err:
-                raise ConnectionError(
-                    f"Failed to connect or communicate with device {device_id}: {conn_err}"
-                )
-
-            insta_actions = InstagramInteractions(
-                device, package_name, airtable_manager=None
+            info = device.info
+            logger.info(
+                f"✅ Connected to {device.serial} - Product: {info.get('productName', 'N/A')}"
             )
-
-            # --- Run the Warmup Session ---
-            max_runtime = SCROLLER_CONFIG.get("max_runtime_seconds", 180)
-            run_warmup_session(
-                insta_actions=insta_actions, max_runtime_seconds=max_runtime
+        except Exception as conn_err:
+            raise ConnectionError(
+                f"Failed to connect or communicate with device {device_id}: {conn_err}"
             )
 
-            # --- Update Airtable on Success ---
-            if isinstance(record_id, str):
-                client.update_record_fields(record_id, {"Daily Warmup Complete": True})
-                logger.info(f"✅ Warmup complete and marked for @{username}")
-            else:
-                logger.error(
-                    f"Cannot mark warmup complete due to invalid record_id: {record_id}"
-                )
+        insta_actions = InstagramInteractions(
+            device, package_name, airtable_manager=None
+        )
 
-        except ConnectionError as conn_err:
+        # --- Run the Warmup Session ---
+        max_runtime = SCROLLER_CONFIG.get("max_runtime_seconds", 180)
+        stats = run_warmup_session(
+            insta_actions=insta_actions, max_runtime_seconds=max_runtime
+        )
+        result.update(stats)
+
+        # --- Update Airtable on Success ---
+        if not stats["ok"]:
+            result["status"] = "failed"
+            result["error"] = "session did not reach the search feed"
+        elif isinstance(record_id, str):
+            client.enqueue_record_update(record_id, {"Daily Warmup Complete": True})
+            result["status"] = "complete"
+            logger.info(f"✅ Warmup complete and marked for @{username}")
+        else:
             logger.error(
-                f"❌ Connection Error for @{username} on {device_id}: {conn_err}"
+                f"Cannot mark warmup complete due to invalid record_id: {record_id}"
             )
-            if isinstance(record_id, str):
-                client.update_record_fields(
-                    record_id, {"Warmup Errors": f"Connection Error: {conn_err}"}
-                )
-        except Exception as e:
-            logger.error(
-                f"❌ Unhandled exception during warmup for @{username}: {e}",
-                exc_info=True,
+
+    except ConnectionError as conn_err:
+        logger.error(f"❌ Connection Error for @{username} on {device_id}: {conn_err}")
+        result["status"] = "error"
+        result["error"] = f"Connection Error: {conn_err}"
+        if isinstance(record_id, str):
+            client.enqueue_record_update(
+                record_id, {"Warmup Errors": f"Connection Error: {conn_err}"}
             )
-            if isinstance(record_id, str):
-                client.update_record_fields(
-                    record_id, {"Warmup Errors": f"Runtime Error: {e}"}
-                )
-        finally:
-            if insta_actions:
-                logger.info(f"Ensuring app is closed for @{username}...")
-                insta_actions.close_app()
-            logger.info(f"--- Finished processing for @{username} ---")
-            time.sleep(random.uniform(5, 10))
+    except Exception as e:
+        logger.error(
+            f"❌ Unhandled exception during warmup for @{username}: {e}",
+            exc_info=True,
+        )
+        result["status"] = "error"
+        result["error"] = f"Runtime Error: {e}"
+        if isinstance(record_id, str):
+            client.enqueue_record_update(
+                record_id, {"Warmup Errors": f"Runtime Error: {e}"}
+            )
+    finally:
+        if insta_actions:
+            logger.info(f"Ensuring app is closed for @{username}...")
+            insta_actions.close_app()
+        logger.info(f"--- Finished processing for @{username} ---")
+
+    return result
+
+
+def main():
+    """Main function to run the warmup session based on Airtable records."""
+    # --- Configuration and Setup ---
+    client = get_airtable_client(table_key="warmup_accounts")
+    warmup_records = client.get_pending_warmup_records()
+
+    if not warmup_records:
+        logger.info("No accounts scheduled for warmup today.")
+        return
+
+    logger.info(f"📦 Starting warmup session for {len(warmup_records)} accounts")
+
+    # --- Loop Through Accounts ---
+    # Sequential; WarmupBot/fleet_runner.py runs one worker per device instead.
+    for record in warmup_records:
+        run_account_warmup(record, client)
+        time.sleep(random.uniform(5, 10))
+
+    # Warmup results are queued; make sure they reach Airtable before exiting
+    if not drain_airtable_outbox(timeout=60):
+        logger.warning("⚠️ Some Airtable updates are still queued; they will be retried next run.")
 
 
 if __name__ == "__main__":
@@ -113,6 +113,7 @@
         "poetry-core"
         "poetry-dynamic-versioning"
         "python-dotenv"
+        "aiohttp"
         "scikit-image"
         "pandas"
         "google-auth"